@@ -5,6 +5,19 @@ echo "🚀 Running migrations and collecting static files..."
 python manage.py migrate --noinput
 python manage.py collectstatic --noinput
 
+# ⚙️ worker مهام الخلفية (الاستيراد والتصدير) — JOBS_WORKER=0 لو شغال في container لوحده
+if [ "${JOBS_WORKER:-1}" = "1" ]; then
+  echo "⚙️ Starting background jobs worker..."
+  python manage.py run_jobs &
+fi
+
+# 📤 relay للـ outbox (RealtimeEvent): يبعت اللي موصلش ويمسح المتبعت القديم
+#    الإرسال محتاج CHANNEL_REDIS_URL — REALTIME_RELAY=0 لو شغال في container لوحده
+if [ "${REALTIME_RELAY:-1}" = "1" ]; then
+  echo "📤 Starting realtime outbox relay..."
+  python manage.py relay_events &
+fi
+
 echo "✅ Starting Daphne ASGI server..."
 exec daphne -b 0.0.0.0 -p 8001 sweets_factory.asgi:application
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HrConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hr'
+
+    def ready(self):
+        from . import jobs  # noqa: F401  ✅ تسجيل مهام الخلفية (تصدير المتقدمين)
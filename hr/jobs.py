@@ -0,0 +1,114 @@
+# hr/jobs.py
+# ==============================================
+# ⚙️ تصدير المتقدمين في الخلفية (orders/jobs.py)
+# ==============================================
+# export_applicants_excel بيحسب الصلاحية والفلاتر ويبعتها params، والملف بيتبني هنا.
+from datetime import date
+
+from orders.exports import XlsxExport, iter_rows
+from orders.jobs import register
+from orders.utils import day_range
+
+from .models import Applicant, ApplicantExperience
+
+
+@register("hr_export_applicants", "تصدير المتقدمين")
+def export_applicants(ctx, created_by=None, date_from=None, date_to=None):
+    # HR: الكل — HR_HELP: بتاعه فقط (الـ view بيبعت created_by)
+    qs = Applicant.objects.all().order_by("order_number")
+    if created_by:
+        qs = qs.filter(created_by_id=created_by)
+
+    # فلاتر اختيارية: تاريخ من/إلى (على created_at)
+    if date_from:
+        qs = qs.filter(**day_range("created_at", start=date.fromisoformat(date_from)))
+    if date_to:
+        qs = qs.filter(**day_range("created_at", end=date.fromisoformat(date_to)))
+
+    # 📤 write-only + iterator → ذاكرة ثابتة مهما كان عدد الطلبات (orders/exports.py)
+    export = XlsxExport(header_color="000000")
+
+    # نفس الحقول الموجودة في التصدير الفردي لكن كأعمدة
+    headers = [
+        "رقم الطلب","الاسم","الرقم القومي","الهاتف",
+        "الحالة الاجتماعية","الجنسية","النوع","الديانة","الموقف من التجنيد",
+        "البريد","اسم القريب","هاتف القريب","مدخن","وسيلة/سيارة",
+        "المؤهل","سنة التخرج","جهة الحصول","التخصص","دراسات عليا","التقدير",
+        "الوظيفة المتقدم لها","كود الوظيفة","تاريخ التقديم",
+        "سبق التقديم بالشركة","أقارب بالشركة","تفاصيل أقارب بالشركة",
+        "أقارب/أصدقاء بشركات منافسة","تفاصيل أقارب بشركات منافسة",
+        "مشاكل صحية","تفاصيل المشاكل الصحية",
+        "الحالة الحالية","أُنشئ بواسطة","تاريخ الإنشاء",
+        "آخر تعديل بواسطة","آخر تعديل","القرار بواسطة","تاريخ القرار"
+    ]
+    ws = export.sheet("الطلبات (كامل)", headers, widths=[8, 30, 14, 11] + [12] * (len(headers) - 4), freeze=True)
+
+    qs = qs.select_related("created_by", "last_updated_by", "decision_by")
+    for a in ctx.track(iter_rows(qs), qs.count()):
+        ws.append([
+            a.order_number,
+            a.full_name,
+            a.national_id,
+            a.phone,
+            (a.get_marital_status_display() if getattr(a, "marital_status", None) else ""),
+            (a.get_nationality_display() if getattr(a, "nationality", None) else ""),
+            (a.get_gender_display() if getattr(a, "gender", None) else ""),
+            (a.get_religion_display() if getattr(a, "religion", None) else ""),
+            (a.get_military_status_display() if getattr(a, "military_status", None) else ""),
+            a.email or "",
+            a.relative_name or "",
+            a.relative_phone or "",
+            ("نعم" if a.is_smoker else "لا"),
+            (a.get_vehicle_ownership_display() if getattr(a, "vehicle_ownership", None) else ""),
+            (a.get_edu_degree_display() if getattr(a, "edu_degree", None) else ""),
+            a.grad_year or "",
+            a.edu_institution or "",
+            a.specialization or "",
+            a.postgrad_study or "",
+            (a.get_edu_grade_display() if getattr(a, "edu_grade", None) else ""),
+            (a.get_job_applied_display() if getattr(a, "job_applied", None) else ""),
+            a.job_code or "",
+            a.submitted_at.strftime("%Y-%m-%d %H:%M:%S") if a.submitted_at else "",
+            ("نعم" if a.prev_applied else "لا"),
+            ("نعم" if a.has_relatives_in_company else "لا"),
+            a.relatives_in_company or "",
+            ("نعم" if a.has_relatives_in_competitors else "لا"),
+            a.relatives_in_competitors or "",
+            ("نعم" if a.has_health_issues else "لا"),
+            a.health_issues_details or "",
+            (a.get_status_display() if getattr(a, "status", None) else ""),
+            (a.created_by.get_full_name() if a.created_by else ""),
+            a.created_at.strftime("%Y-%m-%d %H:%M:%S") if a.created_at else "",
+            (a.last_updated_by.get_full_name() if a.last_updated_by else ""),
+            a.updated_at.strftime("%Y-%m-%d %H:%M:%S") if a.updated_at else "",
+            (a.decision_by.get_full_name() if a.decision_by else ""),
+            a.decision_at.strftime("%Y-%m-%d %H:%M:%S") if a.decision_at else "",
+        ])
+
+    # شيت مجمّع للخبرات لكل المتقدمين (استعلام واحد بدل استعلام لكل متقدم)
+    ws2 = export.sheet(
+        "الخبرات",
+        ["رقم الطلب","الاسم","جهة العمل","الوظيفة","السنوات","الراتب","سبب ترك العمل"],
+        widths=[8, 30, 25, 20, 6, 10, 30],
+        freeze=True,
+    )
+    experiences = (
+        ApplicantExperience.objects.filter(applicant__in=qs.values("order_number"))
+        .order_by("applicant__order_number", "id")
+        .values_list(
+            "applicant__order_number", "applicant__full_name", "employer",
+            "job_title", "years", "salary", "reason_for_leaving",
+        )
+    )
+    for order_number, full_name, employer, job_title, years, salary, reason in iter_rows(experiences):
+        ws2.append([
+            order_number,
+            full_name,
+            employer,
+            job_title,
+            years,
+            float(salary) if salary is not None else "",
+            reason,
+        ])
+
+    ctx.save_workbook(export, "applicants_full.xlsx")
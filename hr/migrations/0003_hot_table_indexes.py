@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0002_alter_applicant_edu_degree_alter_applicant_edu_grade_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicant',
+            index=models.Index(fields=['created_at'], name='applicant_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicant',
+            index=models.Index(fields=['created_by', 'created_at'], name='applicant_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicant',
+            index=models.Index(fields=['decision_at'], name='applicant_decision_idx'),
+        ),
+    ]
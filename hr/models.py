@@ -141,6 +141,13 @@ class Applicant(models.Model):
 
     class Meta:
         ordering = ["order_number"]
+        indexes = [
+            # 🔎 قايمة الطلبات: فترة (وطلبات الموظف بتاعه بس لـ HR Help)
+            models.Index(fields=["created_at"], name="applicant_created_idx"),
+            models.Index(fields=["created_by", "created_at"], name="applicant_creator_created_idx"),
+            # ✅ المقبولين حسب تاريخ القرار
+            models.Index(fields=["decision_at"], name="applicant_decision_idx"),
+        ]
 
     def __str__(self):
         return f"{self.order_number} - {self.full_name}"
@@ -1,24 +1,19 @@
 # hr/utils.py
+from orders.roles import get_role_ctx  # 🔐 الدور محسوب مرة واحدة لكل request
+
+
 def is_hr(user):
     """يتأكد إن المستخدم ليه دور HR"""
-    return hasattr(user, "userprofile") and user.userprofile.role == "hr"
+    return get_role_ctx(user).role == "hr"
 
 def is_hr_help(user):
     """يتأكد إن المستخدم ليه دور HR Help"""
-    return hasattr(user, "userprofile") and user.userprofile.role == "hr_help"
+    return get_role_ctx(user).role == "hr_help"
 def is_hr_or_hr_help(user):
-    return user.is_authenticated and (
-        getattr(user.userprofile, "role", None) in ["hr", "hr_help"]
-    )
+    return get_role_ctx(user).has_role("hr", "hr_help")
 def is_admin_or_hr_or_hr_help(user):
-    return user.is_authenticated and (
-        getattr(user.userprofile, "role", None) in ["hr", "hr_help","admin"]
-    )
+    return get_role_ctx(user).has_role("hr", "hr_help", "admin")
 def is_admin_or_hr(user):
-    return user.is_authenticated and (
-        getattr(user.userprofile, "role", None) in ["hr","admin"]
-    )
+    return get_role_ctx(user).has_role("hr", "admin")
 def is_admin(user):
-    return user.is_authenticated and (
-        getattr(user.userprofile, "role", None) in ["admin"]
-    )
+    return get_role_ctx(user).has_role("admin")
@@ -53,9 +53,9 @@ def _diff_changes(instance, old_data: dict, fields):
 # ------------------------------------------------------------------------------
 # 1) إنشاء طلب جديد (HR_HELP فقط)
 # ------------------------------------------------------------------------------
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.urls import reverse
+from orders import broadcast, jobs
+from orders.utils import day_range
 @login_required
 @user_passes_test(is_admin_or_hr_or_hr_help)
 @transaction.atomic
@@ -78,8 +78,7 @@ def applicant_create(request):
             formset.instance = applicant
             formset.save()
             # ... داخل الدالة بعد حفظ applicant مباشرة
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
+            broadcast.publish(
                 "hr_applicants",
                 {
                     "type": "hr_applicant_update",
@@ -184,14 +183,14 @@ def applicant_list(request):
     try:
         dt_from = datetime.strptime(date_from, "%Y-%m-%d").date()
         if dt_from <= today_date:
-            qs = qs.filter(created_at__date__gte=dt_from)
+            qs = qs.filter(**day_range("created_at", start=dt_from))
     except ValueError:
         pass
 
     try:
         dt_to = datetime.strptime(date_to, "%Y-%m-%d").date()
         if dt_to <= today_date:
-            qs = qs.filter(created_at__date__lte=dt_to)
+            qs = qs.filter(**day_range("created_at", end=dt_to))
     except ValueError:
         pass
 
@@ -396,8 +395,7 @@ def accepted_list(request):
         dt_from = dt_to
         date_from = date_to
 
-    qs = qs.filter(applicant__decision_at__date__gte=dt_from,
-                   applicant__decision_at__date__lte=dt_to)
+    qs = qs.filter(**day_range("applicant__decision_at", dt_from, dt_to))
 
     return render(request, "hr/accepted_list.html", {
         "accepted": qs,
@@ -446,8 +444,7 @@ def deleted_list(request):
         dt_from = dt_to
         date_from = date_to
 
-    qs = qs.filter(snapshot_at__date__gte=dt_from,
-                   snapshot_at__date__lte=dt_to)
+    qs = qs.filter(**day_range("snapshot_at", dt_from, dt_to))
 
     return render(request, "hr/deleted_list.html", {
         "deleted": qs,
@@ -656,109 +653,18 @@ def export_applicant_excel(request, order_number):
 @user_passes_test(is_admin_or_hr)
 def export_applicants_excel(request):
     # HR: الكل — HR_HELP: بتاعه فقط
-    qs = Applicant.objects.all().order_by("order_number")
+    params = {}
     if is_hr_help(request.user) and not is_hr(request.user):
-        qs = qs.filter(created_by=request.user)
+        params["created_by"] = request.user.id
 
     # فلاتر اختيارية: تاريخ من/إلى (على created_at)
-    date_from = request.GET.get("from")
-    date_to = request.GET.get("to")
-    if date_from:
-        try:
-            dt = datetime.strptime(date_from, "%Y-%m-%d")
-            qs = qs.filter(created_at__date__gte=dt.date())
-        except ValueError:
-            pass
-    if date_to:
-        try:
-            dt = datetime.strptime(date_to, "%Y-%m-%d")
-            qs = qs.filter(created_at__date__lte=dt.date())
-        except ValueError:
-            pass
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "الطلبات (كامل)"
-
-    # نفس الحقول الموجودة في التصدير الفردي لكن كأعمدة
-    headers = [
-        "رقم الطلب","الاسم","الرقم القومي","الهاتف",
-        "الحالة الاجتماعية","الجنسية","النوع","الديانة","الموقف من التجنيد",
-        "البريد","اسم القريب","هاتف القريب","مدخن","وسيلة/سيارة",
-        "المؤهل","سنة التخرج","جهة الحصول","التخصص","دراسات عليا","التقدير",
-        "الوظيفة المتقدم لها","كود الوظيفة","تاريخ التقديم",
-        "سبق التقديم بالشركة","أقارب بالشركة","تفاصيل أقارب بالشركة",
-        "أقارب/أصدقاء بشركات منافسة","تفاصيل أقارب بشركات منافسة",
-        "مشاكل صحية","تفاصيل المشاكل الصحية",
-        "الحالة الحالية","أُنشئ بواسطة","تاريخ الإنشاء",
-        "آخر تعديل بواسطة","آخر تعديل","القرار بواسطة","تاريخ القرار"
-    ]
-    ws.append(headers)
-
-    for a in qs:
-        ws.append([
-            a.order_number,
-            a.full_name,
-            a.national_id,
-            a.phone,
-            (a.get_marital_status_display() if getattr(a, "marital_status", None) else ""),
-            (a.get_nationality_display() if getattr(a, "nationality", None) else ""),
-            (a.get_gender_display() if getattr(a, "gender", None) else ""),
-            (a.get_religion_display() if getattr(a, "religion", None) else ""),
-            (a.get_military_status_display() if getattr(a, "military_status", None) else ""),
-            a.email or "",
-            a.relative_name or "",
-            a.relative_phone or "",
-            ("نعم" if a.is_smoker else "لا"),
-            (a.get_vehicle_ownership_display() if getattr(a, "vehicle_ownership", None) else ""),
-            (a.get_edu_degree_display() if getattr(a, "edu_degree", None) else ""),
-            a.grad_year or "",
-            a.edu_institution or "",
-            a.specialization or "",
-            a.postgrad_study or "",
-            (a.get_edu_grade_display() if getattr(a, "edu_grade", None) else ""),
-            (a.get_job_applied_display() if getattr(a, "job_applied", None) else ""),
-            a.job_code or "",
-            a.submitted_at.strftime("%Y-%m-%d %H:%M:%S") if a.submitted_at else "",
-            ("نعم" if a.prev_applied else "لا"),
-            ("نعم" if a.has_relatives_in_company else "لا"),
-            a.relatives_in_company or "",
-            ("نعم" if a.has_relatives_in_competitors else "لا"),
-            a.relatives_in_competitors or "",
-            ("نعم" if a.has_health_issues else "لا"),
-            a.health_issues_details or "",
-            (a.get_status_display() if getattr(a, "status", None) else ""),
-            (a.created_by.get_full_name() if a.created_by else ""),
-            a.created_at.strftime("%Y-%m-%d %H:%M:%S") if a.created_at else "",
-            (a.last_updated_by.get_full_name() if a.last_updated_by else ""),
-            a.updated_at.strftime("%Y-%m-%d %H:%M:%S") if a.updated_at else "",
-            (a.decision_by.get_full_name() if a.decision_by else ""),
-            a.decision_at.strftime("%Y-%m-%d %H:%M:%S") if a.decision_at else "",
-        ])
-
-    _style_table(ws)
-    _worksheet_autofit(ws)
-
-    # شيت مجمّع للخبرات لكل المتقدمين
-    ws2 = wb.create_sheet("الخبرات")
-    ws2.append(["رقم الطلب","الاسم","جهة العمل","الوظيفة","السنوات","الراتب","سبب ترك العمل"])
-    for a in qs:
-        for exp in a.experiences.all():
-            ws2.append([
-                a.order_number,
-                a.full_name,
-                exp.employer,
-                exp.job_title,
-                exp.years,
-                float(exp.salary) if exp.salary is not None else "",
-                exp.reason_for_leaving
-            ])
-
-    _style_table(ws2)
-    _worksheet_autofit(ws2)
+    for key in ("from", "to"):
+        value = request.GET.get(key)
+        if value:
+            try:
+                params[f"date_{key}"] = datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+            except ValueError:
+                pass
 
-    filename = "applicants_full.xlsx"
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
+    # ⚙️ الملف بيتبني في الخلفية (hr/jobs.py) → صفحة المهمة فيها التقدم ولينك التنزيل
+    return jobs.start(request, "hr_export_applicants", params)
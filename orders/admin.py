@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
-from .models import (Branch, Product, Inventory, Reservation, InventoryTransaction,Customer, Category, UserProfile, DailyRequest, SecondCategory)
+from .models import (Branch, Product, Inventory, Reservation, InventoryTransaction,Customer, Category, UserProfile, DailyRequest, SecondCategory, RealtimeEvent,
+                     ProductionConfirmation, Job)
 # --------------------------------------------------------
 # 📦 المنتجات
 @admin.register(Product)
@@ -103,3 +104,19 @@ class DailyRequestAdmin(admin.ModelAdmin):
     def get_unit(self, obj):
         return obj.product.get_unit_display()
     get_unit.short_description = "الوحدة"
+#-------------------------------------------------------------------------------------------------------
+@admin.register(ProductionConfirmation)
+class ProductionConfirmationAdmin(admin.ModelAdmin):
+    list_display = ("date", "branch", "category", "confirmed_by", "confirmed_at")
+    list_filter = ("date", "branch", "category")
+#-------------------------------------------------------------------------------------------------------
+@admin.register(RealtimeEvent)
+class RealtimeEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "groups", "created_at", "sent_at")
+    readonly_fields = ("groups", "payload", "created_at", "sent_at")
+#-------------------------------------------------------------------------------------------------------
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "progress", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "kind")
+    readonly_fields = ("params", "result", "input_file", "result_file", "created_at", "started_at", "finished_at")
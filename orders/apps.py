@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        from . import reporting  # noqa: F401  ✅ تسجيل signals إلغاء كاش التقارير
+        from . import roles  # noqa: F401  ✅ تسجيل signals إلغاء كاش الصلاحيات
+        from . import export_jobs  # noqa: F401  ✅ تسجيل مهام الخلفية (الاستيراد والتصدير)
@@ -0,0 +1,122 @@
+# orders/booking.py
+# ==============================================
+# 📞 حجز الكول سنتر (مشترك بين callcenter العادي و callcenter_book الـ async)
+# ==============================================
+# - parse_quantity(): التحقق من الكمية حسب وحدة المنتج (كيلو → رقمين عشريين، غير كده → عدد صحيح).
+# - book(): كل الكتابة في transaction واحدة (خصم ذري + العميل + الحجز + أحداث البث في الـ outbox).
+#   الـ view الـ async بيناديها في sync_to_async واحدة بس.
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import broadcast
+from .customers import resolve_customer
+from .models import Reservation
+from .stock import check_stock, reserve_stock
+
+
+class InvalidQuantity(ValueError):
+    """كمية مش صالحة (الرسالة جاهزة تتعرض للمستخدم)."""
+#-----------------------------------------------------
+def parse_quantity(product, raw):
+    """الكمية كـ Decimal حسب وحدة المنتج — أو InvalidQuantity."""
+    try:
+        q = Decimal(str((raw or "1").strip()))
+    except (InvalidOperation, ValueError):
+        raise InvalidQuantity("❌ كمية غير صالحة.")
+    if not q.is_finite():
+        raise InvalidQuantity("❌ كمية غير صالحة.")
+
+    if product.unit == "kg":
+        qty = q.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        if qty <= 0:
+            raise InvalidQuantity("❌ الكمية بالكيلو لازم تكون أكبر من 0.")
+        return qty
+
+    # عدد/سرفيز/صاج → أعداد صحيحة فقط
+    qty_int = int(q.to_integral_value(rounding=ROUND_HALF_UP))
+    if qty_int < 1:
+        raise InvalidQuantity("❌ الكمية لازم تكون عددًا صحيحًا موجبًا.")
+    return Decimal(qty_int)
+#-----------------------------------------------------
+def book(user, product, branch, qty, customer_name="", customer_phone="", delivery_type="pickup"):
+    """
+    حجز جديد → (reservation, new_qty).
+    بترفع InsufficientStock أو Inventory.DoesNotExist أو InvalidPhone من غير ما يتكتب أي حاجة.
+    """
+    with transaction.atomic():
+        # ✅ لو المنتج بالكيلو لا تخصم منه كمية (يبقى 999 أو 998 كما هو)
+        if product.unit != "kg":
+            new_qty = reserve_stock(branch.id, product.id, qty)
+        else:
+            new_qty = check_stock(branch.id, product.id, qty)
+
+        # 👤 نفس العميل لو الرقم متسجل قبل كده (orders/customers.py)
+        customer = resolve_customer(customer_name, customer_phone)
+
+        reservation = Reservation.objects.create(
+            customer=customer,
+            product=product,
+            branch=branch,
+            delivery_type=delivery_type,
+            status="pending",
+            quantity=qty,
+            reserved_by=user,
+        )
+
+        # ✅ WebSocket: الأحداث بتتكتب في الـ outbox مع الحجز وتتبعت بعد الـ commit (orders/broadcast.py)
+        created_at = timezone.localtime(reservation.created_at).strftime('%Y-%m-%d %H:%M:%S')
+        customer_fields = {
+            "customer_name": customer.name if customer else "-",
+            "customer_phone": customer.phone if customer else "-",
+        }
+        broadcast.publish_inventory(
+            product, branch, new_qty,
+            message=f"📦 تم تحديث {product.name} في فرع {branch.name} إلى {new_qty}",
+        )
+        broadcast.publish_branch(
+            branch.id,
+            {
+                "type": "branch_update",
+                "message": f"🆕 حجز جديد ({product.name} × {str(qty)})",
+                "reservation_id": reservation.id,
+                "product_name": product.name,
+                "quantity": str(qty),  # ← مهم
+                **customer_fields,
+                "created_at": created_at,
+                "reserved_by": user.username,
+            },
+        )
+        broadcast.publish_reservation(
+            branch.id,
+            {
+                "type": "reservations_update",
+                "action": "new",
+                "message": f"🆕 تم إضافة حجز جديد #{reservation.id}",
+                "reservation_id": reservation.id,
+                "product_name": product.name,
+                "quantity": str(qty),  # ← مهم
+                **customer_fields,
+                "branch_name": branch.name,
+                "delivery_type": reservation.get_delivery_type_display(),
+                "status": reservation.get_status_display(),
+                "created_at": created_at,
+                "decision_at": "",
+                "reserved_by": user.username,
+            },
+        )
+    return reservation, new_qty
+#-----------------------------------------------------
+def success_message(product, customer):
+    return f"✅ تم حجز {product.name}" + (f" للعميل {customer.name}" if customer else "")
+#-----------------------------------------------------
+def name_conflict(customer, entered_name):
+    """
+    الاسم اللي الموظف كتبه غير اسم العميل المتسجل بنفس الرقم → رسالة تحذير (أو None).
+    الحجز بيتسجل على العميل المتسجل (الرقم unique) — التحذير عشان الموظف يتأكد أو يعدل الاسم.
+    """
+    entered_name = (entered_name or "").strip()
+    if customer is None or not entered_name or entered_name == customer.name:
+        return None
+    return f"⚠️ الرقم {customer.phone} متسجل باسم {customer.name} (مش {entered_name}) — الحجز اتسجل باسمه."
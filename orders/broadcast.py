@@ -0,0 +1,348 @@
+# orders/broadcast.py
+# ==============================================
+# 📡 ناقل البث المركزي للـ WebSocket
+# ==============================================
+# كل التعديلات بتسجل أحداثها هنا بدل async_to_sync(group_send) مباشرة:
+#   - الحدث بيتجمع بعد الـ commit بس (transaction.on_commit) → مفيش بث لبيانات اترجعت.
+#   - تحديثات المخزون المتكررة لنفس (فرع، منتج) بتتدمج في آخر قيمة.
+#   - في آخر الـ request (BroadcastMiddleware) كل جروب بيتبعتله رسالة واحدة.
+#     في وضع ASGI (acollect) الرسايل بتتبعت من الـ event loop نفسه ومع بعض.
+#   - الإرسال نفسه في الخلفية (orders/publisher.py) → الـ response مش بيستنى الـ channel layer.
+#   - كل حدث بيتكتب كمان في outbox (RealtimeEvent) → ليه seq، relay_events بيبعت اللي موصلش،
+#     والشاشة بتكمل من آخر seq بعد ما السوكيت يرجع (replay). أحداث الـ transaction كلها
+#     بتتجمع وتتكتب bulk_create واحد بعد الـ commit (صف لكل حدث بقايمة جروباته).
+#   - الجروبات متقسمة حسب الفرع/القسم → كل شاشة بتستلم اللي يخصها بس،
+#     والجروبات العامة (*_updates) لشاشات الأدمن اللي متابعة كل الفروع.
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from decimal import Decimal
+from itertools import count
+
+from asgiref.local import Local
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .publisher import get_publisher
+
+CALLCENTER_GROUP = "callcenter_updates"      # كول سنتر (كل الأقسام)
+BRANCH_GROUP = "branch_updates"              # داشبورد الفروع (أدمن - كل الفروع)
+RESERVATIONS_GROUP = "reservations_updates"  # قايمة الحجوزات (كل الفروع)
+
+_state = Local()
+_seq = count()
+#-----------------------------------------------------
+def _clean(value):
+    """Decimal → نص عشان الـ channel layer و JSON."""
+    return str(value) if isinstance(value, Decimal) else value
+#-----------------------------------------------------
+def branch_group(branch_id):
+    return f"branch_{branch_id}"
+#-----------------------------------------------------
+def reservations_group(branch_id):
+    return f"reservations_{branch_id}"
+#-----------------------------------------------------
+def category_group(category_id):
+    return f"callcenter_cat_{category_id}"
+#-----------------------------------------------------
+def inventory_item(product, branch, new_qty, action="upsert", message=None):
+    """شكل موحد لتحديث مخزون (فرع × منتج) للكول سنتر."""
+    item = {
+        "action": action,
+        "product_id": product.id,
+        "product_name": product.name,
+        "category_id": product.category_id,
+        "category_name": product.category.name if product.category else "",
+        "branch_id": branch.id,
+        "branch_name": branch.name,
+        "new_qty": _clean(new_qty),
+        "unit": product.get_unit_display(),
+    }
+    if message:
+        item["message"] = message
+    return item
+#-----------------------------------------------------
+def publish_inventory(product, branch, new_qty, action="upsert", message=None):
+    """سجل تحديث مخزون يتبعت للكول سنتر بعد الـ commit (مع الدمج)."""
+    item = inventory_item(product, branch, new_qty, action=action, message=message)
+    _record(CALLCENTER_GROUP, [(item, (branch.id, product.id))])
+#-----------------------------------------------------
+def publish_inventory_many(branch, updates, action="upsert"):
+    """publish_inventory لقايمة [(product, new_qty)] — صفوف الـ outbox في query واحدة."""
+    _record(CALLCENTER_GROUP, [
+        (inventory_item(product, branch, qty, action=action), (branch.id, product.id))
+        for product, qty in updates
+    ])
+#-----------------------------------------------------
+def publish(groups, event):
+    """سجل حدث عام لجروب (أو قايمة جروبات) يتبعت بعد الـ commit."""
+    event = {k: _clean(v) for k, v in event.items()}
+    _record(groups, [(event, ("event", next(_seq)))])
+#-----------------------------------------------------
+def publish_branch(branch_id, event):
+    """حدث لشاشة فرع معين + شاشات الأدمن اللي متابعة كل الفروع."""
+    publish([branch_group(branch_id), BRANCH_GROUP], event)
+#-----------------------------------------------------
+def publish_reservation(branch_id, event):
+    """تحديث حجز لقايمة حجوزات الفرع + القايمة العامة."""
+    publish([reservations_group(branch_id), RESERVATIONS_GROUP], event)
+#-----------------------------------------------------
+def _outbox_enabled():
+    return getattr(settings, "REALTIME_OUTBOX_ENABLED", True)
+#-----------------------------------------------------
+def _record(groups, entries):
+    """
+    [(event, key)] لجروب أو أكتر → pending الـ transaction الحالية (بتتكتب وتتجمع بعد الـ commit)،
+    أو على طول لو مفيش transaction مفتوحة.
+    """
+    if not entries:
+        return
+    groups = (groups,) if isinstance(groups, str) else tuple(groups)
+    items = [(groups, event, key) for event, key in entries]
+    pending = _pending()
+    if pending is None:
+        _flush(items)
+    else:
+        pending.extend(items)
+#-----------------------------------------------------
+def _pending():
+    """
+    قايمة أحداث الـ transaction (أو الـ savepoint) الحالية، مربوطة بـ on_commit واحد بيعمل _flush.
+    القايمة عايشة جوه الـ callback نفسه → لو اتعمل rollback بتتشال معاه (مفيش أحداث لبيانات اترجعت).
+    None = autocommit (مفيش commit نستناه).
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    sids = set(connection.savepoint_ids)
+    for callback_sids, func, _ in connection.run_on_commit:
+        if callback_sids == sids and hasattr(func, "outbox_pending"):
+            return func.outbox_pending
+
+    pending = []
+
+    def flush():
+        _flush(pending)
+    flush.outbox_pending = pending
+    transaction.on_commit(flush, robust=True)   # فشل الـ outbox ميوقعش الـ request بعد ما الـ commit تم
+    return pending
+#-----------------------------------------------------
+def _flush(items):
+    """
+    [(groups, event, key)] → bulk_create واحد في RealtimeEvent (event["seq"] = id) وبعدين للإرسال.
+    نفس (الجروبات، المفتاح) أكتر من مرة → آخر قيمة بس (زي الدمج في _collect).
+    ⚠️ الصفوف بتتكتب بعد الـ commit: لو البروسيس وقع قبلها الحدث بيضيع والشاشة بتتصلح مع أول reload.
+    """
+    items = list({(groups, key): (groups, event, key) for groups, event, key in items}.values())
+    if _outbox_enabled():
+        from .models import RealtimeEvent  # lazy: الـ consumers بتعمل import للملف ده قبل django.setup
+        try:
+            rows = RealtimeEvent.objects.bulk_create(
+                [RealtimeEvent(groups=list(groups), payload=event) for groups, event, _ in items]
+            )
+        except DatabaseError as e:
+            print("⚠️ Outbox error:", e)   # البث نفسه يكمل من غير seq
+        else:
+            for (_, event, _), row in zip(items, rows):
+                event["seq"] = row.id
+    for groups, event, key in items:
+        for group in groups:
+            _collect(group, event, key)
+#-----------------------------------------------------
+def _seqs(buffer):
+    return [event["seq"] for events in buffer.values() for event in events.values() if event.get("seq")]
+#-----------------------------------------------------
+def mark_sent(seqs):
+    """الأحداث دي وصلت للـ channel layer → relay_events مش هيبعتها تاني."""
+    if not seqs:
+        return 0
+    from django.utils import timezone
+    from .models import RealtimeEvent
+    return RealtimeEvent.objects.filter(id__in=seqs, sent_at__isnull=True).update(sent_at=timezone.now())
+#-----------------------------------------------------
+def _collect(group, event, key):
+    buffer = getattr(_state, "buffer", None)
+    if buffer is None:
+        # 🟡 برا أي request (مثلاً management command) → ابعت فورًا
+        _send({group: {key: event}})
+        return
+    # نفس المفتاح → آخر قيمة تكسب (بنشيله ونرجعه عشان يفضل الترتيب حسب آخر تعديل)
+    events = buffer.setdefault(group, {})
+    events.pop(key, None)
+    events[key] = event
+#-----------------------------------------------------
+def _inventory_message(items):
+    """عنصر واحد → رسالة عادية، أكتر من عنصر → رسالة batch واحدة."""
+    if len(items) == 1:
+        return dict(items[0], type="callcenter_update")
+    seqs = [item["seq"] for item in items if item.get("seq")]
+    return {
+        "type": "callcenter_update",
+        "action": "batch",
+        "seq": max(seqs) if seqs else None,
+        "items": items,
+        "message": f"📦 تم تحديث المخزون ({len(items)} منتج)",
+    }
+#-----------------------------------------------------
+def _outgoing(buffer):
+    """[(group, message)] اللي هتتبعت من الأحداث المتجمعة."""
+    outgoing = []
+    for group, events in buffer.items():
+        events = list(events.values())
+        if not events:
+            continue
+        if group == CALLCENTER_GROUP:
+            # الكل → الجروب العام، وكل قسم → جروب القسم بتاعه بس
+            outgoing.append((group, _inventory_message(events)))
+            by_category = {}
+            for item in events:
+                by_category.setdefault(item.get("category_id"), []).append(item)
+            for category_id, items in by_category.items():
+                if category_id is not None:
+                    outgoing.append((category_group(category_id), _inventory_message(items)))
+        else:
+            outgoing.extend((group, event) for event in events)
+    return outgoing
+#-----------------------------------------------------
+def _send(buffer):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    failed = 0
+    for group, message in _outgoing(buffer):
+        try:
+            async_to_sync(channel_layer.group_send)(group, message)
+        except Exception as e:
+            print("⚠️ Broadcast error:", e)
+            failed += 1
+    if not failed:
+        mark_sent(_seqs(buffer))
+#-----------------------------------------------------
+async def asend(buffer, ack=True):
+    """
+    زي _send بس من جوه الـ event loop: كل الـ group_send مع بعض (من غير async_to_sync).
+    بترجع عدد الرسايل اللي فشلت. ack=False → مش بيعلّم الصفوف (relay_events بيعلّمها بنفسه).
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return 0
+    outgoing = _outgoing(buffer)
+    results = await asyncio.gather(
+        *(channel_layer.group_send(group, message) for group, message in outgoing),
+        return_exceptions=True,
+    )
+    failed = 0
+    for result in results:
+        if isinstance(result, Exception):
+            print("⚠️ Broadcast error:", result)
+            failed += 1
+    if ack and not failed and _seqs(buffer):
+        # فشل أي رسالة → الدفعة كلها تفضل "لسه متبعتتش" وrelay_events يعيدها
+        await sync_to_async(mark_sent, thread_sensitive=False)(_seqs(buffer))
+    return failed
+#-----------------------------------------------------
+def _queued():
+    return getattr(settings, "BROADCAST_QUEUE_ENABLED", True)
+#-----------------------------------------------------
+@contextmanager
+def collect():
+    """يجمع كل أحداث الـ request ويبعتها مرة واحدة في الآخر."""
+    if getattr(_state, "buffer", None) is not None:
+        # nested → الـ scope الخارجي هو اللي هيبعت
+        yield
+        return
+    _state.buffer = {}
+    try:
+        yield
+    finally:
+        buffer, _state.buffer = _state.buffer, None
+        if _queued():
+            get_publisher().submit(buffer)   # الـ response مش بيستنى الإرسال
+        else:
+            _send(buffer)
+#-----------------------------------------------------
+@asynccontextmanager
+async def acollect():
+    """collect() للـ requests الـ async (BroadcastMiddleware في وضع ASGI)."""
+    if getattr(_state, "buffer", None) is not None:
+        yield
+        return
+    _state.buffer = {}
+    try:
+        yield
+    finally:
+        buffer, _state.buffer = _state.buffer, None
+        if _queued():
+            get_publisher().submit(buffer)
+        else:
+            await asend(buffer)
+#-----------------------------------------------------
+def refresh_inventory(items):
+    """
+    الكمية الحالية من Inventory بدل اللي في الحدث (للأحداث المتأخرة: relay/replay)
+    → حدث قديم عمره ما يغطي على كمية أحدث وصلت قبله.
+    """
+    keys = {(i.get("branch_id"), i.get("product_id")) for i in items}
+    keys.discard((None, None))
+    if not keys:
+        return
+    from .models import Inventory
+    current = {
+        (b, p): qty
+        for b, p, qty in Inventory.objects.filter(
+            branch_id__in={b for b, _ in keys}, product_id__in={p for _, p in keys}
+        ).values_list("branch_id", "product_id", "quantity")
+    }
+    for item in items:
+        qty = current.get((item.get("branch_id"), item.get("product_id")))
+        if qty is not None:
+            item["new_qty"] = _clean(qty)
+#-----------------------------------------------------
+def rows_buffer(rows):
+    """صفوف RealtimeEvent → buffer بنفس شكل _collect (المخزون بالكمية الحالية ومدموج)."""
+    buffer = {}
+    for row in rows:
+        event = dict(row.payload, seq=row.id)
+        for group in row.groups:
+            if group == CALLCENTER_GROUP:
+                key = (event.get("branch_id"), event.get("product_id"))
+            else:
+                key = ("event", row.id)
+            events = buffer.setdefault(group, {})
+            events.pop(key, None)
+            events[key] = event
+    if CALLCENTER_GROUP in buffer:
+        refresh_inventory(list(buffer[CALLCENTER_GROUP].values()))
+    return buffer
+#-----------------------------------------------------
+REPLAY_LIMIT = 500
+REPLAY_SCAN = 5000   # أقصى عدد أحداث (لكل الجروبات) بعد since قبل ما نقول للشاشة تعمل reload
+#-----------------------------------------------------
+def replay(groups, since, limit=REPLAY_LIMIT):
+    """
+    الأحداث اللي فاتت شاشة مشتركة في groups بعد seq معين → [(group, message)]
+    بنفس شكل الإرسال العادي، أو None لو أكتر من limit (أحسن الشاشة تعمل reload).
+    """
+    from .models import RealtimeEvent
+    wanted = set(groups)
+    # جروبات الأقسام مش ليها صفوف: بتتبني من صفوف الكول سنتر العامة
+    source = {CALLCENTER_GROUP if g.startswith(category_group("")) else g for g in wanted}
+    # الجروبات قايمة JSON (مفيش index عليها) → نمشي على الـ ids بعد since ونفلتر هنا،
+    # والـ payload بيتقرا للي يخص الشاشة بس
+    recent = list(
+        RealtimeEvent.objects.filter(id__gt=since).order_by("id").values_list("id", "groups")[: REPLAY_SCAN + 1]
+    )
+    if len(recent) > REPLAY_SCAN:
+        return None
+    ids = [seq for seq, row_groups in recent if source.intersection(row_groups)]
+    if len(ids) > limit:
+        return None
+    rows = list(RealtimeEvent.objects.filter(id__in=ids).order_by("id"))
+    return [(group, message) for group, message in _outgoing(rows_buffer(rows)) if group in wanted]
+#-----------------------------------------------------
+def latest_seq():
+    """آخر seq دلوقتي — الصفحة بتبدأ منه عشان اللي يحصل بعد الـ render ميفوتهاش."""
+    from django.db.models import Max
+    from .models import RealtimeEvent
+    return RealtimeEvent.objects.aggregate(last=Max("id"))["last"] or 0
@@ -0,0 +1,157 @@
+# orders/catalog.py
+# ==============================================
+# 🗂️ كاش الكتالوج (الأقسام + الأقسام الفرعية + المنتجات)
+# ==============================================
+# بدل ما كل صفحة فرع تعمل Product/Category/SecondCategory.objects من الأول:
+#   - snapshot() بيرجع نسخة جاهزة (lists + خرائط + شجرة) متكيشة على مستويين:
+#       1) في ذاكرة البروسيس نفسه (مفيش حتى unpickle)
+#       2) في الكاش المشترك (Redis/LocMem) لباقي البروسيسات
+#   - الـ version = بصمة من max(updated_at) وعدد الصفوف في الجداول التلاتة،
+#     وبيتلغي مع أي save/delete أو بعد import_products.
+#   - الإلغاء بيمسح المفتاح من الكاش بتاع البروسيس اللي عمل التعديل بس لو الكاش LocMem
+#     (بروسيس Daphne تاني أو worker الـ run_jobs) → المفتاح نفسه ليه عمر قصير
+#     (CATALOG_VERSION_TTL): بعده البصمة بتتحسب تاني من الداتابيز (3 aggregates)
+#     فأي بروسيس بيشوف التعديل خلال ثواني حتى من غير Redis.
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Product, SecondCategory
+
+CATALOG_CACHE_TTL = 60 * 60   # ثواني — الـ version هو اللي بيحدد الصلاحية فعلًا
+_VERSION_KEY = "catalog:version"
+_MODELS = (Category, SecondCategory, Product)
+
+_local = (None, None)   # (version, catalog) — آخر نسخة في البروسيس
+#-----------------------------------------------------
+def _fingerprint():
+    """بصمة الكتالوج من الداتابيز (بتتحسب بس لو الـ version مش في الكاش)."""
+    parts = []
+    for model in _MODELS:
+        row = model.objects.order_by().aggregate(n=Count("pk"), last=Max("updated_at"))
+        parts.append(f"{model._meta.model_name}:{row['n']}:{row['last'].isoformat() if row['last'] else '-'}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+#-----------------------------------------------------
+def version():
+    """الـ version الحالي للكتالوج (من الكاش، أو من البصمة لو مش موجود أو عمره خلص)."""
+    current = cache.get(_VERSION_KEY)
+    if current is None:
+        cache.add(_VERSION_KEY, _fingerprint(), getattr(settings, "CATALOG_VERSION_TTL", 5))
+        current = cache.get(_VERSION_KEY)
+    return current
+#-----------------------------------------------------
+def etag(request=None, *args, **kwargs):
+    """ETag الكتالوج الحالي (لـ @condition) — من غير ما نبني النسخة نفسها."""
+    return f"catalog-{version()}"
+#-----------------------------------------------------
+def invalidate():
+    """إلغاء الكتالوج بعد الـ commit (عشان البصمة الجديدة تشوف الداتا الجديدة)."""
+    transaction.on_commit(lambda: cache.delete(_VERSION_KEY))
+#-----------------------------------------------------
+class Catalog:
+    """نسخة ثابتة من الكتالوج — للقراية بس (متعدلش على الـ objects)."""
+
+    def __init__(self, version, categories, second_categories, products):
+        self.version = version
+        self.categories = categories                  # Category (بالـ id)
+        self.second_categories = second_categories    # SecondCategory + main_category جاهز
+        self.all_products = products                  # Product + category/second_category جاهزين
+        self.products = [p for p in products if p.is_available]
+        self.products_by_id = {p.id: p for p in products}
+
+        self.subcategories_by_category = {}
+        for s in second_categories:
+            self.subcategories_by_category.setdefault(s.main_category_id, []).append(
+                {"id": s.id, "name": s.name}
+            )
+        self.tree = self._build_tree()
+
+    def _build_tree(self):
+        """قسم ← قسم فرعي ← منتجات متاحة (الوحدة والسعر)."""
+        nodes = {
+            c.id: {"id": c.id, "name": c.name, "subcategories": [], "products": []}
+            for c in self.categories
+        }
+        subs = {}
+        for s in self.second_categories:
+            subs[s.id] = {"id": s.id, "name": s.name, "products": []}
+            if s.main_category_id in nodes:
+                nodes[s.main_category_id]["subcategories"].append(subs[s.id])
+        for p in self.products:
+            item = {
+                "id": p.id,
+                "name": p.name,
+                "category": p.category_id,
+                "unit": p.unit,
+                "unit_display": p.get_unit_display(),
+                "price": str(p.price),
+            }
+            if p.second_category_id in subs:
+                subs[p.second_category_id]["products"].append(item)
+            elif p.category_id in nodes:
+                nodes[p.category_id]["products"].append(item)   # منتج من غير قسم فرعي
+        return list(nodes.values())
+
+    def available_products(self, category_id=None):
+        if not category_id:
+            return self.products
+        category_id = int(category_id)
+        return [p for p in self.products if p.category_id == category_id]
+
+    def categories_by_name(self):
+        return sorted(self.categories, key=lambda c: c.name)
+
+    def payload(self):
+        """JSON الكتالوج للمتصفح (بيتعمل مرة واحدة لكل version)."""
+        if getattr(self, "_payload", None) is None:
+            self._payload = json.dumps(
+                {"version": self.version, "tree": self.tree}, ensure_ascii=False
+            ).encode()
+        return self._payload
+#-----------------------------------------------------
+def _build(current_version):
+    categories = list(Category.objects.order_by("id"))
+    by_category = {c.id: c for c in categories}
+
+    second_categories = list(SecondCategory.objects.order_by("id"))
+    by_second = {s.id: s for s in second_categories}
+    for s in second_categories:
+        s._state.fields_cache["main_category"] = by_category.get(s.main_category_id)
+
+    products = list(Product.objects.order_by("id"))
+    for p in products:
+        p._state.fields_cache["category"] = by_category.get(p.category_id)
+        p._state.fields_cache["second_category"] = by_second.get(p.second_category_id)
+
+    return Catalog(current_version, categories, second_categories, products)
+#-----------------------------------------------------
+def snapshot():
+    """الكتالوج الحالي (ذاكرة البروسيس ← الكاش المشترك ← الداتابيز)."""
+    global _local
+    current = version()
+    local_version, catalog = _local
+    if local_version == current:
+        return catalog
+
+    key = f"catalog:{current}"
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = _build(current)
+        cache.set(key, catalog, CATALOG_CACHE_TTL)
+    _local = (current, catalog)
+    return catalog
+#-----------------------------------------------------
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SecondCategory)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SecondCategory)
+@receiver(post_delete, sender=Product)
+def _catalog_changed(sender, **kwargs):
+    invalidate()
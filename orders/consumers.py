@@ -1,12 +1,85 @@
 import json
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from decimal import Decimal
+from urllib.parse import parse_qs
+
+from . import broadcast, jobs
+
+
+@database_sync_to_async
+def get_viewer(user):
+    """
+    (is_admin, role, branch_id) للمستخدم المتصل — أو None لو مش مسجل دخول.
+    بيتحدد منه الجروبات اللي السوكيت يشترك فيها.
+    """
+    if not user or not user.is_authenticated:
+        return None
+    if user.is_superuser:
+        return True, "admin", None
+    from .roles import get_role_ctx  # lazy: الـ routing بيتعمله import قبل django.setup
+    ctx = get_role_ctx(user)
+    return ctx.is_admin, ctx.role, ctx.branch_id
+#-----------------------------------------------------
+def query_id(scope, name):
+    """قراءة ?name=<id> من رابط السوكيت (أو None)."""
+    values = parse_qs(scope.get("query_string", b"").decode()).get(name)
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
+#-----------------------------------------------------
+@database_sync_to_async
+def _missed_messages(groups, since):
+    return broadcast.replay(groups, since)
+#-----------------------------------------------------
+async def replay_missed(consumer, groups):
+    """
+    ?since=<seq> (آخر حدث الشاشة شافته قبل ما السوكيت يقع) → ابعت اللي فاتها من الـ outbox
+    بنفس الـ handlers، أو {"type": "resync"} لو اللي فات كتير (الشاشة تعمل reload).
+    """
+    since = query_id(consumer.scope, "since")
+    if not since:
+        return
+    messages = await _missed_messages(groups, since)
+    if messages is None:
+        await consumer.send(text_data=json.dumps({"type": "resync"}))
+        return
+    for _, message in messages:
+        await consumer.dispatch(message)
+#-----------------------------------------------------
+class ScopedGroupsMixin:
+    """
+    Consumer بيشترك في جروبات محسوبة من المستخدم (فرع/قسم) بدل جروب عام واحد.
+    self.groups بيتشال تلقائيًا في websocket_disconnect.
+    """
+    label = "WebSocket"
+
+    async def get_groups(self, viewer):
+        raise NotImplementedError
+
+    async def connect(self):
+        viewer = await get_viewer(self.scope.get("user"))
+        groups = await self.get_groups(viewer) if viewer else None
+        if not groups:
+            await self.close()
+            return
+        self.groups = groups
+        for group in groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+        print(f"✅ {self.label} WebSocket connected → {', '.join(groups)}")
+        await replay_missed(self, groups)
+
+    async def disconnect(self, close_code):
+        print(f"⚠️ {self.label} WebSocket disconnected")
 # ✅ خاص بالكنترول
 class ControlRequestsConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         await self.channel_layer.group_add("control_updates", self.channel_name)
         await self.accept()
         print("✅ WebSocket connected")
+        await replay_missed(self, ["control_updates"])
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard("control_updates", self.channel_name)
@@ -15,21 +88,38 @@ class ControlRequestsConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({
             "action": event["action"],
             "message": event.get("message", ""),
-            "order_number": event.get("order_number")
+            "order_number": event.get("order_number"),
+            "seq": event.get("seq"),
         }))
 # ✅ خاص بالكول سنتر
-class CallCenterConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        await self.channel_layer.group_add("callcenter_updates", self.channel_name)
-        await self.accept()
-        print("✅ CallCenter WebSocket connected")
+class CallCenterConsumer(ScopedGroupsMixin, AsyncWebsocketConsumer):
+    label = "CallCenter"
 
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("callcenter_updates", self.channel_name)
-        print("⚠️ CallCenter WebSocket disconnected")
+    async def get_groups(self, viewer):
+        # ?category=<id> → تحديثات القسم المعروض بس
+        category_id = query_id(self.scope, "category")
+        if category_id:
+            return [broadcast.category_group(category_id)]
+        return [broadcast.CALLCENTER_GROUP]
 
     async def callcenter_update(self, event):
         # print("📡 callcenter_update event received:", event)
+        # 📦 رسالة مجمّعة (تحديث مخزون فرع كامل) → فريم واحد للمتصفح
+        if event.get("action") == "batch":
+            items = [
+                {k: str(v) if isinstance(v, Decimal) else v for k, v in item.items()}
+                for item in event.get("items", [])
+            ]
+            print(f"[WS] Batch update: {len(items)} items")
+            await self.send(text_data=json.dumps({
+                "type": "callcenter_update",
+                "action": "batch",
+                "message": event.get("message", ""),
+                "items": items,
+                "seq": event.get("seq"),
+            }))
+            return
+
         # 🟢 شكل منسق وواضح في اللوج
         try:
             product_name = event.get("product_name", "-")
@@ -60,17 +150,21 @@ class CallCenterConsumer(AsyncWebsocketConsumer):
             "branch_name": safe_event.get("branch_name"),
             "new_qty": safe_event.get("new_qty"),  # 👈 الآن مؤمن
             "unit": safe_event.get("unit"),
+            "seq": safe_event.get("seq"),
         }))
 # ✅ خاص بصفحة الفروع
-class BranchConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        await self.channel_layer.group_add("branch_updates", self.channel_name)
-        await self.accept()
-        print("🏬 Branch WebSocket connected")
+class BranchConsumer(ScopedGroupsMixin, AsyncWebsocketConsumer):
+    label = "Branch"
 
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("branch_updates", self.channel_name)
-        print("⚠️ Branch WebSocket disconnected")
+    async def get_groups(self, viewer):
+        is_admin, role, branch_id = viewer
+        if is_admin:
+            # الأدمن: الفرع المختار في الداشبورد (?branch=) أو كل الفروع
+            selected = query_id(self.scope, "branch")
+            return [broadcast.branch_group(selected) if selected else broadcast.BRANCH_GROUP]
+        if branch_id:
+            return [broadcast.branch_group(branch_id)]
+        return None
 
     async def branch_update(self, event):
         print("📩 branch_update event received:", event)
@@ -84,16 +178,18 @@ class BranchConsumer(AsyncWebsocketConsumer):
             "quantity": event.get("quantity"),
             "created_at": event.get("created_at"),
             "reserved_by": event.get("reserved_by"),
+            "seq": event.get("seq"),
         }))
-class ReservationsConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        await self.channel_layer.group_add("reservations_updates", self.channel_name)
-        await self.accept()
-        print("📋 Reservations WebSocket connected")
+class ReservationsConsumer(ScopedGroupsMixin, AsyncWebsocketConsumer):
+    label = "Reservations"
 
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("reservations_updates", self.channel_name)
-        print("⚠️ Reservations WebSocket disconnected")
+    async def get_groups(self, viewer):
+        is_admin, role, branch_id = viewer
+        # موظف الفرع بيشوف حجوزات فرعه بس (زي reservations_list)
+        if role == "branch" and not is_admin:
+            return [broadcast.reservations_group(branch_id)] if branch_id else None
+        selected = query_id(self.scope, "branch")
+        return [broadcast.reservations_group(selected) if selected else broadcast.RESERVATIONS_GROUP]
 
     async def reservations_update(self, event):
         try:
@@ -131,8 +227,19 @@ class ReservationsConsumer(AsyncWebsocketConsumer):
                 "branch_last_modified_at": safe_event.get("branch_last_modified_at"),
                 "reserved_by": safe_event.get("reserved_by"),
                 "last_modified_by": safe_event.get("last_modified_by", "-"),  # ✅ الجديد
+                "seq": safe_event.get("seq"),
 
             }))
 
         except Exception as e:
             print("⚠️ Error in reservations_update:", e)
+#-----------------------------------------------------
+# ⚙️ تقدم مهام الخلفية (orders/jobs.py) — كل مستخدم بيشوف مهامه بس
+class JobsConsumer(ScopedGroupsMixin, AsyncWebsocketConsumer):
+    label = "Jobs"
+
+    async def get_groups(self, viewer):
+        return [jobs.job_group(self.scope["user"].id)]
+
+    async def job_update(self, event):
+        await self.send(text_data=json.dumps(event))
@@ -0,0 +1,98 @@
+# orders/customers.py
+# ==============================================
+# 👤 عميل واحد لكل رقم تليفون
+# ==============================================
+# قبل كده كل حجز من الكول سنتر كان بيعمل Customer.objects.create جديد
+# → جدول العملاء بيكبر مع كل مكالمة، والبحث والتقارير بتتقل.
+# دلوقتي:
+#   - resolve_customer(): بيدور بـ phone_digits (unique) ويعمل العميل لو مش موجود
+#     (get_or_create → لو اتنين في نفس اللحظة، التاني بياخد نفس العميل).
+#     الرقم المتخزن = نفس الرقم اللي بندور بيه، والأطول من عمود phone بيترفض (InvalidPhone)
+#     بدل ما يتقص → save() كان بيحسب phone_digits من المقصوص والحجز الجاي يقع في الـ constraint.
+#     الرقم متسجل باسم تاني → الحجز على العميل المتسجل، والـ view بيرجع تحذير (booking.name_conflict).
+#   - merge_duplicates(): دمج العملاء المكررين (مرة واحدة قبل الـ unique constraint)
+#     بتاخد الموديلات كـ parameters عشان تشتغل من الـ migration ومن أمر dedupe_customers.
+from django.db import transaction
+from django.db.models import Count, Min
+
+from .models import Customer
+from .utils import normalize_phone
+
+PLACEHOLDER_NAME = "عميل مؤقت"
+PHONE_MAX_LENGTH = Customer._meta.get_field("phone").max_length
+#-----------------------------------------------------
+class InvalidPhone(ValueError):
+    """رقم تليفون مينفعش يتخزن (الرسالة جاهزة تتعرض للمستخدم)."""
+#-----------------------------------------------------
+def resolve_customer(name=None, phone=None, rename=False):
+    """
+    العميل بتاع رقم التليفون ده (أو عميل جديد):
+        - من غير تليفون → عميل جديد بالاسم (مفيش حاجة نوحد بيها)، أو None لو مفيش اسم كمان
+        - الاسم بيتحدث لو القديم "عميل مؤقت"، أو لو rename=True
+        - رقم أطول من PHONE_MAX_LENGTH (بعد التوحيد) → InvalidPhone
+    """
+    name = (name or "").strip()
+    digits = normalize_phone(phone)
+    if not digits:
+        return Customer.objects.create(name=name, phone="") if name else None
+    if len(digits) > PHONE_MAX_LENGTH:
+        raise InvalidPhone(f"❌ رقم التليفون غير صحيح ({len(digits)} رقم — الحد {PHONE_MAX_LENGTH}).")
+
+    customer, created = Customer.objects.get_or_create(
+        phone_digits=digits,
+        defaults={"name": name or PLACEHOLDER_NAME, "phone": digits},
+    )
+    if not created and name and name != customer.name and (rename or customer.name == PLACEHOLDER_NAME):
+        customer.name = name
+        customer.save(update_fields=["name"])
+    return customer
+#-----------------------------------------------------
+def duplicate_groups(Customer):
+    """[(phone_digits, أقدم id)] للأرقام اللي ليها أكتر من عميل."""
+    return list(
+        Customer.objects.order_by()
+        .exclude(phone_digits="")
+        .values("phone_digits")
+        .annotate(n=Count("id"), keep=Min("id"))
+        .filter(n__gt=1)
+        .values_list("phone_digits", "keep")
+    )
+#-----------------------------------------------------
+def _merge_group(Customer, Reservation, digits, keep_id):
+    duplicates = list(
+        Customer.objects.filter(phone_digits=digits).exclude(id=keep_id)
+        .order_by("-id").values_list("id", "name")
+    )
+    dup_ids = [pk for pk, _ in duplicates]
+
+    # لو الأقدم "عميل مؤقت" ناخد أحدث اسم حقيقي
+    keeper = Customer.objects.get(id=keep_id)
+    if keeper.name == PLACEHOLDER_NAME:
+        real = next((n for _, n in duplicates if n and n != PLACEHOLDER_NAME), None)
+        if real:
+            Customer.objects.filter(id=keep_id).update(name=real)
+
+    moved = Reservation.objects.filter(customer_id__in=dup_ids).update(customer_id=keep_id)
+    Customer.objects.filter(id__in=dup_ids).delete()
+    return len(dup_ids), moved
+#-----------------------------------------------------
+def merge_duplicates(Customer, Reservation, chunk_size=200, dry_run=False, progress=None):
+    """
+    دمج كل عميل مكرر في أقدم عميل بنفس الرقم ونقل حجوزاته ليه.
+    كل chunk_size رقم في transaction لوحدها. بترجع (عملاء اتمسحوا، حجوزات اتنقلت).
+    """
+    groups = duplicate_groups(Customer)
+    if dry_run:
+        extra = sum(Customer.objects.filter(phone_digits=d).count() - 1 for d, _ in groups)
+        return extra, 0
+
+    removed = moved = 0
+    for start in range(0, len(groups), chunk_size):
+        with transaction.atomic():
+            for digits, keep_id in groups[start:start + chunk_size]:
+                r, m = _merge_group(Customer, Reservation, digits, keep_id)
+                removed += r
+                moved += m
+        if progress:
+            progress(min(start + chunk_size, len(groups)), len(groups), removed, moved)
+    return removed, moved
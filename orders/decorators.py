@@ -1,6 +1,8 @@
 from django.http import HttpResponseForbidden
 from django.shortcuts import render
 
+from .roles import get_role_ctx
+
 def role_required(allowed_roles=[]):
     def decorator(view_func):
         def _wrapped_view(request, *args, **kwargs):
@@ -9,16 +11,17 @@ def role_required(allowed_roles=[]):
                     "message": "🚫 لازم تسجل دخول"
                 }, status=403)
 
-            profile = getattr(request.user, "userprofile", None)
+            # 🔐 الصلاحيات محسوبة مرة واحدة (RoleContextMiddleware)
+            ctx = get_role_ctx(request.user)
 
             # ✅ Admin (superuser/staff أو role=admin) يقدر يخش أي صفحة
-            if request.user.is_superuser or request.user.is_staff:
+            if ctx.is_superuser or ctx.is_staff:
                 return view_func(request, *args, **kwargs)
-            if profile and profile.role == "admin":
+            if ctx.role == "admin":
                 return view_func(request, *args, **kwargs)
 
             # ✅ لو دوره ضمن المسموح
-            if profile and profile.role in allowed_roles:
+            if ctx.role in allowed_roles:
                 return view_func(request, *args, **kwargs)
 
             # 🚫 لو مش مسموح
@@ -0,0 +1,177 @@
+# orders/export_jobs.py
+# ==============================================
+# 📤 مهام التصدير والاستيراد اللي بتشتغل في الخلفية (orders/jobs.py)
+# ==============================================
+# الـ views بتتحقق من الصلاحيات وتحسب الفلاتر وتبعتها كـ params،
+# والـ handlers هنا بتبني الملف (نفس الشكل اللي كان بيرجع من الـ view) وتحفظه كناتج للمهمة.
+from datetime import date as dt_date
+
+import openpyxl
+from django.utils import timezone
+
+from .catalog import invalidate as invalidate_catalog
+from .exports import XlsxExport, iter_rows
+from .jobs import JobError, register
+from .models import Branch, Category, Inventory, Reservation
+from .product_import import InvalidSheet, ProductImport, read_sheet
+from .production import ProductionMatrix
+from .reporting import reservation_report
+#-----------------------------------------------------
+@register("export_reservations", "تصدير الحجوزات")
+def export_reservations(ctx, branch_id):
+    rows = (
+        Reservation.objects.filter(branch_id=branch_id)
+        .order_by("-created_at")
+        .values_list(
+            "id", "customer__name", "customer__phone", "product__name",
+            "branch__name", "delivery_type", "status", "created_at",
+        )
+    )
+    delivery_labels = dict(Reservation.DELIVERY_CHOICES)
+    status_labels = dict(Reservation.STATUS_CHOICES)
+
+    # 📤 write-only + iterator → ذاكرة ثابتة حتى مع سنة حجوزات (orders/exports.py)
+    export = XlsxExport(styled=False)
+    sheet = export.sheet(
+        "Reservations",
+        ["ID", "Customer", "Phone", "Product", "Branch", "Delivery Type", "Status", "Created At"],
+        widths=[8, 25, 13, 30, 15, 10, 10, 16],
+    )
+    for res_id, customer, phone, product, branch, delivery, status, created_at in ctx.track(iter_rows(rows), rows.count()):
+        sheet.append([
+            res_id,
+            customer or "",
+            phone or "",
+            product or "",
+            branch or "",
+            delivery_labels.get(delivery, delivery),
+            status_labels.get(status, status),
+            timezone.localtime(created_at).strftime("%Y-%m-%d %H:%M"),
+        ])
+
+    ctx.save_workbook(export, f"reservations_branch_{branch_id}.xlsx")
+#-----------------------------------------------------
+@register("export_reports", "تصدير التقارير")
+def export_reports(ctx, start_date=None, end_date=None, branch=None):
+    start = dt_date.fromisoformat(start_date) if start_date else None
+    end = dt_date.fromisoformat(end_date) if end_date else None
+
+    # ✅ نفس محرك صفحة التقارير (استعلام واحد + كاش)
+    report = reservation_report(start, end, branch or None)
+    stats = report["stats"]
+
+    wb = openpyxl.Workbook()
+
+    # Sheet 1: Stats
+    ws1 = wb.active
+    ws1.title = "Stats"
+    ws1.append(["إحصائية", "القيمة"])
+    ws1.append(["إجمالي الحجوزات", stats["total"]])
+    ws1.append(["✅ Confirmed", stats["confirmed"]])
+    ws1.append(["🕒 Pending", stats["pending"]])
+    ws1.append(["❌ Cancelled", stats["cancelled"]])
+
+    # Sheet 2: Top Products
+    ws2 = wb.create_sheet("Top Products")
+    ws2.append(["Product", "Total Reservations"])
+    for p in report["top_products"]:
+        ws2.append([p["product__name"], p["total"]])
+
+    # Sheet 3: Top Branches
+    ws3 = wb.create_sheet("Top Branches")
+    ws3.append(["Branch", "Total Reservations"])
+    for b in report["top_branches"]:
+        ws3.append([b["branch__name"], b["total"]])
+
+    ctx.save_workbook(wb, "reports.xlsx")
+#-----------------------------------------------------
+@register("export_inventory", "تصدير المخزون")
+def export_inventory(ctx, branch_id):
+    branch = Branch.objects.get(id=branch_id)
+    inventories = (
+        Inventory.objects.filter(branch=branch)
+        .order_by("product__name")
+        .values_list("product__name", "product__category__name", "quantity", "product__price")
+    )
+
+    export = XlsxExport()
+    sheet = export.sheet(
+        f"{branch.name} Inventory",
+        ["Product", "Category", "Quantity", "Price"],
+        widths=[30, 20, 10, 10],
+    )
+    for name, category, quantity, price in ctx.track(iter_rows(inventories), inventories.count()):
+        sheet.append([name, category or "", quantity, price])
+
+    ctx.save_workbook(export, f"{branch.name}_inventory.xlsx")
+#-----------------------------------------------------
+@register("export_production", "تصدير طلبات الإنتاج")
+def export_production(ctx, date, branch="", category="", hide_zero=True):
+    the_date = dt_date.fromisoformat(date)
+
+    # 🏭 نفس مصفوفة صفحة الكنترول (orders/production.py)
+    matrix = ProductionMatrix.build(the_date, branch_id=branch, category_id=category)
+    branches, products = matrix.branches, matrix.products
+
+    # ✳️ أول صف توثيقي: التاريخ + الفرع + القسم (بدون حالة الأصفار)
+    if branch:
+        branch_name = branches[0].name if branches else ""
+    else:
+        branch_name = "كل الفروع"
+
+    category_name = ""
+    if category:
+        try:
+            category_name = Category.objects.get(id=category).name
+        except Category.DoesNotExist:
+            category_name = ""
+    else:
+        category_name = "كل الأقسام"
+
+    info_text = f"📅 التاريخ: {the_date.strftime('%Y/%m/%d')} | 🏬 {branch_name} | 📂 {category_name}"
+
+    # 🧾 ملف Excel (write-only — orders/exports.py)
+    headers = ["المنتج", "الوحدة"] + [b.name for b in branches] + ["الإجمالي"]
+    export = XlsxExport()
+    sheet = export.sheet(
+        f"Production {the_date.isoformat()}",
+        headers,
+        widths=[max((len(p.name) for p in products), default=10), 8] + [8] * len(branches) + [10],
+        title_row=info_text,
+    )
+
+    # 🧩 تعبئة البيانات
+    for row in ctx.track(matrix.rows(hide_zero=hide_zero), len(products)):
+        sheet.append([row["product"].name, row["unit"]] + row["per_branch"] + [row["total"]])
+
+    ctx.save_workbook(export, f"production_{the_date.isoformat()}.xlsx")
+#-----------------------------------------------------
+@register("import_products", "استيراد المنتجات")
+def import_products(ctx, dry_run=False, file_name=""):
+    # file_name للعرض في صفحة المهمة بس (الملف نفسه في job.input_file)
+    if not ctx.job.input_file:
+        raise JobError("❌ الملف المرفوع مش موجود — ارفعه تاني.")
+    # 📥 قراءة + تنضيف بالـ pandas، والمطابقة مع الداتابيز bulk (orders/product_import.py)
+    try:
+        with ctx.job.input_file.open("rb") as excel_file:
+            frame = read_sheet(excel_file)
+    except InvalidSheet as e:
+        raise JobError(str(e))
+    ctx.progress(40, message=f"📄 {len(frame)} صف — جاري المطابقة...")
+    plan = ProductImport(frame)
+
+    # 🔍 معاينة بس: إيه اللي هيتضاف/يتعدل من غير ما نكتب حاجة
+    if dry_run:
+        ctx.finish("🔍 معاينة فقط — لم يتم حفظ أي تغيير.", result={"report": plan.report()})
+        return
+
+    ctx.progress(70, message="💾 جاري الحفظ...")
+    plan.apply()
+    # 🗂️ الكتالوج اتغير: الإلغاء بيوصل Daphne فورًا لو الكاش Redis، ومع LocMem (كاش الـ worker لوحده)
+    # البصمة (max updated_at + العدد) اتغيرت فالصفحات بتاخد النسخة الجديدة بعد CATALOG_VERSION_TTL
+    invalidate_catalog()
+    ctx.finish(
+        f"✅ تم استيراد {len(plan.created)} منتج جديد وتحديث {len(plan.updated)} "
+        f"({plan.unchanged} بدون تغيير). "
+        f"📦 المعروضة: {plan.visible_count}, 🚫 المخفية: {plan.hidden_count}"
+    )
@@ -0,0 +1,95 @@
+# orders/exports.py
+# ==============================================
+# 📤 محرك تصدير Excel بذاكرة ثابتة
+# ==============================================
+# بدل openpyxl.Workbook() كامل في الذاكرة + wb.save(response):
+#   - openpyxl write-only: كل صف بيتكتب على ملف مؤقت أول ما يتضاف.
+#   - الداتا بتتقرا بـ queryset.iterator(chunk_size) من غير كاش للـ queryset.
+#   - الملف النهائي بيتحفظ كناتج مهمة في الخلفية (orders/jobs.py) وبيتنزل من job_download.
+# الاستهلاك ثابت تقريبًا مهما كان عدد الصفوف.
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+CHUNK_SIZE = 2000
+
+_thin = Side(style="thin")
+_border = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+#-----------------------------------------------------
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """لف على الـ queryset بالـ chunks (من غير ما يتحمل كله في الذاكرة)."""
+    return queryset.iterator(chunk_size=chunk_size)
+#-----------------------------------------------------
+class XlsxExport:
+    """
+    ملف Excel write-only:
+        export = XlsxExport()
+        sheet = export.sheet("Reservations", headers, widths=[...])
+        for r in iter_rows(qs): sheet.append([...])
+        ctx.save_workbook(export, "reservations.xlsx")   # orders/jobs.py
+    """
+
+    def __init__(self, header_color="4F81BD", header_font_color="FFFFFF", styled=True):
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.styled = styled
+        self.wb.add_named_style(NamedStyle(
+            name="export_header",
+            font=Font(bold=True, color=header_font_color),
+            fill=PatternFill(start_color=header_color, end_color=header_color, fill_type="solid"),
+            alignment=_center,
+            border=_border,
+        ))
+        self.wb.add_named_style(NamedStyle(name="export_cell", alignment=_center, border=_border))
+        self.wb.add_named_style(NamedStyle(
+            name="export_title",
+            font=Font(bold=True, size=12, color="000000"),
+            fill=PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid"),
+            alignment=Alignment(horizontal="center"),
+        ))
+
+    def sheet(self, title, headers, widths=None, title_row=None, freeze=False):
+        """
+        شيت جديد. العرض لازم يتحدد قبل أي صف (write-only):
+        widths = أعرض قيمة متوقعة لكل عمود، وإلا طول العنوان.
+        title_row = سطر توثيقي مدموج فوق العناوين (اختياري).
+        """
+        ws = self.wb.create_sheet(title=title[:31])
+        widths = widths or []
+        for i, header in enumerate(headers, 1):
+            hint = widths[i - 1] if i <= len(widths) else 0
+            ws.column_dimensions[get_column_letter(i)].width = max(len(str(header)), hint or 0) + 2
+
+        sheet = _Sheet(ws, self.styled)
+        if title_row:
+            sheet.append_styled([title_row], "export_title")
+            ws.merged_cells.add(f"A1:{get_column_letter(len(headers))}1")
+        sheet.append_styled(headers, "export_header" if self.styled else None)
+        if freeze:
+            ws.freeze_panes = f"A{sheet.rows + 1}"
+        return sheet
+
+    def save(self, fileobj):
+        """كتابة الملف (مثلًا ناتج مهمة في الخلفية — orders/jobs.py)."""
+        self.wb.save(fileobj)
+#-----------------------------------------------------
+class _Sheet:
+    def __init__(self, ws, styled):
+        self.ws = ws
+        self.styled = styled
+        self.rows = 0
+
+    def append(self, values):
+        self.append_styled(values, "export_cell" if self.styled else None)
+
+    def append_styled(self, values, style):
+        if style:
+            row = []
+            for value in values:
+                cell = WriteOnlyCell(self.ws, value=value)
+                cell.style = style
+                row.append(cell)
+            values = row
+        self.ws.append(values)
+        self.rows += 1
@@ -0,0 +1,182 @@
+# orders/jobs.py
+# ==============================================
+# ⚙️ مهام في الخلفية (Job) — الاستيراد والتصدير التقيل برا الـ request
+# ==============================================
+# قبل كده import_products وكل export_*_excel كانوا بيشتغلوا جوه الـ HTTP request
+# → ملف كبير بيحجز worker بتاع Daphne عشرات الثواني والكول سنتر يستنى.
+# دلوقتي:
+#   - الـ view بيتحقق من الصلاحيات ويحسب الفلاتر، وبعدين start() → صف Job (queued) ويرجع فورًا
+#     (redirect لصفحة المهمة، أو JSON فيه job_id لو الطلب fetch).
+#   - run_jobs (management command) بيسحب المهام من الجدول ويشغلها في process pool.
+#   - المهمة بتبلغ التقدم (ctx.progress) → الجدول + WebSocket (جروب jobs_user_<id>).
+#   - الملف الناتج بيتحفظ في JOB_FILES_ROOT (مش MEDIA) وبيتنزل من job_download بعد التحقق من صاحبه.
+#   - JOBS_ENABLED = False → المهمة بتتنفذ في نفس الـ request (من غير worker — للتطوير).
+# ملحوظة: الملف ده بيتعمله import في بروسيسات الـ pool قبل django.setup → الموديلات lazy.
+import tempfile
+import time
+import traceback
+
+from django.conf import settings
+from django.core.files import File
+
+_HANDLERS = {}
+PROGRESS_STEP = 5           # % بين كل تحديث والتاني
+PROGRESS_INTERVAL = 1.0     # ثواني
+#-----------------------------------------------------
+class JobError(Exception):
+    """فشل متوقع — الرسالة جاهزة تتعرض للمستخدم كما هي."""
+#-----------------------------------------------------
+def register(kind, label):
+    """
+    @register("export_reservations", "تصدير الحجوزات")
+    def export_reservations(ctx, branch_id): ...
+    الـ handler بياخد JobContext + params المهمة (JSON).
+    """
+    def decorator(func):
+        _HANDLERS[kind] = (func, label)
+        return func
+    return decorator
+#-----------------------------------------------------
+def label(kind):
+    return _HANDLERS.get(kind, (None, kind))[1]
+#-----------------------------------------------------
+def job_group(user_id):
+    return f"jobs_user_{user_id}"
+#-----------------------------------------------------
+def _enabled():
+    return getattr(settings, "JOBS_ENABLED", True)
+#-----------------------------------------------------
+def enqueue(kind, user, params=None, input_file=None):
+    """صف Job جديد (queued). input_file = ملف مرفوع (الاستيراد) بيتحفظ مع المهمة."""
+    from .models import Job
+    if kind not in _HANDLERS:
+        raise KeyError(f"Unknown job kind: {kind}")
+    job = Job(kind=kind, params=params or {}, created_by=user)
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+    job.save()
+    publish(job)
+    if not _enabled():
+        execute(job.id)
+        job.refresh_from_db()
+    return job
+#-----------------------------------------------------
+def start(request, kind, params=None, input_file=None):
+    """enqueue + الرد: JSON (202) للـ fetch، وغير كده redirect لصفحة المهمة."""
+    from django.http import JsonResponse
+    from django.shortcuts import redirect
+    from django.urls import reverse
+
+    job = enqueue(kind, request.user, params, input_file)
+    if "application/json" in request.headers.get("Accept", "") or \
+            request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse(job_payload(job), status=202)
+    return redirect(reverse("job_detail", args=[job.id]))
+#-----------------------------------------------------
+def job_payload(job):
+    """حالة المهمة (للـ status endpoint والـ WebSocket)."""
+    from django.urls import reverse
+    return {
+        "type": "job_update",
+        "job_id": job.id,
+        "kind": job.kind,
+        "label": label(job.kind),
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "progress": job.progress,
+        "message": job.message,
+        "status_url": reverse("job_status", args=[job.id]),
+        "detail_url": reverse("job_detail", args=[job.id]),
+        "download_url": reverse("job_download", args=[job.id]) if job.result_file else None,
+    }
+#-----------------------------------------------------
+def publish(job):
+    """تحديث المهمة لصاحبها على الـ WebSocket (عبر الـ outbox زي باقي الأحداث)."""
+    if job.created_by_id:
+        from . import broadcast
+        broadcast.publish(job_group(job.created_by_id), job_payload(job))
+#-----------------------------------------------------
+class JobContext:
+    """اللي الـ handler بيستخدمه: تقدم + حفظ الملف الناتج + رسالة/نتيجة."""
+
+    def __init__(self, job):
+        self.job = job
+        self._last_progress = 0
+        self._last_time = 0.0
+
+    def progress(self, done, total=None, message=None):
+        """done/total (أو نسبة مباشرة لو total = None) — بيتكتب ويتبعت كل PROGRESS_STEP% بس."""
+        from django.utils import timezone
+        from .models import Job
+        pct = int(done * 100 / total) if total else int(done)
+        pct = max(0, min(pct, 99))   # الـ 100 لما المهمة تخلص فعلًا
+        now_ = time.monotonic()
+        if message is None and (
+            pct - self._last_progress < PROGRESS_STEP or now_ - self._last_time < PROGRESS_INTERVAL
+        ):
+            return
+        self._last_progress, self._last_time = pct, now_
+        self.job.progress = pct
+        fields = {"progress": pct, "updated_at": timezone.now()}
+        if message is not None:
+            self.job.message = fields["message"] = message[:255]
+        Job.objects.filter(id=self.job.id).update(**fields)
+        publish(self.job)
+
+    def track(self, iterable, total):
+        """لف على iterable وبلّغ التقدم وانت ماشي."""
+        for i, item in enumerate(iterable, 1):
+            yield item
+            if i % 200 == 0:
+                self.progress(i, total)
+
+    def save_workbook(self, workbook, filename):
+        """Workbook (openpyxl أو XlsxExport) → الملف الناتج للمهمة."""
+        with tempfile.TemporaryFile() as tmp:
+            workbook.save(tmp)
+            tmp.seek(0)
+            self.job.result_file.save(filename, File(tmp), save=False)
+        self.job.result_name = filename
+
+    def finish(self, message="", result=None):
+        self.job.message = message[:255]
+        if result is not None:
+            self.job.result = result
+#-----------------------------------------------------
+def execute(job_id):
+    """تشغيل مهمة واحدة (في بروسيس الـ pool، أو inline لو JOBS_ENABLED = False)."""
+    from django.db import close_old_connections
+    from django.utils import timezone
+    from .models import Job
+
+    close_old_connections()
+    job = Job.objects.get(id=job_id)
+    if job.status != "running":
+        job.status, job.started_at = "running", timezone.now()
+        job.save(update_fields=["status", "started_at", "updated_at"])
+        publish(job)
+
+    ctx = JobContext(job)
+    try:
+        func, _ = _HANDLERS[job.kind]
+        func(ctx, **job.params)
+        job.status, job.progress = "done", 100
+    except JobError as e:
+        job.status, job.message = "failed", str(e)[:255]
+    except Exception as e:
+        traceback.print_exc()
+        job.status = "failed"
+        job.message = f"⚠️ حدث خطأ أثناء التنفيذ: {e}"[:255]
+    finally:
+        if job.input_file:
+            job.input_file.delete(save=False)   # الملف المرفوع ملوش لازمة بعد التنفيذ
+        job.finished_at = timezone.now()
+        job.save()
+        publish(job)
+        close_old_connections()
+    return job.status
+#-----------------------------------------------------
+def init_worker():
+    """initializer لبروسيسات الـ pool (spawn): Django من الأول في كل بروسيس."""
+    import django
+    django.setup()
@@ -0,0 +1,122 @@
+# orders/management/commands/booking_latency.py
+# ==============================================
+# ⏱️ مقارنة زمن الحجز: callcenter (sync) ضد callcenter/book/ (async)
+# ==============================================
+# بيكلم سيرفر شغال فعلًا (Daphne) بـ HTTP عادي، بيسجل دخول مرة واحدة،
+# وبعدين بيبعت نفس عدد الحجوزات لكل endpoint بنفس التوازي ويطبع p50/p99.
+#
+#   daphne sweets_factory.asgi:application -p 8000
+#   python manage.py booking_latency --user cc --password ... --product 3 --branch 1
+#
+# ⚠️ كل طلب = حجز حقيقي (بيخصم من المخزون ويعمل Reservation) → على بيئة تجربة،
+#    ويفضل منتج بالكيلو (مش بيتخصم) أو مخزون كبير.
+import http.cookiejar
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINTS = {
+    "sync": "/callcenter/",
+    "async": "/callcenter/book/",
+}
+#-----------------------------------------------------
+def _percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+#-----------------------------------------------------
+class Client:
+    """opener واحد بالكوكيز (session + csrftoken) مشترك بين الـ threads."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar))
+
+    def csrf_token(self):
+        return next((c.value for c in self.jar if c.name == "csrftoken"), "")
+
+    def post(self, path, data):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=urllib.parse.urlencode(data).encode(),
+            headers={"X-CSRFToken": self.csrf_token(), "Referer": self.base_url + path},
+        )
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def login(self, username, password):
+        with self.opener.open(self.base_url + "/login/", timeout=self.timeout) as response:
+            response.read()
+        self.post("/login/", {"username": username, "password": password})
+        if not any(c.name == "sessionid" for c in self.jar):
+            raise CommandError("❌ تسجيل الدخول فشل (راجع --user / --password)")
+
+
+class Command(BaseCommand):
+    help = "يقارن p50/p99 لزمن الحجز بين callcenter العادي و callcenter/book/ الـ async"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--user", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--product", type=int, required=True)
+        parser.add_argument("--branch", type=int, required=True)
+        parser.add_argument("--quantity", default="1")
+        parser.add_argument("--requests", type=int, default=200, help="عدد الحجوزات لكل endpoint")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument("--only", choices=sorted(ENDPOINTS), help="endpoint واحد بس")
+
+    def handle(self, *args, **options):
+        client = Client(options["url"], options["timeout"])
+        client.login(options["user"], options["password"])
+
+        payload = {
+            "product_id": options["product"],
+            "branch_id": options["branch"],
+            "quantity": options["quantity"],
+            "customer_name": "اختبار ضغط",
+            "customer_phone": "01000000000",
+            "delivery_type": "pickup",
+        }
+
+        def hit(path):
+            started = time.perf_counter()
+            status = client.post(path, payload)
+            return status, (time.perf_counter() - started) * 1000
+
+        names = [options["only"]] if options["only"] else list(ENDPOINTS)
+        for name in names:
+            path = ENDPOINTS[name]
+            for _ in range(options["warmup"]):
+                hit(path)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                results = list(pool.map(lambda _: hit(path), range(options["requests"])))
+            elapsed = time.perf_counter() - started
+
+            latencies = sorted(ms for status, ms in results if status == 200)
+            failed = len(results) - len(latencies)
+            if not latencies:
+                raise CommandError(f"❌ {name}: كل الطلبات فشلت (آخر status = {results[-1][0]})")
+
+            self.stdout.write(
+                f"{name:>5} {path:<20} "
+                f"p50={_percentile(latencies, 50):7.1f}ms  "
+                f"p99={_percentile(latencies, 99):7.1f}ms  "
+                f"{len(results) / elapsed:6.1f} req/s"
+                + (self.style.WARNING(f"  ({failed} فشل)") if failed else "")
+            )
@@ -0,0 +1,36 @@
+# orders/management/commands/channels_redis_stub.py
+# ==============================================
+# 🧪 سيرفر Redis وهمي (fakeredis) للتجربة من غير Redis حقيقي
+# ==============================================
+# الاستخدام:
+#   python manage.py channels_redis_stub --port 6390
+#   CHANNEL_REDIS_URL=redis://127.0.0.1:6390/0 daphne ...   (في كل worker)
+# محتاج: pip install -r requirements-dev.txt   (fakeredis + lupa عشان سكريبتات Lua بتاعة channels_redis)
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "يشغل سيرفر Redis وهمي (fakeredis) على TCP كبديل محلي للـ channel layer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=6390)
+
+    def handle(self, *args, **options):
+        try:
+            from fakeredis import TcpFakeServer
+            import lupa  # noqa: F401  من غيرها EVAL بيفشل وقت الـ group_send
+        except ImportError:
+            raise CommandError("❌ fakeredis/lupa مش متسطبين: pip install -r requirements-dev.txt")
+
+        address = (options["host"], options["port"])
+        server = TcpFakeServer(address, server_type="redis")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Fake Redis شغال على redis://{address[0]}:{address[1]}/0 (Ctrl+C للإيقاف)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,134 @@
+# orders/management/commands/channels_smoke.py
+# ==============================================
+# 📡 اختبار سريع: البث بيوصل لكل الـ workers؟
+# ==============================================
+# بيشغل N عملية منفصلة (زي N Daphne worker)، كل عملية بتفتح سوكيت على كل
+# الـ consumers (كنترول/كول سنتر/فروع/حجوزات/HR)، وبعدين العملية الرئيسية
+# بتعمل group_send لكل جروب وتتأكد إن كل عملية استلمت الرسالة.
+#
+#   python manage.py channels_redis_stub --port 6390 &
+#   CHANNEL_REDIS_URL=redis://127.0.0.1:6390/0 python manage.py channels_smoke --workers 3
+import asyncio
+import multiprocessing
+import queue
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from orders import broadcast
+
+# (path, group, event type) لكل consumer
+CHECKS = [
+    ("/ws/control/", "control_updates", "control_update"),
+    ("/ws/callcenter/", broadcast.CALLCENTER_GROUP, "callcenter_update"),
+    ("/ws/branch/", broadcast.BRANCH_GROUP, "branch_update"),
+    ("/ws/reservations/", broadcast.RESERVATIONS_GROUP, "reservations_update"),
+    ("/ws/hr/applicants/", "hr_applicants", "hr_applicant_update"),
+]
+#-----------------------------------------------------
+def _worker(index, token, ready_q, result_q, timeout):
+    """عملية منفصلة: تفتح سوكيت لكل consumer وتستنى رسالة الاختبار."""
+    import django
+    django.setup()
+    asyncio.run(_listen(index, token, ready_q, result_q, timeout))
+#-----------------------------------------------------
+async def _listen(index, token, ready_q, result_q, timeout):
+    from channels.routing import URLRouter
+    from channels.testing import WebsocketCommunicator
+    from django.contrib.auth.models import User
+    import hr.routing
+    import orders.routing
+
+    # من غير AuthMiddleware: مستخدم أدمن وهمي → الـ consumers بتشترك في الجروبات العامة
+    application = URLRouter(orders.routing.websocket_urlpatterns + hr.routing.websocket_urlpatterns)
+    admin = User(username="channels_smoke", is_superuser=True)
+
+    sockets = []
+    for path, _group, _type in CHECKS:
+        communicator = WebsocketCommunicator(application, path)
+        communicator.scope["user"] = admin
+        connected, _ = await communicator.connect(timeout=timeout)
+        if not connected:
+            result_q.put((index, path, "❌ connect failed"))
+            continue
+        sockets.append((path, communicator))
+    ready_q.put(index)
+
+    for path, communicator in sockets:
+        try:
+            data = await communicator.receive_json_from(timeout=timeout)
+            status = "ok" if data.get("message") == token else f"❌ unexpected: {data}"
+        except Exception as e:
+            status = f"❌ {type(e).__name__}"
+        result_q.put((index, path, status))
+        await communicator.disconnect()
+#-----------------------------------------------------
+class Command(BaseCommand):
+    help = "يتأكد إن البث بيوصل لكل جروبات الـ WebSocket عبر أكتر من عملية (worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=3)
+        parser.add_argument("--timeout", type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        backend = settings.CHANNEL_LAYERS["default"]["BACKEND"]
+        if backend.endswith("InMemoryChannelLayer"):
+            raise CommandError(
+                "❌ InMemoryChannelLayer مش بيعدي بين العمليات — حدد CHANNEL_REDIS_URL الأول"
+            )
+
+        workers, timeout = options["workers"], options["timeout"]
+        token = f"smoke-{uuid.uuid4().hex}"
+        ctx = multiprocessing.get_context("spawn")
+        ready_q, result_q = ctx.Queue(), ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker, args=(i, token, ready_q, result_q, timeout), daemon=True)
+            for i in range(workers)
+        ]
+        for p in procs:
+            p.start()
+
+        try:
+            # ⏳ استنى لحد ما كل العمليات تفتح سوكيتاتها
+            for _ in procs:
+                ready_q.get(timeout=timeout * 3)
+        except queue.Empty:
+            raise CommandError("❌ فيه worker مقدرش يفتح السوكيتات في الوقت المحدد")
+
+        self.stdout.write(f"📡 {backend} — {workers} workers جاهزين، بنبعت لكل جروب...")
+        channel_layer = get_channel_layer()
+        for _path, group, event_type in CHECKS:
+            async_to_sync(channel_layer.group_send)(group, {
+                "type": event_type,
+                "action": "smoke",
+                "message": token,
+            })
+
+        results = {}
+        try:
+            for _ in range(workers * len(CHECKS)):
+                index, path, status = result_q.get(timeout=timeout * 2)
+                results[(index, path)] = status
+        except queue.Empty:
+            pass
+        for p in procs:
+            p.join(timeout=timeout)
+
+        failed = 0
+        for path, group, _type in CHECKS:
+            statuses = [results.get((i, path), "❌ no result") for i in range(workers)]
+            ok = sum(1 for s in statuses if s == "ok")
+            failed += workers - ok
+            line = f"{group:<22} {ok}/{workers}"
+            if ok == workers:
+                self.stdout.write(self.style.SUCCESS(f"✅ {line}"))
+            else:
+                errors = ", ".join(sorted({s for s in statuses if s != "ok"}))
+                self.stdout.write(self.style.ERROR(f"❌ {line}  ({errors})"))
+
+        if failed:
+            raise CommandError(f"❌ {failed} رسالة موصلتش")
+        self.stdout.write(self.style.SUCCESS("✅ كل الجروبات وصلت لكل الـ workers"))
@@ -0,0 +1,35 @@
+# orders/management/commands/dedupe_customers.py
+# ==============================================
+# 👤 دمج العملاء المكررين (نفس رقم التليفون)
+# ==============================================
+# كل عميل مكرر بيتدمج في أقدم عميل بنفس الرقم، وحجوزاته بتتنقل له، على دفعات.
+# يفضل يتشغل قبل migration الـ unique constraint على الداتا الكبيرة:
+#   python manage.py dedupe_customers --dry-run
+#   python manage.py dedupe_customers --chunk-size 500
+from django.core.management.base import BaseCommand
+
+from orders.customers import duplicate_groups, merge_duplicates
+from orders.models import Customer, Reservation
+
+
+class Command(BaseCommand):
+    help = "يدمج العملاء اللي ليهم نفس رقم التليفون وينقل حجوزاتهم"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=200, help="عدد الأرقام في كل transaction")
+        parser.add_argument("--dry-run", action="store_true", help="عرض العدد بس من غير تعديل")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            groups = len(duplicate_groups(Customer))
+            extra, _ = merge_duplicates(Customer, Reservation, dry_run=True)
+            self.stdout.write(f"🔎 {groups} رقم مكرر — {extra} عميل زيادة هيتدمج")
+            return
+
+        def progress(done, total, removed, moved):
+            self.stdout.write(f"⏳ {done}/{total} رقم — {removed} عميل اتدمج، {moved} حجز اتنقل")
+
+        removed, moved = merge_duplicates(
+            Customer, Reservation, chunk_size=max(1, options["chunk_size"]), progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ تم دمج {removed} عميل ونقل {moved} حجز"))
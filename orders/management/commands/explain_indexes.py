@@ -0,0 +1,86 @@
+# orders/management/commands/explain_indexes.py
+# ==============================================
+# 🔎 فحص الـ indexes: فلاتر الصفحات التقيلة بتستخدم الـ index المخصص ليها؟
+# ==============================================
+# بيبني نفس الـ queries بتاعة الصفحات (day_range + الفرع/الحالة) ويعمل EXPLAIN لكل واحدة،
+# ويفشل لو الخطة مش بتستخدم الـ index المتوقع (مثلًا لو حد رجّع created_at__date__range
+# اللي بيعمل CAST على العمود، أو غيّر ترتيب أعمدة الـ index).
+#
+#   python manage.py explain_indexes             → ✅/❌ لكل query (exit code 1 لو فيه ❌)
+#   python manage.py explain_indexes --verbose   → + الخطة كاملة
+#
+# على Postgres الجداول الصغيرة (بيئة تجربة) بتخلي الـ planner يختار Seq Scan حتى لو الـ index
+# ينفع → بنقفل enable_seqscan جوه الـ transaction بتاعة الفحص بس: السؤال "الـ index ينفع للفلتر
+# ده؟" مش "هو أرخص على الداتا دي؟".
+# SQLite مش بيطابق شرط boolean من غير "= 1" (Django بيكتب WHERE is_confirmed AND NOT is_printed)
+# مع index أوله عمود boolean → الحالات دي بتتفحص على Postgres بس (⏭️ على SQLite).
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import localdate
+
+from hr.models import Applicant
+from orders.models import DailyRequest, InventoryTransaction, Reservation
+from orders.utils import day_range
+#-----------------------------------------------------
+def _cases(today, branch_id=1, user_id=1):
+    """(الصفحة, queryset, الـ index المتوقع, الداتابيز اللي تتفحص عليها أو None للكل) — نفس فلاتر الـ views."""
+    created = day_range("created_at", today, today)
+    return [
+        ("reservations_list (فرع)",
+         Reservation.objects.filter(branch_id=branch_id, **created),
+         "res_branch_created_id_idx", None),
+        ("reservations_list (كل الفروع)",
+         Reservation.objects.filter(**created),
+         "res_created_id_idx", None),
+        ("control_requests",
+         DailyRequest.objects.filter(is_confirmed=True, is_printed=False, **created),
+         "dreq_conf_print_created_idx", "postgresql"),
+        ("branch_requests",
+         DailyRequest.objects.filter(is_confirmed=True, branch_id=branch_id, **created),
+         "dreq_branch_conf_created_idx", None),
+        ("inventory_transactions (فرع)",
+         InventoryTransaction.objects.filter(to_branch_id=branch_id, transaction_type="transfer_in", **created),
+         "invtx_branch_type_created_idx", None),
+        ("inventory_transactions (أدمن)",
+         InventoryTransaction.objects.filter(transaction_type="transfer_in", **created),
+         "invtx_type_created_idx", None),
+        ("applicant_list",
+         Applicant.objects.filter(**created),
+         "applicant_created_idx", None),
+        ("applicant_list (hr_help)",
+         Applicant.objects.filter(created_by_id=user_id, **created),
+         "applicant_creator_created_idx", None),
+        ("accepted_list",
+         Applicant.objects.filter(**day_range("decision_at", today, today)),
+         "applicant_decision_idx", None),
+    ]
+#-----------------------------------------------------
+class Command(BaseCommand):
+    help = "EXPLAIN لفلاتر الصفحات التقيلة ويتأكد إنها بتستخدم الـ indexes بتاعتها"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose", action="store_true", help="اطبع الخطة كاملة")
+
+    def handle(self, *args, **options):
+        failed = []
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for label, queryset, index, vendor in _cases(localdate()):
+                if vendor and vendor != connection.vendor:
+                    self.stdout.write(f"⏭️ {label:<32} {index} ({vendor} بس)")
+                    continue
+                plan = queryset.explain()
+                ok = index in plan
+                if not ok:
+                    failed.append(label)
+                mark = "✅" if ok else "❌"
+                self.stdout.write(f"{mark} {label:<32} {index}")
+                if options["verbose"] or not ok:
+                    self.stdout.write("    " + plan.replace("\n", "\n    "))
+
+        if failed:
+            raise CommandError(f"❌ {len(failed)} query مش بتستخدم الـ index المتوقع: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("✅ كل الفلاتر بتستخدم الـ indexes بتاعتها"))
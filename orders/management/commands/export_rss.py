@@ -0,0 +1,145 @@
+# orders/management/commands/export_rss.py
+# ==============================================
+# 🧠 اختبار ذاكرة التصدير: 500 ألف حجز → Excel والـ RSS ثابت؟
+# ==============================================
+# بيعمل فرع مؤقت فيه N حجز (bulk_create)، وبعدين بيشغل مهمة export_reservations الحقيقية
+# (orders/export_jobs.py: iterator + write-only) في نفس البروسيس، وthread بيقيس الـ RSS
+# كل 50ms. في الآخر الفرع وحجوزاته والمهمة وملفها بيتمسحوا.
+#
+#   python manage.py export_rss                         → 500k صف، يفشل لو الزيادة > 150MB
+#   python manage.py export_rss --rows 100000 --max-mb 80
+#   python manage.py export_rss --in-memory             → + نفس الصفوف بـ Workbook عادي للمقارنة
+#
+# ⚠️ Linux بس (/proc/self/statm). الـ seed بياخد وقت (دقايق على SQLite مع 500k).
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import openpyxl
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from orders import jobs
+from orders.exports import iter_rows
+from orders.models import Branch, Job, Product, Reservation
+
+SEED_BATCH = 5000
+#-----------------------------------------------------
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+#-----------------------------------------------------
+class _PeakRss:
+    """thread بيقيس أعلى RSS طول ما الـ block شغال."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start = _rss_mb()
+        self.peak = self.start
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_mb())
+
+    @property
+    def growth(self):
+        return self.peak - self.start
+#-----------------------------------------------------
+class Command(BaseCommand):
+    help = "يصدّر N حجز (500k افتراضيًا) بمحرك التصدير ويتأكد إن الذاكرة مكبرتش"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500_000)
+        parser.add_argument("--max-mb", type=float, default=150.0, help="أقصى زيادة مسموحة في الـ RSS")
+        parser.add_argument("--in-memory", action="store_true",
+                            help="قارن بـ openpyxl.Workbook() العادي (بياكل ذاكرة كتير مع 500k)")
+
+    def handle(self, *args, **options):
+        if not os.path.exists("/proc/self/statm"):
+            raise CommandError("❌ القياس محتاج Linux (/proc/self/statm)")
+        product = Product.objects.order_by("id").first()
+        if product is None:
+            raise CommandError("❌ لازم يكون فيه منتج واحد على الأقل")
+
+        branch = Branch.objects.create(name=f"bench-export-{uuid.uuid4().hex[:8]}")
+        job = None
+        try:
+            self.seed(branch, product, options["rows"])
+
+            job = Job.objects.create(kind="export_reservations", params={"branch_id": branch.id})
+            started = time.perf_counter()
+            with _PeakRss() as rss:
+                status = jobs.execute(job.id)
+            elapsed = time.perf_counter() - started
+            job.refresh_from_db()
+            if status != "done":
+                raise CommandError(f"❌ المهمة فشلت: {job.message}")
+            size = job.result_file.size / (1024 * 1024)
+            self.stdout.write(
+                f"📤 write-only + iterator: {options['rows']} صف في {elapsed:.1f}s | "
+                f"ملف {size:.1f}MB | RSS {rss.start:.0f}MB → أعلى {rss.peak:.0f}MB (+{rss.growth:.1f}MB)"
+            )
+
+            if options["in_memory"]:
+                self.in_memory(branch)
+        finally:
+            if job is not None:
+                if job.result_file:
+                    job.result_file.delete(save=False)
+                job.delete()
+            Reservation.objects.filter(branch=branch).delete()
+            branch.delete()
+
+        if rss.growth > options["max_mb"]:
+            raise CommandError(f"❌ الذاكرة زادت {rss.growth:.1f}MB (الحد {options['max_mb']}MB)")
+        self.stdout.write(self.style.SUCCESS(f"✅ الذاكرة ثابتة (+{rss.growth:.1f}MB ≤ {options['max_mb']}MB)"))
+
+    def seed(self, branch, product, rows):
+        self.stdout.write(f"🌱 {rows} حجز في فرع {branch.name}...")
+        statuses = [s for s, _ in Reservation.STATUS_CHOICES]
+        deliveries = [d for d, _ in Reservation.DELIVERY_CHOICES]
+        with transaction.atomic():
+            for offset in range(0, rows, SEED_BATCH):
+                Reservation.objects.bulk_create([
+                    Reservation(
+                        branch=branch, product=product, quantity=1,
+                        delivery_type=deliveries[i % len(deliveries)],
+                        status=statuses[i % len(statuses)],
+                    )
+                    for i in range(offset, min(offset + SEED_BATCH, rows))
+                ])
+
+    def in_memory(self, branch):
+        """للمقارنة: نفس الأعمدة بـ Workbook كامل في الذاكرة (زي التصدير القديم)."""
+        rows = Reservation.objects.filter(branch=branch).order_by("-created_at").values_list(
+            "id", "customer__name", "customer__phone", "product__name",
+            "branch__name", "delivery_type", "status", "created_at",
+        )
+        started = time.perf_counter()
+        with _PeakRss() as rss:
+            wb = openpyxl.Workbook()
+            ws = wb.active
+            for row in iter_rows(rows):
+                ws.append([v.replace(tzinfo=None) if hasattr(v, "tzinfo") else v for v in row])
+            with tempfile.TemporaryFile() as tmp:
+                wb.save(tmp)
+            del wb, ws
+        self.stdout.write(
+            f"🐘 Workbook عادي:          {time.perf_counter() - started:.1f}s | "
+            f"RSS {rss.start:.0f}MB → أعلى {rss.peak:.0f}MB (+{rss.growth:.1f}MB)"
+        )
@@ -0,0 +1,97 @@
+# orders/management/commands/order_numbers_stress.py
+# ==============================================
+# 🔢 اختبار ضغط: أرقام الطلبيات مبتتكررش تحت التوازي
+# ==============================================
+# بيشغل N عملية منفصلة (زي N worker)، كل عملية فيها threads بتطلب أرقام
+# طلبيات في نفس الوقت، وبعدين بيتأكد إن كل الأرقام فريدة.
+#
+#   python manage.py order_numbers_stress                    → 100 رقم (4 workers × 8 threads)
+#   python manage.py order_numbers_stress --block 1          → كل رقم = UPDATE على الصف
+import multiprocessing
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+#-----------------------------------------------------
+def _worker(count, threads, block_size, result_q):
+    """عملية منفصلة: threads بتطلب count رقم في نفس الوقت."""
+    import django
+    django.setup()
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.db import connection
+    from orders.sequences import next_order_number
+
+    def allocate(_):
+        try:
+            return next_order_number(block_size)
+        finally:
+            connection.close()  # كل thread ليها connection خاصة
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            result_q.put(("ok", list(pool.map(allocate, range(count)))))
+    except Exception as e:
+        result_q.put(("error", repr(e)))
+
+
+class Command(BaseCommand):
+    help = "يطلب أرقام طلبيات بالتوازي من أكتر من عملية ويتأكد إن مفيش تكرار"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--allocations", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--block", type=int, default=None, help="حجم الـ block (الافتراضي من الإعدادات)")
+        parser.add_argument("--timeout", type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        # lazy: العمليات الجديدة (spawn) بتعمل import للملف ده قبل django.setup
+        from orders.models import OrderCounter
+        from orders.sequences import COUNTER_ID
+
+        total, workers = options["allocations"], max(1, options["workers"])
+        shares = [total // workers + (1 if i < total % workers else 0) for i in range(workers)]
+        before = OrderCounter.objects.filter(id=COUNTER_ID).values_list("current_number", flat=True).first() or 0
+
+        ctx = multiprocessing.get_context("spawn")
+        result_q = ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker, args=(share, options["threads"], options["block"], result_q), daemon=True)
+            for share in shares if share
+        ]
+        started = time.monotonic()
+        for p in procs:
+            p.start()
+
+        numbers, errors = [], []
+        try:
+            for _ in procs:
+                status, payload = result_q.get(timeout=options["timeout"])
+                if status == "ok":
+                    numbers.extend(payload)
+                else:
+                    errors.append(payload)
+        except Exception:
+            raise CommandError("❌ فيه worker مخلصش في الوقت المحدد")
+        finally:
+            for p in procs:
+                p.join(timeout=5)
+        elapsed = time.monotonic() - started
+
+        after = OrderCounter.objects.filter(id=COUNTER_ID).values_list("current_number", flat=True).first() or 0
+        duplicates = [n for n, c in Counter(numbers).items() if c > 1]
+
+        self.stdout.write(
+            f"📊 {len(numbers)} رقم في {elapsed:.2f}s من {len(procs)} عملية — "
+            f"العداد {before} → {after}"
+        )
+        if errors:
+            raise CommandError(f"❌ أخطاء في الـ workers: {errors}")
+        if len(numbers) != total:
+            raise CommandError(f"❌ المتوقع {total} رقم واللي رجع {len(numbers)}")
+        if duplicates:
+            raise CommandError(f"❌ أرقام متكررة: {duplicates[:20]}")
+        if any(not before < int(n) <= after for n in numbers):
+            raise CommandError("❌ فيه أرقام برا المدى اللي اتحجز من العداد")
+        self.stdout.write(self.style.SUCCESS("✅ كل الأرقام فريدة"))
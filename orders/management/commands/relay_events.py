@@ -0,0 +1,91 @@
+# orders/management/commands/relay_events.py
+# ==============================================
+# 📤 Relay للـ outbox: أحداث WebSocket اتكتبت ومتبعتتش
+# ==============================================
+# الإرسال العادي بيحصل من البروسيس نفسه بعد الـ commit (orders/publisher.py)
+# وبيعلّم الصفوف sent_at. لو البروسيس وقع قبلها، أو الحدث اتشال من الطابور،
+# أو الـ channel layer رفض → الصف بيفضل sent_at = NULL والأمر ده بيبعته.
+#
+#   python manage.py relay_events                 → يفضل شغال (كل ثانية)
+#   python manage.py relay_events --once          → دفعة واحدة وخلاص (cron)
+#   python manage.py relay_events --purge-days 3  → يمسح المتبعت الأقدم من 3 أيام
+#
+# ⚠️ الإرسال من بروسيس منفصل محتاج CHANNEL_REDIS_URL: مع InMemoryChannelLayer الرسالة
+# بتفضل جوه بروسيس الـ relay نفسه → الأمر بيكتفي بمسح الصفوف القديمة (الجدول ميكبرش).
+# بيشتغل من entrypoint.sh (REALTIME_RELAY=0 لو شغال في container لوحده).
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+#-----------------------------------------------------
+class Command(BaseCommand):
+    help = "يبعت أحداث الـ outbox (RealtimeEvent) اللي موصلتش للـ channel layer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=500)
+        parser.add_argument("--interval", type=float, default=1.0, help="ثواني بين كل دورة")
+        parser.add_argument("--grace", type=float, default=5.0,
+                            help="ثواني نسيب فيها الإرسال العادي يخلص قبل ما الـ relay يتدخل")
+        parser.add_argument("--purge-days", type=int, default=7, help="0 = مفيش مسح")
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        relaying = not settings.CHANNEL_LAYERS["default"]["BACKEND"].endswith("InMemoryChannelLayer")
+        if not relaying:
+            self.stderr.write(
+                "⚠️ InMemoryChannelLayer مش بيعدي بين العمليات — الإرسال متوقف، مسح القديم بس "
+                "(حدد CHANNEL_REDIS_URL عشان الـ relay يبعت)"
+            )
+        total = 0
+        last_purge = 0.0
+        while True:
+            close_old_connections()
+            sent = self.relay(options["batch"], options["grace"]) if relaying else 0
+            total += sent
+            if sent:
+                self.stdout.write(f"📤 {sent} حدث (الإجمالي {total})")
+
+            if options["purge_days"] and time.monotonic() - last_purge > 3600:
+                self.purge(options["purge_days"])
+                last_purge = time.monotonic()
+
+            if options["once"]:
+                break
+            if sent < options["batch"]:
+                time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} حدث اتبعت"))
+
+    def relay(self, batch, grace):
+        from orders import broadcast
+        from orders.models import RealtimeEvent
+
+        cutoff = timezone.now() - timedelta(seconds=grace)
+        with transaction.atomic():
+            # skip_locked → أكتر من relay يشتغلوا مع بعض من غير ما يبعتوا نفس الصف (Postgres)
+            rows = list(
+                RealtimeEvent.objects.select_for_update(skip_locked=True)
+                .filter(sent_at__isnull=True, created_at__lte=cutoff)
+                .order_by("id")[:batch]
+            )
+            if not rows:
+                return 0
+            failed = async_to_sync(broadcast.asend)(broadcast.rows_buffer(rows), ack=False)
+            if failed:
+                self.stderr.write(f"⚠️ {failed} رسالة فشلت — هتتعاد في الدورة الجاية")
+                return 0
+            # كل الصفوف (حتى اللي اتدمجت في أحدث منها) تتعلم متبعتة
+            broadcast.mark_sent([row.id for row in rows])
+        return len(rows)
+
+    def purge(self, days):
+        from orders.models import RealtimeEvent
+
+        deleted, _ = RealtimeEvent.objects.filter(
+            sent_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        if deleted:
+            self.stdout.write(f"🧹 اتمسح {deleted} حدث قديم")
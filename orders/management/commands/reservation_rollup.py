@@ -0,0 +1,31 @@
+# orders/management/commands/reservation_rollup.py
+# ==============================================
+# 📊 بناء/مراجعة ملخص الحجوزات اليومي
+# ==============================================
+#   python manage.py reservation_rollup            → إعادة بناء كاملة
+#   python manage.py reservation_rollup --verify   → مقارنة بس (exit code 1 لو فيه فرق)
+from django.core.management.base import BaseCommand, CommandError
+
+from orders import reporting, rollup
+from orders.models import Reservation, ReservationDailyStat
+
+
+class Command(BaseCommand):
+    help = "يبني ReservationDailyStat من الحجوزات أو يراجعه عليها"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="مراجعة بس من غير تعديل")
+
+    def handle(self, *args, **options):
+        if options["verify"]:
+            mismatches = rollup.diff(Reservation, ReservationDailyStat)
+            for key, expected, actual in mismatches[:50]:
+                self.stdout.write(self.style.ERROR(f"❌ {key}: متوقع {expected} / موجود {actual}"))
+            if mismatches:
+                raise CommandError(f"❌ {len(mismatches)} خانة مختلفة — شغل الأمر من غير --verify")
+            self.stdout.write(self.style.SUCCESS("✅ الملخص مطابق للحجوزات"))
+            return
+
+        cells = rollup.rebuild(Reservation, ReservationDailyStat)
+        reporting.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"✅ تم بناء الملخص ({cells} خانة)"))
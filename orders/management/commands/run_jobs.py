@@ -0,0 +1,164 @@
+# orders/management/commands/run_jobs.py
+# ==============================================
+# ⚙️ Worker لمهام الخلفية (orders/jobs.py): الاستيراد والتصدير التقيل
+# ==============================================
+# بيسحب المهام الـ queued من جدول Job ويشغلها في process pool (كل مهمة في بروسيس
+# لوحدها → pandas/openpyxl مش بيحجزوا Daphne ولا بعض).
+#
+#   python manage.py run_jobs                  → يفضل شغال (JOBS_WORKERS بروسيس)
+#   python manage.py run_jobs --once           → يشغل اللي في الطابور ويستناه يخلص (cron / تجربة)
+#   python manage.py run_jobs --stale 1800     → مهمة running بقالها نص ساعة من غير تحديث ترجع للطابور
+#   python manage.py run_jobs --purge-days 3   → يمسح المهام (وملفاتها) الأقدم من 3 أيام
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from orders import jobs
+#-----------------------------------------------------
+class Command(BaseCommand):
+    help = "يشغل مهام الخلفية (Job) اللي في الطابور"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=getattr(settings, "JOBS_WORKERS", 2))
+        parser.add_argument("--interval", type=float, default=1.0, help="ثواني بين كل دورة")
+        parser.add_argument("--stale", type=int, default=1800,
+                            help="ثواني من غير تحديث قبل ما مهمة running ترجع للطابور (0 = أبدًا)")
+        parser.add_argument("--purge-days", type=int, default=getattr(settings, "JOBS_KEEP_DAYS", 3),
+                            help="0 = مفيش مسح")
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        pool = self.new_pool(workers)
+        running = {}   # future → job_id
+        total = 0
+        last_purge = 0.0
+        self.stdout.write(f"⚙️ run_jobs شغال ({workers} بروسيس)")
+        if "locmem" in settings.CACHES["default"]["BACKEND"].lower():
+            # الكاش مش مشترك → إلغاء الكتالوج بعد import_products بيوصل الصفحات بعد CATALOG_VERSION_TTL بس
+            self.stderr.write(
+                f"⚠️ الكاش LocMem: تعديلات الاستيراد هتظهر في الصفحات خلال "
+                f"{getattr(settings, 'CATALOG_VERSION_TTL', 5)} ثانية (CACHE_REDIS_URL → فورًا)"
+            )
+        try:
+            while True:
+                close_old_connections()
+                total += self.collect(running)
+
+                if options["stale"]:
+                    self.requeue_stale(options["stale"], set(running.values()))
+
+                free = workers - len(running)
+                claimed = self.claim(free) if free > 0 else []
+                for job_id in claimed:
+                    try:
+                        running[pool.submit(jobs.execute, job_id)] = job_id
+                    except BrokenProcessPool:
+                        # بروسيس مات (OOM مثلًا) → pool جديد والمهمة ترجع للطابور
+                        self.stderr.write("⚠️ الـ pool وقع — بنبدأ واحد جديد")
+                        self.requeue([job_id])
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = self.new_pool(workers)
+
+                if options["purge_days"] and time.monotonic() - last_purge > 3600:
+                    self.purge(options["purge_days"])
+                    last_purge = time.monotonic()
+
+                if options["once"] and not claimed and not running:
+                    break
+                time.sleep(options["interval"])
+        finally:
+            pool.shutdown(wait=True)
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} مهمة اتنفذت"))
+
+    def new_pool(self, workers):
+        # spawn: كل بروسيس بيبدأ نضيف (من غير connections الداتابيز بتاعة الأب) و init_worker يعمل django.setup
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=jobs.init_worker,
+        )
+
+    def collect(self, running):
+        """المهام اللي خلصت → تتشال من running (واللي البروسيس بتاعها وقع تتعلم failed)."""
+        finished = 0
+        for future in [f for f in running if f.done()]:
+            job_id = running.pop(future)
+            finished += 1
+            error = future.exception()
+            if error is None:
+                self.stdout.write(f"📦 مهمة #{job_id}: {future.result()}")
+                continue
+            self.stderr.write(f"⚠️ مهمة #{job_id} وقعت: {error!r}")
+            self.fail(job_id, f"⚠️ حدث خطأ أثناء التنفيذ: {error}")
+        return finished
+
+    def claim(self, limit):
+        """أقدم limit مهام queued → running (skip_locked → أكتر من worker من غير تكرار على Postgres)."""
+        from orders.models import Job
+
+        with transaction.atomic():
+            ids = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status="queued")
+                .order_by("id")
+                .values_list("id", flat=True)[:limit]
+            )
+            if ids:
+                Job.objects.filter(id__in=ids).update(
+                    status="running", started_at=timezone.now(), updated_at=timezone.now()
+                )
+        for job in Job.objects.filter(id__in=ids):
+            jobs.publish(job)
+        return ids
+
+    def requeue(self, ids):
+        from orders.models import Job
+
+        Job.objects.filter(id__in=ids).update(status="queued", progress=0, updated_at=timezone.now())
+
+    def requeue_stale(self, seconds, mine):
+        """running من غير أي تحديث من فترة (worker اتقفل في النص) → ترجع للطابور."""
+        from orders.models import Job
+
+        stale = list(
+            Job.objects.filter(status="running", updated_at__lt=timezone.now() - timedelta(seconds=seconds))
+            .exclude(id__in=mine)
+            .values_list("id", flat=True)
+        )
+        if stale:
+            self.requeue(stale)
+            self.stderr.write(f"🔁 {len(stale)} مهمة رجعت للطابور: {stale}")
+
+    def fail(self, job_id, message):
+        from orders.models import Job
+
+        job = Job.objects.filter(id=job_id).first()
+        if job is None or job.status in ("done", "failed"):
+            return
+        job.status, job.message, job.finished_at = "failed", message[:255], timezone.now()
+        job.save(update_fields=["status", "message", "finished_at", "updated_at"])
+        jobs.publish(job)
+
+    def purge(self, days):
+        from orders.models import Job
+
+        old = Job.objects.filter(
+            status__in=["done", "failed"], finished_at__lt=timezone.now() - timedelta(days=days)
+        )
+        deleted = 0
+        for job in old.iterator():
+            for f in (job.input_file, job.result_file):
+                if f:
+                    f.delete(save=False)
+            job.delete()
+            deleted += 1
+        if deleted:
+            self.stdout.write(f"🧹 اتمسح {deleted} مهمة قديمة")
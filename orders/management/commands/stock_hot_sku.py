@@ -0,0 +1,105 @@
+# orders/management/commands/stock_hot_sku.py
+# ==============================================
+# 🔥 اختبار ضغط: 50 موظف كول سنتر بيحجزوا نفس المنتج في نفس الفرع في نفس اللحظة
+# ==============================================
+# كل agent = thread بـ connection داتابيز لوحده، بيفضل يحجز (reserve_stock) لحد ما
+# المخزون يخلص. في الآخر بنتأكد إن مفيش oversell:
+#   عدد الحجوزات الناجحة × الكمية == المخزون الأول، والمخزون النهائي = 0 (أو الباقي أقل من الكمية).
+#
+#   python manage.py stock_hot_sku --branch 1 --product 3
+#   python manage.py stock_hot_sku --branch 1 --product 3 --agents 50 --stock 500 --quantity 2
+#
+# ⚠️ بيغير كمية سجل المخزون ده مؤقتًا (وبيرجعها زي ما كانت في الآخر) → على بيئة تجربة.
+#    على SQLite الكتابة بتتسلسل (database is locked) — الأرقام الحقيقية على Postgres.
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from orders.models import Inventory
+from orders.stock import InsufficientStock, current_quantity, reserve_stock
+#-----------------------------------------------------
+def _percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+#-----------------------------------------------------
+class Command(BaseCommand):
+    help = "يشغل N agent بيحجزوا نفس المنتج في نفس الوقت ويتأكد إن مفيش oversell"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, required=True)
+        parser.add_argument("--product", type=int, required=True)
+        parser.add_argument("--agents", type=int, default=50)
+        parser.add_argument("--stock", default="200", help="المخزون اللي بنبدأ بيه")
+        parser.add_argument("--quantity", default="1", help="الكمية في كل حجز")
+
+    def handle(self, *args, **options):
+        branch_id, product_id = options["branch"], options["product"]
+        stock, qty = Decimal(options["stock"]), Decimal(options["quantity"])
+        agents = options["agents"]
+
+        inventory = Inventory.objects.filter(branch_id=branch_id, product_id=product_id).first()
+        if inventory is None:
+            raise CommandError("❌ مفيش سجل مخزون للفرع/المنتج دول")
+        original = inventory.quantity
+
+        Inventory.objects.filter(id=inventory.id).update(quantity=stock)
+        try:
+            results, elapsed = self.run(branch_id, product_id, qty, agents)
+            final = current_quantity(branch_id, product_id)
+        finally:
+            Inventory.objects.filter(id=inventory.id).update(quantity=original)
+
+        booked = sum(r["ok"] for r in results)
+        refused = sum(r["refused"] for r in results)
+        errors = sum(r["errors"] for r in results)
+        latencies = sorted(ms for r in results for ms in r["latencies"])
+
+        self.stdout.write(
+            f"👥 {agents} agent | 📦 {stock} → {final} | ✅ {booked} حجز | 🛑 {refused} رفض | ⚠️ {errors} خطأ"
+        )
+        if latencies:
+            self.stdout.write(
+                f"⏱️ p50={_percentile(latencies, 50):.1f}ms  p99={_percentile(latencies, 99):.1f}ms  "
+                f"{len(latencies) / elapsed:.0f} خصم/ث"
+            )
+
+        expected = stock - booked * qty
+        if final < 0 or final != expected or final >= qty:
+            raise CommandError(
+                f"❌ oversell/فقد: المتوقع {expected} (ومن غير سالب وأقل من {qty}) لكن الموجود {final}"
+            )
+        self.stdout.write(self.style.SUCCESS("✅ مفيش oversell — كل وحدة اتحجزت مرة واحدة بالظبط"))
+
+    def run(self, branch_id, product_id, qty, agents):
+        start = threading.Barrier(agents)
+
+        def agent(_):
+            result = {"ok": 0, "refused": 0, "errors": 0, "latencies": []}
+            try:
+                start.wait()   # الكل يبدأ في نفس اللحظة
+                while True:
+                    began = time.perf_counter()
+                    try:
+                        reserve_stock(branch_id, product_id, qty)
+                    except InsufficientStock:
+                        result["refused"] += 1
+                        break   # المخزون خلص
+                    except OperationalError:
+                        result["errors"] += 1   # SQLite: database is locked → نحاول تاني
+                        continue
+                    result["latencies"].append((time.perf_counter() - began) * 1000)
+                    result["ok"] += 1
+            finally:
+                connection.close()   # كل thread ليه connection لوحده
+            return result
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=agents) as pool:
+            results = list(pool.map(agent, range(agents)))
+        return results, time.perf_counter() - began
@@ -10,3 +10,69 @@ class NoCacheMiddleware:
         response['Pragma'] = 'no-cache'
         response['Expires'] = '0'
         return response
+#-----------------------------------------------------
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils.functional import SimpleLazyObject
+
+from . import broadcast
+
+
+class BroadcastMiddleware:
+    """يجمع أحداث الـ WebSocket طول الـ request ويبعتها مجمّعة في الآخر."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # تحت Daphne بيشتغل async → مفيش thread زيادة للـ views الـ async
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with broadcast.collect():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with broadcast.acollect():
+            return await self.get_response(request)
+#-----------------------------------------------------
+from .roles import get_role_ctx
+
+
+async def _arole_ctx(request):
+    return await sync_to_async(get_role_ctx)(request.user)
+
+
+class RoleContextMiddleware:
+    """
+    يحسب صلاحيات المستخدم مرة واحدة → request.role_ctx (لازم بعد AuthenticationMiddleware).
+    في وضع async: request.role_ctx بيتحسب أول ما يتطلب (جوه thread الـ view العادي)،
+    والـ views الـ async بتستخدم await request.arole_ctx() (زي request.user / request.auser).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request.role_ctx = get_role_ctx(request.user)
+        request.arole_ctx = partial(_arole_ctx, request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.role_ctx = SimpleLazyObject(lambda: get_role_ctx(request.user))
+        request.arole_ctx = partial(_arole_ctx, request)
+        return await self.get_response(request)
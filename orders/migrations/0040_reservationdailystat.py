@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    from orders import rollup
+    rollup.rebuild(apps.get_model("orders", "Reservation"), apps.get_model("orders", "ReservationDailyStat"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0039_userprofile_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('quantity', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='orders.branch')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='orders.product')),
+            ],
+            options={
+                'verbose_name': 'ملخص حجوزات يومي',
+                'verbose_name_plural': 'ملخص الحجوزات اليومي',
+                'constraints': [models.UniqueConstraint(fields=('date', 'branch', 'product', 'status'), name='uniq_reservation_daily_stat')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0040_reservationdailystat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyrequest',
+            index=models.Index(fields=['is_confirmed', 'is_printed', 'created_at'], name='dreq_conf_print_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrequest',
+            index=models.Index(fields=['branch', 'is_confirmed', 'created_at'], name='dreq_branch_conf_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrequest',
+            index=models.Index(fields=['order_number'], name='dreq_order_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['to_branch', 'transaction_type', 'created_at'], name='invtx_branch_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['transaction_type', 'created_at'], name='invtx_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['branch', 'created_at'], name='res_branch_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['created_at'], name='res_created_idx'),
+        ),
+    ]
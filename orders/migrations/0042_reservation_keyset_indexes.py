@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0041_hot_table_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='res_branch_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='res_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['branch', 'created_at', 'id'], name='res_branch_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['created_at', 'id'], name='res_created_id_idx'),
+        ),
+    ]
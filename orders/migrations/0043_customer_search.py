@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+def backfill_phone_digits(apps, schema_editor):
+    from orders.utils import normalize_phone
+    Customer = apps.get_model("orders", "Customer")
+    batch = []
+    for customer in Customer.objects.exclude(phone=None).only("id", "phone").iterator(chunk_size=2000):
+        customer.phone_digits = normalize_phone(customer.phone)
+        batch.append(customer)
+        if len(batch) >= 2000:
+            Customer.objects.bulk_update(batch, ["phone_digits"])
+            batch = []
+    if batch:
+        Customer.objects.bulk_update(batch, ["phone_digits"])
+
+
+# 🔎 GIN trigram على UPPER(name) — نفس التعبير اللي name__icontains بيطلعه على Postgres
+def create_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS customer_name_trgm_idx "
+        "ON orders_customer USING gin (UPPER(name::text) gin_trgm_ops)"
+    )
+
+
+def drop_name_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS customer_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0042_reservation_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='phone_digits',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_digits'], name='customer_phone_digits_idx'),
+        ),
+        migrations.RunPython(backfill_phone_digits, migrations.RunPython.noop),
+        migrations.RunPython(create_name_trigram_index, drop_name_trigram_index),
+    ]
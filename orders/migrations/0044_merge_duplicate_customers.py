@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:22
+
+from django.db import migrations
+
+
+def merge_duplicates(apps, schema_editor):
+    # لازم قبل الـ unique constraint (أمر dedupe_customers بيعمل نفس الحاجة على دفعات)
+    from orders.customers import merge_duplicates
+    merge_duplicates(apps.get_model("orders", "Customer"), apps.get_model("orders", "Reservation"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0043_customer_search'),
+    ]
+
+    operations = [
+        # ✋ migration لوحدها: على Postgres مينفعش نعمل الـ index في نفس transaction التعديلات
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
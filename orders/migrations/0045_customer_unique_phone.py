@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0044_merge_duplicate_customers'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(condition=models.Q(('phone_digits', ''), _negated=True), fields=('phone_digits',), name='uniq_customer_phone_digits'),
+        ),
+    ]
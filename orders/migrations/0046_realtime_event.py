@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0045_customer_unique_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RealtimeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'id'], name='rt_event_group_seq_idx'), models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['id'], name='rt_event_unsent_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    # التأكيد كان بيتعمل للقسم كله مرة واحدة → أي صف متأكد = القسم بتاعه متأكد
+    ProductionRequest = apps.get_model("orders", "ProductionRequest")
+    ProductionConfirmation = apps.get_model("orders", "ProductionConfirmation")
+    rows = (
+        ProductionRequest.objects.filter(confirmed=True)
+        .values_list("branch_id", "date", "product__category_id").distinct()
+    )
+    ProductionConfirmation.objects.bulk_create(
+        [
+            ProductionConfirmation(branch_id=branch_id, date=date, category_id=category_id)
+            for branch_id, date, category_id in rows
+            if category_id
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0046_realtime_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionConfirmation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('confirmed_at', models.DateTimeField(auto_now_add=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='production_confirmations', to='orders.branch')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='production_confirmations', to='orders.category')),
+                ('confirmed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'branch'], name='prodconf_date_branch_idx')],
+                'constraints': [models.UniqueConstraint(fields=('branch', 'date', 'category'), name='uniq_production_confirmation')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+def group_to_groups(apps, schema_editor):
+    RealtimeEvent = apps.get_model("orders", "RealtimeEvent")
+    for event in RealtimeEvent.objects.only("id", "group").iterator():
+        RealtimeEvent.objects.filter(id=event.id).update(groups=[event.group])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0048_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realtimeevent',
+            name='groups',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RunPython(group_to_groups, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='realtimeevent',
+            name='rt_event_group_seq_idx',
+        ),
+        migrations.RemoveField(
+            model_name='realtimeevent',
+            name='group',
+        ),
+    ]
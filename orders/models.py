@@ -1,13 +1,18 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
 from decimal import Decimal
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .utils import normalize_phone
 #-----------------------------------------------------------
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -80,8 +85,31 @@ class Inventory(models.Model):
 class Customer(models.Model):
     name = models.CharField(max_length=200)
     phone = models.CharField(max_length=11, null=True, blank=True)  # 👈 كده مش إجباري
+    # 🔎 التليفون أرقام بس (بيتحسب في save) — للبحث بالبداية بالـ index (orders/search.py)
+    phone_digits = models.CharField(max_length=20, blank=True, default="", editable=False)
     address = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["phone_digits"], name="customer_phone_digits_idx"),
+            # + GIN trigram على UPPER(name) في Postgres بس (migration 0043)
+        ]
+        constraints = [
+            # 👤 عميل واحد لكل رقم (العملاء من غير تليفون مش داخلين) — orders/customers.py
+            models.UniqueConstraint(
+                fields=["phone_digits"],
+                condition=~Q(phone_digits=""),
+                name="uniq_customer_phone_digits",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.phone_digits = normalize_phone(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_digits"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.id} - {self.name} ({self.phone})"
 #-------------------------------------------------------------------
@@ -137,9 +165,55 @@ class Reservation(models.Model):
             if (self.quantity % 1) != 0:
                 raise ValidationError({"quantity": "هذا المنتج لا يقبل كسورًا. استخدم عددًا صحيحًا."})
 
+    class Meta:
+        # 🔎 قايمة الحجوزات: فرع + فترة (أو فترة بس للأدمن) مترتبة بـ (created_at, id)
+        #    id في الآخر عشان الـ keyset pagination يمشي على الـ index من غير sort
+        indexes = [
+            models.Index(fields=["branch", "created_at", "id"], name="res_branch_created_id_idx"),
+            models.Index(fields=["created_at", "id"], name="res_created_id_idx"),
+        ]
+
+    # 📊 الحقول اللي بيتبني عليها ReservationDailyStat
+    ROLLUP_FIELDS = ("created_at", "branch_id", "product_id", "status", "quantity")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # نحفظ القيم زي ما هي في الداتابيز عشان نعرف الملخص اتغير ولا لأ
+        if all(f in instance.__dict__ for f in cls.ROLLUP_FIELDS):
+            instance._rollup_saved = instance.rollup_values()
+        return instance
+
+    def rollup_values(self):
+        """(يوم، فرع، منتج، حالة، كمية) — خانة الحجز في ReservationDailyStat."""
+        return (
+            timezone.localdate(self.created_at),
+            self.branch_id, self.product_id, self.status, self.quantity,
+        )
+
+    def _stored_rollup_values(self, old, update_fields):
+        """القيم اللي اتحفظت فعلاً: مع update_fields باقي الحقول بتفضل زي ما هي في الداتابيز."""
+        new = self.rollup_values()
+        if old is None or update_fields is None:
+            return new
+        saved = {self._meta.get_field(f).attname for f in update_fields}
+        return tuple(n if f in saved else o for f, o, n in zip(self.ROLLUP_FIELDS, old, new))
+
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            old = None
+            if not self._state.adding:
+                old = getattr(self, "_rollup_saved", None)
+                if old is None:
+                    row = Reservation.objects.filter(pk=self.pk).values_list(*self.ROLLUP_FIELDS).first()
+                    if row:
+                        old = (timezone.localdate(row[0]),) + tuple(row[1:])
+            super().save(*args, **kwargs)
+            new = self._stored_rollup_values(old, kwargs.get("update_fields"))
+            if new != old:
+                ReservationDailyStat.apply(old, new)
+            self._rollup_saved = new
 
     def confirm(self, user=None, is_admin=False):
         """تأكيد أو إعادة تأكيد الحجز"""
@@ -181,8 +255,61 @@ class Reservation(models.Model):
     def last_decision_time(self):
         """ترجع آخر تاريخ تم فيه تعديل قرار الحجز"""
         return self.admin_last_modified_at or self.branch_last_modified_at or self.decision_at
+#-------------------------------------------------------------------
+class ReservationDailyStat(models.Model):
+    """
+    📊 ملخص يومي للحجوزات (يوم × فرع × منتج × حالة → عدد، كمية).
+    بيتحدث تدريجيًا مع كل حجز جديد/تأكيد/إلغاء/حذف، والتقارير بتقرا منه
+    بدل ما تلف على كل صفوف Reservation.
+    إعادة البناء/المراجعة: python manage.py reservation_rollup [--verify]
+    """
+    date = models.DateField()
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="+")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    status = models.CharField(max_length=20, choices=Reservation.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    quantity = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
 
+    class Meta:
+        verbose_name = "ملخص حجوزات يومي"
+        verbose_name_plural = "ملخص الحجوزات اليومي"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "branch", "product", "status"], name="uniq_reservation_daily_stat"
+            ),
+        ]
 
+    def __str__(self):
+        return f"{self.date} - {self.branch_id}/{self.product_id} {self.status}: {self.count}"
+
+    @classmethod
+    def bump(cls, day, branch_id, product_id, status, count, quantity):
+        """زيادة/نقص ذري لخانة واحدة (UPDATE ... SET count = count + n) أو إنشاؤها."""
+        lookup = {"date": day, "branch_id": branch_id, "product_id": product_id, "status": status}
+        delta = {"count": F("count") + count, "quantity": F("quantity") + quantity}
+        if cls.objects.filter(**lookup).update(**delta) or count < 0:
+            # count < 0 ومفيش صف (مثلاً الفرع/المنتج بيتمسح) → مفيش حاجة تتنقص
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(count=count, quantity=quantity, **lookup)
+        except IntegrityError:
+            # حد تاني أنشأ نفس الخانة في نفس اللحظة
+            cls.objects.filter(**lookup).update(**delta)
+
+    @classmethod
+    def apply(cls, old, new):
+        """نقل حجز من خانة (old) لخانة (new) — أي واحدة ممكن تكون None."""
+        if old:
+            cls.bump(*old[:4], count=-1, quantity=-old[4])
+        if new:
+            cls.bump(*new[:4], count=1, quantity=new[4])
+
+
+@receiver(post_delete, sender=Reservation)
+def remove_reservation_from_rollup(sender, instance, **kwargs):
+    saved = getattr(instance, "_rollup_saved", None)
+    ReservationDailyStat.apply(saved or instance.rollup_values(), None)
 #-------------------------------------------------------------------
 class InventoryTransaction(models.Model):
     TRANSACTION_TYPES = [
@@ -199,6 +326,13 @@ class InventoryTransaction(models.Model):
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     created_at = models.DateTimeField(auto_now_add=True)
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        # 🔎 حركات المخزون: نوع الحركة + فترة (وفرع لموظف الفرع)
+        indexes = [
+            models.Index(fields=["to_branch", "transaction_type", "created_at"], name="invtx_branch_type_created_idx"),
+            models.Index(fields=["transaction_type", "created_at"], name="invtx_type_created_idx"),
+        ]
 #-----------------------------------------------------------
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -253,6 +387,14 @@ class DailyRequest(models.Model):
     class Meta:
         verbose_name = "طلب يومي"
         verbose_name_plural = "الطلبات اليومية"
+        indexes = [
+            # 🎛️ الكنترول: مؤكد + مطبوع/لا + فترة
+            models.Index(fields=["is_confirmed", "is_printed", "created_at"], name="dreq_conf_print_created_idx"),
+            # 🏪 طلبات الفرع
+            models.Index(fields=["branch", "is_confirmed", "created_at"], name="dreq_branch_conf_created_idx"),
+            # 🔑 الطلبية الحالية / mark_printed
+            models.Index(fields=["order_number"], name="dreq_order_number_idx"),
+        ]
 
     def __str__(self):
         return f"{self.branch.name} - {self.product.name} ({self.quantity})"
@@ -344,3 +486,88 @@ class ProductionRequest(models.Model):
 
     def __str__(self):
         return f"{self.date} | {self.branch.name} | {self.product.name} = {self.quantity}"
+#-------------------------------------------------------------------------------------------------------
+class ProductionConfirmation(models.Model):
+    """
+    سجل تأكيد الأقسام: الفرع أكد قسم (category) في يوم معين.
+    صف واحد لكل (فرع، يوم، قسم) → "القسم متأكد؟" ولوحة حالة الفروع lookup على index
+    بدل ما نعد صفوف ProductionRequest.
+    """
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="production_confirmations")
+    date = models.DateField(default=localdate)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="production_confirmations")
+    confirmed_at = models.DateTimeField(auto_now_add=True)
+    confirmed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["branch", "date", "category"], name="uniq_production_confirmation"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date", "branch"], name="prodconf_date_branch_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} | {self.branch.name} ✅ {self.category.name}"
+#-------------------------------------------------------------------------------------------------------
+class RealtimeEvent(models.Model):
+    """
+    Outbox لأحداث الـ WebSocket: صف لكل حدث بقايمة الجروبات اللي رايحله، وكل صفوف الـ transaction
+    بتتكتب مع بعض بعد الـ commit (orders/broadcast.py).
+    الـ id هو رقم التسلسل (seq) اللي الشاشات بتكمل منه بعد ما السوكيت يرجع.
+    sent_at = None → لسه متبعتش (relay_events بيبعته).
+    """
+    groups = models.JSONField(default=list)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=Q(sent_at__isnull=True), name="rt_event_unsent_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} → {', '.join(self.groups)}"
+#-------------------------------------------------------------------------------------------------------
+def job_files_storage():
+    """ملفات المهام (المرفوع + الناتج) برا MEDIA → مش بتتنزل غير من job_download."""
+    from django.conf import settings
+    from django.core.files.storage import FileSystemStorage
+    return FileSystemStorage(location=settings.JOB_FILES_ROOT)
+#-------------------------------------------------------------------------------------------------------
+class Job(models.Model):
+    """
+    مهمة في الخلفية (استيراد/تصدير) — بيشغلها run_jobs (orders/jobs.py).
+    kind = اسم الـ handler، params = مدخلاته (JSON).
+    """
+    STATUS_CHOICES = [
+        ("queued", "في الانتظار"),
+        ("running", "جاري التنفيذ"),
+        ("done", "تم"),
+        ("failed", "فشل"),
+    ]
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    input_file = models.FileField(upload_to="input/%Y/%m/%d/", storage=job_files_storage, blank=True)
+    result_file = models.FileField(upload_to="result/%Y/%m/%d/", storage=job_files_storage, blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="job_status_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} ({self.status})"
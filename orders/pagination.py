@@ -0,0 +1,61 @@
+# orders/pagination.py
+# ==============================================
+# 📄 Keyset pagination على (created_at, id)
+# ==============================================
+# بدل OFFSET (بيقرا كل الصفوف اللي قبل الصفحة) أو كل الفترة مرة واحدة:
+#   WHERE (created_at, id) < (آخر صف في الصفحة اللي فاتت)
+#   ORDER BY created_at DESC, id DESC  LIMIT size + 1
+# فكل صفحة بتكلف نفس الوقت تقريبًا مهما كانت الفترة واسعة (بالـ index على created_at, id).
+# الـ cursor = base64("<created_at ISO>|<id>") عشان يتبعت في الرابط.
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+#-----------------------------------------------------
+class InvalidCursor(ValueError):
+    pass
+#-----------------------------------------------------
+def page_size(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """?size= من الرابط في حدود [1, maximum]."""
+    try:
+        size = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+#-----------------------------------------------------
+def encode_cursor(obj, field="created_at"):
+    raw = f"{getattr(obj, field).isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+#-----------------------------------------------------
+def decode_cursor(cursor):
+    """(datetime, id) من الـ cursor — أو InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        stamp, pk = raw.rsplit("|", 1)
+        value = parse_datetime(stamp)
+        if value is None:
+            raise ValueError(stamp)
+        return value, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+#-----------------------------------------------------
+def keyset_page(queryset, cursor=None, size=DEFAULT_PAGE_SIZE, field="created_at"):
+    """
+    صفحة واحدة من الأحدث للأقدم:
+        rows, next_cursor = keyset_page(qs, request.GET.get("cursor"), 50)
+    next_cursor = None لو دي آخر صفحة.
+    """
+    queryset = queryset.order_by(f"-{field}", "-pk")
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f"{field}__lt": value}) | Q(**{field: value, "pk__lt": pk}))
+
+    rows = list(queryset[: size + 1])
+    if len(rows) > size:
+        rows = rows[:size]
+        return rows, encode_cursor(rows[-1], field)
+    return rows, None
@@ -0,0 +1,211 @@
+# orders/product_import.py
+# ==============================================
+# 📥 استيراد المنتجات من Excel (import_products)
+# ==============================================
+# قبل كده: load_workbook كامل + get_or_create للقسم والقسم الفرعي والمنتج + save() لكل صف
+# → ملف 5000 صف = +15 ألف query.
+# دلوقتي:
+#   - read_sheet(): pandas (openpyxl read-only تحت الغطا) والتنضيف على الأعمدة كلها مرة واحدة
+#   - ProductImport: الأقسام والمنتجات الموجودة بتتقري مرة واحدة بالاسم (على دفعات)،
+#     والفرق بين الملف والداتابيز بيتحسب من غير ما نكتب حاجة (dry run)
+#   - apply(): bulk_create للجديد، والمتغير بس بيتحدث بـ UPDATE لكل (حقل، قيمة)، في transaction واحدة
+from collections import defaultdict
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Category, Product, SecondCategory
+
+REQUIRED = ["name", "price", "category_name", "second_category_name"]
+UNITS = ["piece", "kg"]
+BATCH = 1000
+
+
+class InvalidSheet(ValueError):
+    """ملف مش بالشكل المطلوب (الرسالة جاهزة تتعرض للمستخدم)."""
+#-----------------------------------------------------
+def _text(series):
+    """عمود → نص متنضف ("" للخلايا الفاضية)."""
+    return series.fillna("").astype(str).str.strip()
+#-----------------------------------------------------
+def _price(raw):
+    try:
+        value = Decimal(raw) if raw else Decimal("0")
+    except (InvalidOperation, ValueError):
+        value = Decimal("0")
+    if not value.is_finite():
+        value = Decimal("0")
+    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_EVEN)   # نفس تقريب الـ DecimalField
+#-----------------------------------------------------
+def read_sheet(file):
+    """
+    أول شيت → DataFrame متنضف: name, price, category, second_category, unit, is_shwo, is_available.
+    الصفوف من غير اسم بتتشال، والاسم المتكرر آخر صف فيه هو اللي بيكسب (زي الاستيراد القديم).
+    """
+    df = pd.read_excel(file, engine="openpyxl", dtype=object)
+    df.columns = [str(c).strip() for c in df.columns]
+    if any(h not in df.columns for h in REQUIRED):
+        raise InvalidSheet(
+            "❌ ملف Excel غير صحيح، يجب أن يحتوي على الأعمدة التالية على الأقل:\n"
+            "name, price, category_name, second_category_name"
+        )
+    blank = pd.Series("", index=df.index)
+
+    out = pd.DataFrame({"name": _text(df["name"])})
+    prices = _text(df["price"])
+    out["price"] = prices.map({raw: _price(raw) for raw in prices.unique()})
+    out["category"] = _text(df["category_name"])
+    out["second_category"] = _text(df["second_category_name"]).where(out["category"] != "", "")
+
+    unit = _text(df["unit"]).str.lower() if "unit" in df.columns else blank
+    out["unit"] = unit.where(unit.isin(UNITS), "piece")
+
+    # Is Show = مخفي (عكس is_available)، والفاضي → None ويفضل معروض
+    flag = _text(df["Is Show"]).str.lower() if "Is Show" in df.columns else blank
+    hidden = flag.isin(["true", "yes", "1", "1.0"])
+    shown = flag.isin(["false", "no", "0", "0.0"])
+    out["is_shwo"] = np.select([hidden, shown], [True, False], default=None)
+    out["is_available"] = ~hidden
+
+    out = out[out["name"] != ""]
+    return out.drop_duplicates("name", keep="last").reset_index(drop=True)
+#-----------------------------------------------------
+def _first_by(queryset, field, values, key=None):
+    """{مفتاح: أقدم صف} — الأسماء مش unique فبناخد أقل id (زي get_or_create لما كان بيلاقي صف واحد)."""
+    key = key or (lambda obj: getattr(obj, field))
+    found = {}
+    values = list(values)
+    for i in range(0, len(values), BATCH):
+        for obj in queryset.filter(**{f"{field}__in": values[i:i + BATCH]}).order_by("-id"):
+            found[key(obj)] = obj
+    return found
+#-----------------------------------------------------
+def _name(obj):
+    return obj.name if obj else ""
+#-----------------------------------------------------
+class ProductImport:
+    """الفرق بين الشيت والداتابيز (dry run) + التنفيذ بالـ bulk."""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.categories = _first_by(Category.objects.all(), "name", set(frame["category"]) - {""})
+        self.second_categories = _first_by(
+            SecondCategory.objects.filter(main_category__in=list(self.categories.values())),
+            "name", set(frame["second_category"]) - {""},
+            key=lambda sc: (sc.name, sc.main_category_id),
+        )
+        self.products = _first_by(
+            Product.objects.select_related("category", "second_category"), "name", frame["name"]
+        )
+        self._diff()
+
+    def _diff(self):
+        self.new_categories = sorted(set(self.frame["category"]) - {""} - set(self.categories))
+        self.new_second_categories = set()
+        self.created, self.updated, self.unchanged = [], [], 0
+
+        for row in self.frame.itertuples(index=False):
+            category = self.categories.get(row.category)
+            second = None
+            if row.second_category:
+                second = self.second_categories.get((row.second_category, category.id)) if category else None
+                if second is None:
+                    self.new_second_categories.add((row.second_category, row.category))
+
+            product = self.products.get(row.name)
+            if product is None:
+                self.created.append(row)
+                continue
+
+            target = {
+                "price": row.price, "unit": row.unit,
+                "is_available": bool(row.is_available), "is_shwo": row.is_shwo,
+            }
+            changes = {f: (getattr(product, f), v) for f, v in target.items() if getattr(product, f) != v}
+            if row.category and category is None or product.category_id != (category.id if category else None):
+                changes["category"] = (_name(product.category), row.category)
+            if row.second_category and second is None or product.second_category_id != (second.id if second else None):
+                changes["second_category"] = (_name(product.second_category), row.second_category)
+            if changes:
+                self.updated.append((product, row, changes))
+            else:
+                self.unchanged += 1
+
+    # ---------- التقرير ----------
+    @property
+    def hidden_count(self):
+        return int((~self.frame["is_available"]).sum())
+
+    @property
+    def visible_count(self):
+        return int(self.frame["is_available"].sum())
+
+    def report(self, limit=200):
+        """ملخص الـ dry run للصفحة."""
+        return {
+            "rows": len(self.frame),
+            "created": len(self.created),
+            "updated": len(self.updated),
+            "unchanged": self.unchanged,
+            "new_categories": self.new_categories,
+            "new_second_categories": sorted(f"{name} ({main})" for name, main in self.new_second_categories),
+            "created_names": [row.name for row in self.created[:limit]],
+            "changes": [
+                {"name": product.name, "fields": [(f, old, new) for f, (old, new) in changes.items()]}
+                for product, _, changes in self.updated[:limit]
+            ],
+            "truncated": len(self.created) > limit or len(self.updated) > limit,
+        }
+
+    # ---------- التنفيذ ----------
+    def apply(self):
+        """bulk_create + UPDATE مجمعة على دفعات في transaction واحدة → عدد المنتجات (جديد + متحدث)."""
+        with transaction.atomic():
+            for cat in Category.objects.bulk_create(
+                [Category(name=name) for name in self.new_categories], batch_size=BATCH
+            ):
+                self.categories[cat.name] = cat
+
+            for sc in SecondCategory.objects.bulk_create(
+                [
+                    SecondCategory(name=name, main_category=self.categories[main])
+                    for name, main in sorted(self.new_second_categories)
+                ],
+                batch_size=BATCH,
+            ):
+                self.second_categories[(sc.name, sc.main_category_id)] = sc
+
+            Product.objects.bulk_create(
+                [Product(name=row.name, **self._values(row)) for row in self.created], batch_size=BATCH
+            )
+
+            # التعديل: UPDATE واحد لكل (حقل، قيمة جديدة) للصفوف اللي اتغيرت فعلًا
+            # (bulk_update بيبني CASE WHEN لكل صف × حقل → أبطأ بكتير مع آلاف الصفوف)
+            now_ = timezone.now()
+            groups = defaultdict(list)
+            for product, row, changes in self.updated:
+                values = self._values(row)
+                for field in changes:
+                    groups[field, values[field]].append(product.id)
+            for (field, value), ids in groups.items():
+                for i in range(0, len(ids), BATCH):
+                    Product.objects.filter(id__in=ids[i:i + BATCH]).update(**{field: value, "updated_at": now_})
+        return len(self.created) + len(self.updated)
+
+    def _values(self, row):
+        category = self.categories.get(row.category)
+        second = (
+            self.second_categories.get((row.second_category, category.id))
+            if row.second_category and category else None
+        )
+        return {
+            "price": row.price,
+            "category": category,
+            "second_category": second,
+            "unit": row.unit,
+            "is_available": bool(row.is_available),
+            "is_shwo": row.is_shwo,
+        }
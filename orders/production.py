@@ -0,0 +1,200 @@
+# orders/production.py
+# ==============================================
+# 🏭 مصفوفة طلبات الإنتاج (منتج × فرع) لصفحة الكنترول والإكسيل
+# ==============================================
+# قبل كده production_overview كان بيعمل query للفروع جوه لوب المنتجات، و count لكل فرع،
+# وبيحول Decimal لنص ويرجعه في كل خلية.
+# دلوقتي:
+#   - 3 queries بس: القوالب (+ المنتج والقسم)، الفروع، وطلبات اليوم (values_list)
+#   - الكميات في numpy array (منتج × فرع) بالـ "قرش" (× 100 كـ int64) → الجمع مظبوط زي Decimal
+#   - إجمالي الصفوف والأعمدة وفلتر الصفوف الصفرية بعمليات على الـ array كلها مرة واحدة
+#   - تأكيد الأقسام في سجل ProductionConfirmation (فرع، يوم، قسم) → "متأكد؟" ولوحة الفروع
+#     lookups على index بدل عد صفوف الطلبات
+#   - حفظ كميات الفرع (save_quantities): upsert واحد (bulk_create + ON CONFLICT) بدل
+#     get_or_create + save لكل منتج، والتأكيد UPDATE واحد.
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import broadcast
+from .models import Branch, ProductionConfirmation, ProductionRequest, ProductionTemplate
+
+_CENTS = 100
+#-----------------------------------------------------
+def _to_cents(value):
+    return int((Decimal(value) * _CENTS).to_integral_value())
+#-----------------------------------------------------
+def _round_half_even(cents):
+    """تقريب لأقرب وحدة صحيحة (نفس Decimal.to_integral_value) — على الـ array كلها."""
+    units, rest = np.divmod(cents, _CENTS)
+    up = (rest > _CENTS // 2) | ((rest == _CENTS // 2) & (units % 2 == 1))
+    return (units + up) * _CENTS
+#-----------------------------------------------------
+class ProductionMatrix:
+    """طلبات يوم واحد: products (صفوف) × branches (أعمدة) + الإجماليات."""
+
+    def __init__(self, the_date, products, branches, cents, all_branches=None):
+        self.date = the_date
+        self.products = products
+        self.branches = branches                            # الأعمدة (بعد فلتر الفرع)
+        self.all_branches = all_branches if all_branches is not None else branches
+        self.cents = cents                                  # int64 (منتجات × فروع)
+        self.row_totals = cents.sum(axis=1)
+        self.column_totals = cents.sum(axis=0)
+        self.grand_total = int(self.row_totals.sum())
+        self.nonzero = (cents != 0).any(axis=1)
+
+    @classmethod
+    def build(cls, the_date, branch_id=None, category_id=None):
+        templates = (
+            ProductionTemplate.objects.filter(is_active=True)
+            .select_related("product", "product__category")
+            .order_by("product__category__name", "product__name")
+        )
+        if category_id:
+            templates = templates.filter(product__category_id=category_id)
+        products = [t.product for t in templates]
+
+        all_branches = list(Branch.objects.order_by("name"))
+        branches = all_branches
+        if branch_id:
+            branches = [b for b in all_branches if str(b.id) == str(branch_id)]
+
+        row_of = {p.id: i for i, p in enumerate(products)}
+        col_of = {b.id: j for j, b in enumerate(branches)}
+        cents = np.zeros((len(products), len(branches)), dtype=np.int64)
+        if products and branches:
+            requests = ProductionRequest.objects.filter(
+                date=the_date, product_id__in=row_of, branch_id__in=col_of
+            ).values_list("product_id", "branch_id", "quantity")
+            for product_id, branch_id_, quantity in requests:
+                cents[row_of[product_id], col_of[branch_id_]] = _to_cents(quantity)
+
+            # الوحدات اللي مش بالكيلو → أعداد صحيحة (الصف كله مرة واحدة)
+            whole = np.array([p.unit != "kg" for p in products])
+            cents[whole] = _round_half_even(cents[whole])
+        return cls(the_date, products, branches, cents, all_branches)
+
+    def rows(self, hide_zero=True):
+        """صفوف الجدول: المنتج + الوحدة + كمية كل فرع + الإجمالي (Decimal للعرض زي الأول)."""
+        for i, product in enumerate(self.products):
+            if hide_zero and not self.nonzero[i]:
+                continue
+            if product.unit == "kg":
+                per_branch = [_decimal(c) for c in self.cents[i]]
+            else:
+                per_branch = [Decimal(int(c) // _CENTS) for c in self.cents[i]]
+            yield {
+                "product": product,
+                "unit": product.get_unit_display(),
+                "per_branch": per_branch,
+                "total": _decimal(self.row_totals[i]),
+            }
+
+    def totals(self):
+        """(إجمالي كل فرع, الإجمالي الكلي) كـ Decimal."""
+        return [_decimal(c) for c in self.column_totals], _decimal(self.grand_total)
+#-----------------------------------------------------
+def _decimal(cents):
+    return (Decimal(int(cents)) / _CENTS).quantize(Decimal("0.01"))
+#-----------------------------------------------------
+def branch_completion(the_date, branches):
+    """
+    لكل فرع: أكد كل الأقسام اللي فيها منتجات فعالة في قالب الإنتاج ولا لأ
+    (من سجل ProductionConfirmation — aggregate واحد GROUP BY branch).
+    """
+    required = set(
+        ProductionTemplate.objects.filter(is_active=True)
+        .values_list("product__category_id", flat=True).distinct()
+    )
+    required.discard(None)
+    confirmed = dict(
+        ProductionConfirmation.objects.filter(date=the_date, category_id__in=required)
+        .values("branch_id").annotate(n=Count("id")).values_list("branch_id", "n")
+    )
+    total_required = len(required)
+    return [
+        {
+            "branch": b,
+            "done": total_required > 0 and confirmed.get(b.id, 0) == total_required,
+            "confirmed": confirmed.get(b.id, 0),
+            "total": total_required,
+        }
+        for b in branches
+    ]
+#-----------------------------------------------------
+def confirmed_categories(branch, the_date, category_ids):
+    """الأقسام (من category_ids) اللي الفرع أكدها في اليوم ده — set."""
+    return set(
+        ProductionConfirmation.objects.filter(
+            branch=branch, date=the_date, category_id__in=list(category_ids)
+        ).values_list("category_id", flat=True)
+    )
+#-----------------------------------------------------
+def clean_quantity(product, raw):
+    """كمية الفرع: رقمين عشريين، السالب → 0، وغير الكيلو → عدد صحيح (نفس قواعد الفورم)."""
+    try:
+        q = Decimal(str(raw).strip() or "0").quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except (InvalidOperation, TypeError, ValueError):
+        q = Decimal("0.00")
+    if not q.is_finite() or q < 0:
+        q = Decimal("0.00")
+    if product.unit != "kg":
+        q = q.to_integral_value(rounding=ROUND_HALF_UP)
+    return q
+#-----------------------------------------------------
+def save_quantities(branch, user, the_date, quantities, confirm_products=None):
+    """
+    quantities = {product_id: Decimal} → upsert واحد على (branch, product, date).
+    confirm_products: منتجات القسم اللي هتتأكد (الناقص منها بيتعمله صف بـ 0 الأول).
+    بترجع عدد الصفوف اللي اتكتبت.
+    """
+    with transaction.atomic():
+        if quantities:
+            ProductionRequest.objects.bulk_create(
+                [
+                    ProductionRequest(branch=branch, product_id=pid, date=the_date, quantity=q, created_by=user)
+                    for pid, q in quantities.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["branch", "product", "date"],
+                update_fields=["quantity", "created_by"],
+            )
+
+        if confirm_products:
+            missing = [p for p in confirm_products if p.id not in quantities]
+            if missing:
+                ProductionRequest.objects.bulk_create(
+                    [
+                        ProductionRequest(branch=branch, product=p, date=the_date,
+                                          quantity=Decimal("0.00"), created_by=user)
+                        for p in missing
+                    ],
+                    ignore_conflicts=True,
+                )
+            now_ = timezone.now()
+            ProductionRequest.objects.filter(
+                branch=branch, date=the_date, product__in=confirm_products
+            ).update(confirmed=True, confirmed_at=now_)
+            # سجل التأكيد: صف لكل قسم
+            ProductionConfirmation.objects.bulk_create(
+                [
+                    ProductionConfirmation(branch=branch, date=the_date, category_id=category_id,
+                                           confirmed_by=user)
+                    for category_id in {p.category_id for p in confirm_products} - {None}
+                ],
+                ignore_conflicts=True,
+            )
+            # إشعار الكنترول
+            broadcast.publish(
+                "control_updates",
+                {
+                    "type": "control_update",
+                    "action": "production_confirmed",
+                    "message": f"✅ فرع {branch.name} أكد قسم {confirm_products[0].category.name} لليوم.",
+                }
+            )
+    return len(quantities)
@@ -0,0 +1,172 @@
+# orders/publisher.py
+# ==============================================
+# 📮 طابور البث: الـ request بيسلّم أحداثه ويرجع فورًا
+# ==============================================
+# قبل كده BroadcastMiddleware كان بيستنى كل group_send تخلص قبل ما الـ response يطلع
+# → لو الـ channel layer (Redis) بطيء، الـ HTTP كله بيبطأ معاه.
+# دلوقتي:
+#   - submit(): بيحط أحداث الـ request (اللي اتجمعت بعد الـ commit) في طابور محدود
+#     في البروسيس ويرجع على طول.
+#   - task في الخلفية (asyncio) بتفضي الطابور على دفعات وتبعت بـ group_send متوازية.
+#     تحت Daphne بتشتغل على الـ event loop بتاع السيرفر نفسه،
+#     ومن غير loop (WSGI/أوامر) على thread خلفي ليه loop خاص.
+#   - تحديث مخزون لنفس (فرع، منتج) لسه في الطابور → بيتبدل بالأحدث (merge).
+#   - الطابور مليان → أقدم حدث بيتشال (drop) وبيتعد في الإحصائيات.
+import asyncio
+import atexit
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+#-----------------------------------------------------
+class Publisher:
+    """طابور أحداث محدود بيتفضي في الخلفية (instance واحدة لكل بروسيس)."""
+
+    def __init__(self, send, maxsize=None, batch_size=None):
+        self._send = send                      # async (buffer) → عدد الرسايل اللي فشلت
+        self._maxsize = maxsize
+        self._batch_size = batch_size
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()          # (group, key) → event
+        self._stats = Counter()
+        self._last_batch_ms = 0.0
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def maxsize(self):
+        return self._maxsize or getattr(settings, "BROADCAST_QUEUE_SIZE", 10000)
+
+    @property
+    def batch_size(self):
+        return self._batch_size or getattr(settings, "BROADCAST_BATCH_SIZE", 500)
+
+    # ---------- الإدخال (من أي thread) ----------
+    def submit(self, buffer):
+        """أحداث request واحد {group: {key: event}} → الطابور (مش بيستنى الإرسال)."""
+        if self._pid != os.getpid():
+            self._reset()   # بعد fork: الـ loop والـ lock بتوع البروسيس الأب مش لينا
+        with self._lock:
+            for group, events in buffer.items():
+                for key, event in events.items():
+                    self._put((group, key), event)
+            self._stats["max_depth"] = max(self._stats["max_depth"], len(self._pending))
+        self._wake()
+
+    def _put(self, slot, event):
+        if slot in self._pending:
+            # حدث أحدث لنفس المفتاح (تحديث مخزون) → القديم ملوش لازمة
+            del self._pending[slot]
+            self._stats["merged"] += 1
+        elif len(self._pending) >= self.maxsize:
+            self._pending.popitem(last=False)
+            self._stats["dropped"] += 1
+        self._pending[slot] = event
+        self._stats["enqueued"] += 1
+
+    def _take(self):
+        """دفعة من أول الطابور بنفس شكل buffer بتاع broadcast."""
+        buffer = {}
+        with self._lock:
+            for _ in range(min(self.batch_size, len(self._pending))):
+                (group, key), event = self._pending.popitem(last=False)
+                buffer.setdefault(group, {})[key] = event
+        return buffer
+
+    # ---------- الـ worker ----------
+    def _wake(self):
+        with self._lock:
+            loop = self._ensure_worker()
+        try:
+            loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass   # الـ loop اتقفل دلوقتي → الأحداث فاضلة في الطابور للـ loop الجاي
+
+    def _ensure_worker(self):
+        if self._loop is not None and self._loop.is_running() and not self._task.done():
+            return self._loop
+        try:
+            # جوه Daphne → نفس الـ loop بتاع السيرفر
+            loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._drain())
+        except RuntimeError:
+            loop = self._start_thread()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.run_coroutine_threadsafe(self._drain(), loop)
+        self._loop = loop
+        return loop
+
+    def _start_thread(self):
+        loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=loop.run_forever, name="broadcast-publisher", daemon=True)
+        self._thread.start()
+        return loop
+
+    async def _drain(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while True:
+                buffer = self._take()
+                if not buffer:
+                    break
+                started = time.perf_counter()
+                sent = sum(len(events) for events in buffer.values())
+                try:
+                    failed = await self._send(buffer)
+                except Exception as e:
+                    print("⚠️ Broadcast error:", e)
+                    failed = sent
+                with self._lock:
+                    self._stats["sent"] += sent
+                    self._stats["errors"] += failed
+                    self._stats["batches"] += 1
+                    self._last_batch_ms = (time.perf_counter() - started) * 1000
+            if self._stopping:
+                return
+
+    def close(self, timeout=2.0):
+        """قبل ما البروسيس يقفل: فضّي الطابور (للـ thread الخلفي بس)."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._wake()
+        try:
+            self._task.result(timeout=timeout)
+        except Exception:
+            pass
+
+    # ---------- الإحصائيات ----------
+    def metrics(self):
+        """حالة الطابور: العمق الحالي + عدادات (enqueued/merged/dropped/sent/errors)."""
+        with self._lock:
+            data = dict(self._stats)
+            data.update(
+                depth=len(self._pending),
+                maxsize=self.maxsize,
+                last_batch_ms=round(self._last_batch_ms, 2),
+                mode="thread" if self._thread else ("loop" if self._loop else "idle"),
+            )
+        for name in ("enqueued", "merged", "dropped", "sent", "errors", "batches", "max_depth"):
+            data.setdefault(name, 0)
+        return data
+#-----------------------------------------------------
+_publisher = None
+#-----------------------------------------------------
+def get_publisher():
+    global _publisher
+    if _publisher is None:
+        from .broadcast import asend
+        _publisher = Publisher(asend)
+        atexit.register(_publisher.close)
+    return _publisher
@@ -0,0 +1,112 @@
+# orders/reporting.py
+# ==============================================
+# 📊 محرك التقارير: استعلام واحد + كاش لكل (فترة، فرع)
+# ==============================================
+# بدل 4 count() + استعلامين group by على كل الحجوزات:
+#   استعلام واحد على الملخص اليومي (ReservationDailyStat) بـ GROUP BY (المنتج، الفرع)
+#   و SUM(count) FILTER (WHERE status=...) لكل حالة، ومن نفس الصفوف بنطلع
+#   الإجماليات + أكتر المنتجات + أكتر الفروع في بايثون.
+# الكاش بيتلغي تلقائيًا (version) مع أي حجز جديد أو تغيير حالة.
+import time
+
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Reservation, ReservationDailyStat
+
+REPORT_CACHE_TTL = 300   # ثواني — حماية إضافية لو فيه تعديل من غير signals (queryset.update)
+TOP_N = 10               # أكبر عدد بيتعرض (التقرير 5 والإكسيل 10)
+_VERSION_KEY = "reports:version"
+STATUSES = ("confirmed", "pending", "cancelled")
+#-----------------------------------------------------
+def _version():
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # توقيت بدل 1 عشان لو المفتاح اتمسح منرجعش لمفاتيح قديمة
+        cache.add(_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(_VERSION_KEY)
+    return version
+#-----------------------------------------------------
+def invalidate():
+    """إلغاء كل تقارير الكاش (بزيادة الـ version)."""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        cache.set(_VERSION_KEY, time.time_ns(), None)
+#-----------------------------------------------------
+def _ranking(totals, field):
+    ranked = sorted(totals.items(), key=lambda kv: (-kv[1], kv[0] or ""))
+    return [{field: name, "total": total} for name, total in ranked[:TOP_N]]
+#-----------------------------------------------------
+def _compute(start_date, end_date, branch_id):
+    stats_qs = _rollup(start_date, end_date, branch_id)
+    rows = (
+        stats_qs
+        .values("product__name", "branch__name")
+        .annotate(
+            total=Sum("count"),
+            **{status: Sum("count", filter=Q(status=status)) for status in STATUSES},
+        )
+    )
+
+    stats = {"total": 0, **{status: 0 for status in STATUSES}}
+    by_product, by_branch = {}, {}
+    for row in rows:
+        for field in stats:
+            stats[field] += row[field] or 0
+        by_product[row["product__name"]] = by_product.get(row["product__name"], 0) + row["total"]
+        by_branch[row["branch__name"]] = by_branch.get(row["branch__name"], 0) + row["total"]
+
+    return {
+        "stats": stats,
+        "top_products": _ranking({k: v for k, v in by_product.items() if v}, "product__name"),
+        "top_branches": _ranking({k: v for k, v in by_branch.items() if v}, "branch__name"),
+    }
+#-----------------------------------------------------
+def _rollup(start_date=None, end_date=None, branch_id=None):
+    """خانات ReservationDailyStat للفترة/الفرع (من غير ما نلف على الحجوزات نفسها)."""
+    stats_qs = ReservationDailyStat.objects.order_by()
+    if start_date and end_date:
+        stats_qs = stats_qs.filter(date__range=[start_date, end_date])
+    if branch_id:
+        stats_qs = stats_qs.filter(branch_id=branch_id)
+    return stats_qs
+#-----------------------------------------------------
+def status_summary(start_date=None, end_date=None, branch_id=None):
+    """عدد وكمية الحجوزات لكل حالة (ملخص قايمة الحجوزات) — استعلام واحد على الملخص."""
+    summary = {status: {"count": 0, "quantity": 0} for status in STATUSES}
+    rows = (
+        _rollup(start_date, end_date, branch_id)
+        .values("status")
+        .annotate(n=Sum("count"), qty=Sum("quantity"))
+    )
+    for row in rows:
+        summary[row["status"]] = {"count": row["n"] or 0, "quantity": row["qty"] or 0}
+    summary["total"] = sum(v["count"] for v in summary.values())
+    return summary
+#-----------------------------------------------------
+def reservation_report(start_date=None, end_date=None, branch_id=None):
+    """
+    إحصائيات الحجوزات لفترة (وفرع اختياري):
+        {"stats": {...}, "top_products": [...], "top_branches": [...]}
+    من الكاش لو موجودة، وإلا استعلام واحد.
+    """
+    key = f"reports:{_version()}:{start_date or '-'}:{end_date or '-'}:{branch_id or 'all'}"
+    report = cache.get(key)
+    if report is None:
+        report = _compute(start_date, end_date, branch_id)
+        cache.set(key, report, REPORT_CACHE_TTL)
+    return report
+#-----------------------------------------------------
+@receiver(post_save, sender=Reservation)
+def _reservation_saved(sender, instance, created, update_fields=None, **kwargs):
+    # حجز جديد أو تغيير حالة → التقارير اتغيرت
+    if created or update_fields is None or "status" in update_fields:
+        invalidate()
+
+
+@receiver(post_delete, sender=Reservation)
+def _reservation_deleted(sender, instance, **kwargs):
+    invalidate()
@@ -0,0 +1,127 @@
+# orders/roles.py
+# ==============================================
+# 🔐 صلاحيات المستخدم مرة واحدة لكل request (ومتكيشة لكل مستخدم)
+# ==============================================
+# بدل ما كل decorator/helper يعمل query على userprofile و auth_group:
+#   - RoleContextMiddleware بيحمل (الدور، الفرع، أدمن ولا لأ) مرة واحدة → request.role_ctx
+#   - البيانات متكيشة لكل مستخدم لفترة قصيرة، وبتتلغي مع أي حفظ لـ UserProfile/User/Branch
+#     (أو مسح فرع) أو تغيير في الجروبات.
+#   - الكاش فيه قيم بسيطة بس (الدور، الفرع، الجروب) مش موديلات → request.user.userprofile
+#     بيتقرا من الداتابيز زي الأول، فأي save() عليه مبيكتبش بيانات قديمة من الكاش.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Branch, UserProfile
+
+ROLE_CACHE_TTL = 60  # ثواني
+#-----------------------------------------------------
+class RoleContext:
+    """صلاحيات المستخدم الحالي (بتتحسب مرة واحدة لكل request)."""
+
+    __slots__ = ("user_id", "role", "branch_id", "is_superuser", "is_staff", "in_admin_group")
+
+    def __init__(self, user_id=None, role=None, branch_id=None,
+                 is_superuser=False, is_staff=False, in_admin_group=False):
+        self.user_id = user_id
+        self.role = role
+        self.branch_id = branch_id
+        self.is_superuser = is_superuser
+        self.is_staff = is_staff
+        self.in_admin_group = in_admin_group
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_admin(self):
+        """نفس تعريف views.is_admin: superuser أو جروب admin أو role=admin."""
+        return self.is_superuser or self.in_admin_group or self.role == "admin"
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def __repr__(self):
+        return f"<RoleContext user={self.user_id} role={self.role} branch={self.branch_id}>"
+
+
+ANONYMOUS = RoleContext()
+#-----------------------------------------------------
+def _cache_key(user_id):
+    return f"role_ctx:{user_id}"
+#-----------------------------------------------------
+def _load(user):
+    """{"role", "branch_id", "admin_group"} من الكاش أو من الداتابيز (استعلامين بالكتير)."""
+    key = _cache_key(user.pk)
+    data = cache.get(key)
+    if data is None:
+        profile = UserProfile.objects.filter(user_id=user.pk).values("role", "branch_id").first() or {}
+        data = {
+            "role": profile.get("role"),
+            "branch_id": profile.get("branch_id"),
+            "admin_group": user.groups.filter(name="admin").exists(),
+        }
+        cache.set(key, data, ROLE_CACHE_TTL)
+    return data
+#-----------------------------------------------------
+def get_role_ctx(user):
+    """RoleContext للمستخدم (متخزن على الـ user نفسه طول الـ request)."""
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    ctx = getattr(user, "_role_ctx", None)
+    if ctx is None:
+        data = _load(user)
+        ctx = RoleContext(
+            user_id=user.pk,
+            role=data["role"],
+            branch_id=data["branch_id"],
+            is_superuser=user.is_superuser,
+            is_staff=user.is_staff,
+            in_admin_group=data["admin_group"],
+        )
+        user._role_ctx = ctx
+    return ctx
+#-----------------------------------------------------
+def invalidate(user_ids):
+    cache.delete_many([_cache_key(uid) for uid in user_ids])
+#-----------------------------------------------------
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def _profile_changed(sender, instance, **kwargs):
+    invalidate([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Branch)
+def _branch_changed(sender, instance, **kwargs):
+    invalidate(UserProfile.objects.filter(branch=instance).values_list("user_id", flat=True))
+
+
+@receiver(pre_delete, sender=Branch)
+def _branch_deleting(sender, instance, **kwargs):
+    # بعد المسح الـ profiles بتبقى branch=None (SET_NULL) → نعرف أصحابها قبلها
+    instance._role_user_ids = list(UserProfile.objects.filter(branch=instance).values_list("user_id", flat=True))
+
+
+@receiver(post_delete, sender=Branch)
+def _branch_deleted(sender, instance, **kwargs):
+    invalidate(getattr(instance, "_role_user_ids", []))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.groups.add/remove/clear(...) → instance = User
+        if action.startswith("post_"):
+            invalidate([instance.pk])
+    elif action == "pre_clear":
+        # group.user_set.clear() → لازم نعرف المستخدمين قبل المسح
+        invalidate(list(instance.user_set.values_list("pk", flat=True)))
+    elif action in ("post_add", "post_remove"):
+        invalidate(pk_set or [])
@@ -0,0 +1,59 @@
+# orders/rollup.py
+# ==============================================
+# 📊 إعادة بناء/مراجعة ReservationDailyStat من صفوف Reservation
+# ==============================================
+# بتاخد الموديلات كـ parameters عشان تشتغل من الـ migration (apps.get_model)
+# ومن أمر reservation_rollup بنفس الكود.
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def compute(Reservation):
+    """{(يوم، فرع، منتج، حالة): (عدد، كمية)} محسوبة من الحجوزات نفسها."""
+    rows = (
+        Reservation.objects
+        .order_by()
+        .annotate(day=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .values("day", "branch_id", "product_id", "status")
+        .annotate(n=Count("id"), qty=Sum("quantity"))
+    )
+    return {
+        (r["day"], r["branch_id"], r["product_id"], r["status"]): (r["n"], r["qty"] or Decimal("0.00"))
+        for r in rows
+    }
+#-----------------------------------------------------
+def rebuild(Reservation, ReservationDailyStat, batch_size=1000):
+    """مسح الملخص وبناؤه من الأول. بترجع عدد الخانات."""
+    expected = compute(Reservation)
+    with transaction.atomic():
+        ReservationDailyStat.objects.all().delete()
+        ReservationDailyStat.objects.bulk_create(
+            [
+                ReservationDailyStat(
+                    date=day, branch_id=branch_id, product_id=product_id,
+                    status=status, count=n, quantity=qty,
+                )
+                for (day, branch_id, product_id, status), (n, qty) in expected.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(expected)
+#-----------------------------------------------------
+def diff(Reservation, ReservationDailyStat):
+    """الخانات اللي الملخص فيها مختلف عن الحجوزات: [(key, expected, actual)]."""
+    expected = compute(Reservation)
+    actual = {
+        (s.date, s.branch_id, s.product_id, s.status): (s.count, s.quantity)
+        for s in ReservationDailyStat.objects.all()
+        if s.count or s.quantity  # خانة صفر = مفيش حجوزات
+    }
+    zero = (0, Decimal("0.00"))
+    return [
+        (key, expected.get(key, zero), actual.get(key, zero))
+        for key in sorted(set(expected) | set(actual), key=str)
+        if expected.get(key, zero) != actual.get(key, zero)
+    ]
@@ -11,5 +11,7 @@ websocket_urlpatterns = [
 
     re_path(r"^ws/reservations/$", consumers.ReservationsConsumer.as_asgi()),  # ✅ جديد
 
+    re_path(r"^ws/jobs/$", consumers.JobsConsumer.as_asgi()),  # ⚙️ تقدم مهام الخلفية
+
 
 ]
@@ -0,0 +1,35 @@
+# orders/search.py
+# ==============================================
+# 🔎 البحث عن العملاء (اسم أو تليفون) بالـ index
+# ==============================================
+# بدل name__icontains | phone__icontains (scan كامل على جدول العملاء):
+#   - التليفون: Customer.phone_digits (أرقام بس) + بحث بالبداية كـ range
+#       phone_digits >= "0100" AND phone_digits < "0101"  → btree index عادي على أي داتابيز
+#   - الاسم: name__icontains، وعلى Postgres فيه GIN trigram index على UPPER(name)
+#     (migration 0043) فالـ LIKE '%...%' بيستخدمه. على SQLite نفس الاستعلام بيشتغل من غير index.
+from django.db.models import Q
+
+from .utils import normalize_phone
+
+MIN_PHONE_PREFIX = 3   # أقل من كده → بحث بالاسم بس
+#-----------------------------------------------------
+def _prefix_range(field, prefix):
+    """field يبدأ بـ prefix كـ range (بيستخدم الـ index من غير LIKE)."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": upper})
+#-----------------------------------------------------
+def customer_q(query, prefix=""):
+    """
+    Q للبحث عن عميل بالاسم أو ببداية التليفون:
+        Customer.objects.filter(customer_q(q))
+        Reservation.objects.filter(customer_q(q, prefix="customer__"))
+    """
+    query = (query or "").strip()
+    if not query:
+        return Q()
+
+    digits = normalize_phone(query)
+    # كلام فيه أرقام بس (ومسافات/شرط/+) → تليفون
+    if len(digits) >= MIN_PHONE_PREFIX and not any(ch.isalpha() for ch in query):
+        return _prefix_range(f"{prefix}phone_digits", digits)
+    return Q(**{f"{prefix}name__icontains": query})
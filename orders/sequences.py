@@ -0,0 +1,64 @@
+# orders/sequences.py
+# ==============================================
+# 🔢 أرقام الطلبيات (DailyRequest.order_number) من غير race
+# ==============================================
+# قبل كده: get_or_create + current_number += 1 + save() في بايثون →
+#   فرعين في نفس اللحظة ممكن ياخدوا نفس الرقم (lost update)، والصف نفسه hot row.
+# دلوقتي:
+#   - UPDATE ... SET current_number = current_number + N RETURNING current_number
+#     جملة واحدة ذرية (الداتابيز هي اللي بتحجز، مفيش قراءة/كتابة في بايثون).
+#   - كل worker بيحجز block من N رقم مرة واحدة ويوزعها من الذاكرة،
+#     فالصف مبيتلمسش غير مرة كل N طلبية.
+# ⚠️ الأرقام فريدة، بس مش متتالية بين الـ workers (وفيه فجوات بعد أي restart).
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .models import OrderCounter
+
+COUNTER_ID = 1
+
+_lock = threading.Lock()
+_block = {"next": 1, "end": 0}   # الأرقام المحجوزة للبروسيس ده [next .. end]
+#-----------------------------------------------------
+def _reset_block():
+    # بعد fork (gunicorn --preload) كل worker لازم يحجز block خاص بيه
+    _block["next"], _block["end"] = 1, 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_block)
+#-----------------------------------------------------
+def reserve(size):
+    """يحجز size رقم من OrderCounter ويرجع آخر رقم فيهم."""
+    table = connection.ops.quote_name(OrderCounter._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET current_number = current_number + %s "
+            f"WHERE id = %s RETURNING current_number",
+            [size, COUNTER_ID],
+        )
+        row = cursor.fetchone()
+    if row is not None:
+        return row[0]
+
+    # أول مرة: الصف مش موجود
+    try:
+        with transaction.atomic():
+            OrderCounter.objects.create(id=COUNTER_ID, current_number=0)
+    except IntegrityError:
+        pass  # worker تاني عمله في نفس اللحظة
+    return reserve(size)
+#-----------------------------------------------------
+def next_order_number(block_size=None):
+    """رقم طلبية جديد (نص) من الـ block المحجوز، ولو خلص نحجز block جديد."""
+    size = block_size or settings.ORDER_NUMBER_BLOCK_SIZE
+    with _lock:
+        if _block["next"] > _block["end"]:
+            end = reserve(size)
+            _block["next"], _block["end"] = end - size + 1, end
+        number = _block["next"]
+        _block["next"] += 1
+    return str(number)
@@ -0,0 +1,148 @@
+# orders/stock.py
+# ==============================================
+# 📦 محرك المخزون: خصم/إرجاع ذري بدون select_for_update
+# ==============================================
+# الخصم/الإرجاع = UPDATE واحد بيرجع الكمية الجديدة (RETURNING) على Postgres و SQLite ≥ 3.35
+# → round-trip واحد للداتابيز بدل UPDATE وبعده SELECT. غير كده (MySQL) UPDATE + SELECT زي الأول.
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.sql import UpdateQuery
+
+from .models import Inventory, InventoryTransaction, Product
+
+
+class InsufficientStock(Exception):
+    """الكمية المطلوبة أكبر من المتاح في المخزون."""
+
+    def __init__(self, available):
+        self.available = available
+        super().__init__(f"available={available}")
+#-----------------------------------------------------
+def current_quantity(branch_id, product_id):
+    """ترجع كمية المخزون الحالية (أو ترفع Inventory.DoesNotExist)."""
+    qty = (
+        Inventory.objects
+        .filter(branch_id=branch_id, product_id=product_id)
+        .values_list("quantity", flat=True)
+        .first()
+    )
+    if qty is None:
+        raise Inventory.DoesNotExist
+    return qty
+#-----------------------------------------------------
+_RETURNING_VENDORS = ("postgresql", "sqlite")
+_QUANTITY = Inventory._meta.get_field("quantity")
+
+
+def _update_quantity(branch_id, product_id, value, **conditions):
+    """
+    UPDATE quantity = value لسجل (فرع، منتج) لو الشروط متحققة → الكمية الجديدة، أو None لو متحدثش.
+    نفس الـ SQL بتاع queryset.update() + RETURNING (من غير SELECT بعده).
+    """
+    queryset = Inventory.objects.filter(branch_id=branch_id, product_id=product_id, **conditions)
+    connection = connections[queryset.db]
+    if connection.vendor not in _RETURNING_VENDORS:
+        if not queryset.update(quantity=value):
+            return None
+        return current_quantity(branch_id, product_id)
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values({"quantity": value})
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {connection.ops.quote_name(_QUANTITY.column)}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    # SQLite بيرجع float/int → Decimal بنفس الخانات العشرية بتاعة العمود
+    return _QUANTITY.to_python(row[0]).quantize(Decimal(1).scaleb(-_QUANTITY.decimal_places))
+#-----------------------------------------------------
+def reserve_stock(branch_id, product_id, qty):
+    """
+    خصم ذري بجملة UPDATE واحدة:
+        UPDATE ... SET quantity = quantity - qty WHERE quantity >= qty RETURNING quantity
+    لو مفيش صف اتحدث يبقى المخزون مش كفاية (InsufficientStock)
+    أو مفيش سجل مخزون أصلاً (Inventory.DoesNotExist).
+    ترجع الكمية الجديدة بعد الخصم.
+    """
+    qty = Decimal(qty)
+    new_qty = _update_quantity(branch_id, product_id, F("quantity") - qty, quantity__gte=qty)
+    if new_qty is None:
+        # 🛑 oversell: نقرأ المتاح بس عشان رسالة الخطأ
+        raise InsufficientStock(current_quantity(branch_id, product_id))
+    return new_qty
+#-----------------------------------------------------
+def check_stock(branch_id, product_id, qty):
+    """تحقق من توفر الكمية بدون خصم (للمنتجات بالكيلو)."""
+    available = current_quantity(branch_id, product_id)
+    if available < Decimal(qty):
+        raise InsufficientStock(available)
+    return available
+#-----------------------------------------------------
+def release_stock(branch_id, product_id, qty):
+    """إرجاع كمية للمخزون (إلغاء حجز) — يحدث عمود quantity فقط."""
+    new_qty = _update_quantity(branch_id, product_id, F("quantity") + Decimal(qty))
+    if new_qty is None:
+        raise Inventory.DoesNotExist
+    return new_qty
+#-----------------------------------------------------
+def deduct_stock_floor(branch_id, product_id, qty):
+    """خصم بدون ما الكمية تنزل تحت الصفر (إعادة تأكيد حجز ملغي)."""
+    new_qty = _update_quantity(branch_id, product_id, Greatest(F("quantity") - Decimal(qty), Decimal("0.00")))
+    if new_qty is None:
+        raise Inventory.DoesNotExist
+    return new_qty
+#-----------------------------------------------------
+def apply_inventory_worklist(branch, worklist, user=None):
+    """
+    تطبيق القائمة المؤقتة {product_id: qty_str} على مخزون الفرع دفعة واحدة:
+    استعلام واحد للمنتجات + واحد للمخزون الحالي، ثم bulk_update/bulk_create
+    للمخزون وbulk_create لحركات InventoryTransaction داخل transaction واحدة.
+    ترجع قائمة (product, new_qty) للمنتجات اللي اتحدثت.
+    """
+    wanted = {}
+    for pid, qty_str in (worklist or {}).items():
+        try:
+            wanted[int(pid)] = Decimal(str(qty_str)).quantize(Decimal("0.01"))
+        except Exception:
+            continue
+    if not wanted:
+        return []
+
+    products = Product.objects.filter(id__in=wanted.keys()).select_related("category")
+    products = {p.id: p for p in products}
+
+    with transaction.atomic():
+        existing = {
+            inv.product_id: inv
+            for inv in Inventory.objects.filter(branch=branch, product_id__in=products.keys())
+        }
+        to_update, to_create, txns, applied = [], [], [], []
+        for pid, product in products.items():
+            qty = wanted[pid]
+            inv = existing.get(pid)
+            if inv is None:
+                to_create.append(Inventory(branch=branch, product=product, quantity=qty))
+            else:
+                inv.quantity = qty
+                to_update.append(inv)
+            txns.append(InventoryTransaction(
+                product=product,
+                from_branch=None,
+                to_branch=branch,
+                quantity=qty,
+                transaction_type="transfer_in",
+                added_by=user,
+            ))
+            applied.append((product, qty))
+
+        if to_update:
+            Inventory.objects.bulk_update(to_update, ["quantity"], batch_size=500)
+        if to_create:
+            Inventory.objects.bulk_create(to_create, batch_size=500)
+        InventoryTransaction.objects.bulk_create(txns, batch_size=500)
+
+    return applied
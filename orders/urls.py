@@ -4,10 +4,12 @@ from . import views
 urlpatterns = [
     path("", views.landing, name="landing"),       # الصفحة الرئيسية الجديدة
     path("reservations/", views.reservations_list, name="reservations_list"),
+    path("reservations/page/", views.reservations_page, name="reservations_page"),
     path("reservations/<int:res_id>/<str:status>/", views.update_reservation_status, name="update_reservation_status"),
     path("reports/", views.reports, name="reports"),
     path("reports/export/excel/", views.export_reports_excel, name="export_reports_excel"),
     path("callcenter/", views.callcenter, name="callcenter"),
+    path("callcenter/book/", views.callcenter_book, name="callcenter_book"),
     path("branch/", views.branch_dashboard, name="branch_dashboard"),
     path("login/", views.landing, name="login"),
     path("logout/", views.logout_view, name="logout"),
@@ -32,10 +34,13 @@ urlpatterns = [
     path("daily-request/", views.add_daily_request, name="add_daily_request"),
     path("control-requests/", views.control_requests, name="control_requests"),
     path("control-requests/data", views.control_requests_data, name="control_requests_data"),  # ✅ ده الجديد
+    path("control-requests/changes", views.control_requests_changes, name="control_requests_changes"),  # ✅ delta بالـ cursor
     path("branch/requests/", views.branch_requests, name="branch_requests"),
     path("mark-printed/<str:order_number>/", views.mark_printed, name="mark_printed"),
     path("import-products/", views.import_products, name="import_products"),
     path("get-subcategories/", views.get_subcategories, name="get_subcategories"),
+    path("catalog/", views.catalog_json, name="catalog_json"),
+    path("broadcast/metrics/", views.broadcast_metrics, name="broadcast_metrics"),
     path('toggle-product/<int:pk>/', views.toggle_product_availability, name='toggle_product_availability'),
     path("set-standard-request/", views.set_standard_request, name="set_standard_request"),
     # path("inventory/select-stamp/", views.select_stamp_page, name="select_stamp_page"),
@@ -43,8 +48,12 @@ urlpatterns = [
     path("inventory/set-stamp/", views.set_inventory_stamp, name="set_inventory_stamp"),
     path("production/set-items/", views.set_production_items, name="set_production_items"),
     path("production/request/", views.add_production_request, name="add_production_request"),
+    path("production/request/cells/", views.save_production_cells, name="save_production_cells"),
     path("production/overview/", views.production_overview, name="production_overview"),
     path("production/overview/export/", views.export_production_excel, name="export_production_excel"),
     path("inventory/update-quantity/", views.update_inventory_quantity, name="update_inventory_quantity"),
+    path("jobs/<int:job_id>/", views.job_detail, name="job_detail"),
+    path("jobs/<int:job_id>/status/", views.job_status, name="job_status"),
+    path("jobs/<int:job_id>/download/", views.job_download, name="job_download"),
 
 ]
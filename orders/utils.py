@@ -0,0 +1,61 @@
+# orders/utils.py
+# ==============================================
+# 🗓️ فلترة بالتاريخ بشكل يستخدم الـ index
+# ==============================================
+# created_at__date__range بيعمل CAST على العمود (created_at::date) فالـ index
+# على created_at مبيتستخدمش. بدلها: فترة نص-مفتوحة بتوقيت القاهرة
+#   created_at >= بداية يوم البداية  AND  created_at < بداية اليوم اللي بعد النهاية
+from datetime import date, datetime, time, timedelta
+
+from django.core.exceptions import BadRequest
+from django.utils import timezone
+
+
+class InvalidDate(BadRequest, ValueError):
+    """تاريخ مش مفهوم في الفلتر → 400 (بدل ما الحد يتشال والـ query تبقى على كل الجدول)."""
+
+
+def as_date(value):
+    """date أو نص ISO → date، والفاضي/None → None، وغير كده InvalidDate (400)."""
+    if value is None or isinstance(value, date):
+        return value
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidDate(f"تاريخ غير صحيح: {value!r}") from None
+#-----------------------------------------------------
+def day_start(day):
+    """بداية اليوم (00:00) بالتوقيت المحلي كـ datetime aware."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+#-----------------------------------------------------
+def day_range(field, start=None, end=None):
+    """
+    kwargs لـ filter() على حقل datetime من يوم البداية لحد يوم النهاية (شاملين):
+        qs.filter(**day_range("created_at", start_date, end_date))
+    start/end ممكن يكونوا date أو نص ISO أو None/"" (من غير حد) — غير كده InvalidDate (400).
+    """
+    start, end = as_date(start), as_date(end)
+    lookups = {}
+    if start:
+        lookups[f"{field}__gte"] = day_start(start)
+    if end:
+        lookups[f"{field}__lt"] = day_start(end + timedelta(days=1))
+    return lookups
+#-----------------------------------------------------
+# 📞 توحيد أرقام التليفون: أرقام بس (عربي/فارسي → إنجليزي)، ومن غير كود الدولة
+#   "+20 100-123 4567" / "٠١٠٠١٢٣٤٥٦٧" → "01001234567"
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+
+
+def normalize_phone(value):
+    raw = str(value or "").translate(_DIGITS).strip()
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    international = raw.startswith("+") or digits.startswith("00")
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith("20") and (international or len(digits) == 12):
+        digits = "0" + digits[2:]
+    return digits
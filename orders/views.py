@@ -1,18 +1,16 @@
 # ==============================================
 # 📌 Python Standard Library
 # ==============================================
+import json
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
 from urllib.parse import urlencode
 # ==============================================
 # 📌 Third-party Libraries
 # ==============================================
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from asgiref.sync import sync_to_async
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 # ==============================================
 # 📌 Django Imports
 # ==============================================
@@ -24,34 +22,54 @@ from django.contrib.auth import (
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.models import User
+from django.core.exceptions import BadRequest
 from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Q, Count
+from django.db.models import Q
 from django.http import (
-    HttpResponse, JsonResponse, HttpResponseForbidden
+    FileResponse, Http404, HttpResponse, JsonResponse, HttpResponseForbidden
 )
 from django.shortcuts import (
     render, redirect, get_object_or_404
 )
 from django.template.loader import render_to_string
 from django.urls import reverse
-from django.utils import timezone
+from django.utils import formats, timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now, localdate
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 # ==============================================
 # 📌 Local Application Imports
 # ==============================================
+from . import broadcast, jobs
+from .publisher import get_publisher
 from .decorators import role_required
+from .reporting import reservation_report, status_summary
+from .roles import get_role_ctx
+from .sequences import next_order_number
+from .pagination import InvalidCursor, keyset_page, page_size
+from .search import customer_q
+from .customers import InvalidPhone, resolve_customer
+from .booking import InvalidQuantity, book, name_conflict, parse_quantity, success_message
+from .production import (
+    ProductionMatrix, branch_completion, clean_quantity, confirmed_categories, save_quantities,
+)
+from .catalog import etag as catalog_etag, snapshot as catalog_snapshot
 from .forms import (
     CategoryForm, ProductForm, BranchForm,
     UserCreateForm, ArabicPasswordChangeForm
 )
 from .models import (
-    Category, Product, Branch, SecondCategory,
+    Category, Product, Branch,
     Inventory, Reservation, Customer,
     InventoryTransaction, DailyRequest,
-    OrderCounter, StandardRequest,
-    ProductionTemplate, ProductionRequest
+    StandardRequest,
+    ProductionTemplate, ProductionRequest, Job
+)
+from .utils import as_date, day_range
+from .stock import (
+    InsufficientStock, reserve_stock,
+    release_stock, deduct_stock_floor, apply_inventory_worklist
 )
 def to_decimal_safe(value, places=2):
     """حوّل أي قيمة إلى Decimal مقنّن بعدد أماكن عشرية (افتراضي 2)."""
@@ -67,50 +85,34 @@ def unit_allows_fraction(unit: str) -> bool:
     return (unit or "").lower() == "kg"
 #-----------------------التحقق من المستخدم ادمن اول لا-------
 def is_admin(user):
-    return (
-        user.is_superuser
-        or user.groups.filter(name="admin").exists()
-        or (hasattr(user, "userprofile") and user.userprofile.role == "admin")
-    )
+    return get_role_ctx(user).is_admin
 def is_control(user):
-    return user.is_authenticated and user.userprofile.role == "control"
+    return get_role_ctx(user).role == "control"
 #-----تصدير الحجوزات الى اكسيل-----------------------------
+@login_required
+@role_required(["branch", "admin"])
 def export_reservations_excel(request, branch_id):
-    reservations = Reservation.objects.filter(branch_id=branch_id).select_related("product", "branch", "customer").order_by("-created_at")
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Reservations"
-
-    # Header
-    ws.append(["ID", "Customer", "Phone", "Product", "Branch", "Delivery Type", "Status", "Created At"])
-
-    # Data
-    for r in reservations:
-        ws.append([
-            r.id,
-            r.customer.name if r.customer else "",
-            r.customer.phone if r.customer else "",
-            r.product.name if r.product else "",
-            r.branch.name if r.branch else "",
-            r.get_delivery_type_display(),
-            r.get_status_display(),
-            r.created_at.strftime("%Y-%m-%d %H:%M"),
-        ])
+    profile = getattr(request.user, "userprofile", None)
 
-    # Response
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = f'attachment; filename="reservations_branch_{branch_id}.xlsx"'
-    wb.save(response)
-    return response
+    # 🎯 الأدمن: أي فرع — موظف الفرع: فرعه بس (نفس export_inventory_excel)
+    if request.user.is_superuser or (profile and profile.role == "admin"):
+        if not Branch.objects.filter(id=branch_id).exists():
+            return HttpResponse("🚫 الفرع المطلوب غير موجود", status=404)
+    elif profile and profile.role == "branch":
+        if not profile.branch_id:
+            return HttpResponse("🚫 لا يوجد فرع مربوط بحسابك", status=400)
+        if profile.branch_id != branch_id:
+            return HttpResponse("🚫 غير مصرح لك", status=403)
+    else:
+        return HttpResponse("🚫 غير مصرح لك", status=403)
+
+    # ⚙️ الملف بيتبني في الخلفية (orders/export_jobs.py) → صفحة المهمة
+    return jobs.start(request, "export_reservations", {"branch_id": branch_id})
 #-------------------------------------------------------------
 def broadcast_new_reservation(reservation, qty=1, user=None):
-    """دالة موحدة لبث الحجز الجديد لجميع الفروع"""
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        "branch_updates",
+    """دالة موحدة لبث الحجز الجديد لشاشة الفرع بتاعه (+ شاشات الأدمن)"""
+    broadcast.publish_branch(
+        reservation.branch_id,
         {
             "type": "branch_update",
             "message": f"🆕 حجز جديد في فرع {reservation.branch.name} ({reservation.product.name} × {qty})",
@@ -141,128 +143,33 @@ def callcenter(request):
 
     if request.method == "POST":
         try:
-            product_id = request.POST.get("product_id")
-            branch_id = request.POST.get("branch_id")
-            customer_name = (request.POST.get("customer_name") or "").strip()
-            customer_phone = (request.POST.get("customer_phone") or "").strip()
-            delivery_type = request.POST.get("delivery_type") or "pickup"
-
             # ✅ هات المنتج والفرع الأول عشان نعرف وحدة المنتج
-            product = get_object_or_404(Product, id=product_id)
-            branch = get_object_or_404(Branch, id=branch_id)
+            product = get_object_or_404(Product, id=request.POST.get("product_id"))
+            branch = get_object_or_404(Branch, id=request.POST.get("branch_id"))
 
-            # ✅ قراءة الكمية بشكل آمن
-            raw_qty = (request.POST.get("quantity") or "1").strip()
+            customer_name = (request.POST.get("customer_name") or "").strip()
             try:
-                q = Decimal(str(raw_qty))
-            except Exception:
-                return JsonResponse({"success": False, "message": "❌ كمية غير صالحة."}, status=400)
-
-            # ✅ تحقق حسب الوحدة
-            if product.unit == "kg":
-                qty = q.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                if qty <= 0:
-                    return JsonResponse({"success": False, "message": "❌ الكمية بالكيلو لازم تكون أكبر من 0."}, status=400)
-            else:
-                # عدد/سرفيز/صاج → أعداد صحيحة فقط
-                qty_int = int(q.to_integral_value(rounding=ROUND_HALF_UP))
-                if qty_int < 1:
-                    return JsonResponse({"success": False, "message": "❌ الكمية لازم تكون عددًا صحيحًا موجبًا."}, status=400)
-                qty = Decimal(qty_int)
-
-            # ✅ معاملة وتحديث المخزون
-            with transaction.atomic():
-                inventory = Inventory.objects.select_for_update().get(product=product, branch=branch)
-
-                if inventory.quantity < qty:
-                    return JsonResponse(
-                        {"success": False, "message": f"❌ الكمية المطلوبة غير متوفرة (المتاح {inventory.quantity})."},
-                        status=400
-                    )
-
-                customer = None
-                if customer_name or customer_phone:
-                    customer = Customer.objects.create(
-                        name=customer_name if customer_name else "عميل مؤقت",
-                        phone=customer_phone if customer_phone else ""
-                    )
-
-                reservation = Reservation.objects.create(
-                    customer=customer,
-                    product=product,
-                    branch=branch,
-                    delivery_type=delivery_type,
-                    status="pending",
-                    quantity=qty,
-                    reserved_by=request.user,
+                qty = parse_quantity(product, request.POST.get("quantity"))
+                # ✅ خصم ذري + العميل + الحجز + البث (orders/booking.py)
+                reservation, new_qty = book(
+                    request.user, product, branch, qty,
+                    customer_name=customer_name,
+                    customer_phone=(request.POST.get("customer_phone") or "").strip(),
+                    delivery_type=request.POST.get("delivery_type") or "pickup",
+                )
+            except (InvalidQuantity, InvalidPhone) as e:
+                return JsonResponse({"success": False, "message": str(e)}, status=400)
+            except InsufficientStock as e:
+                return JsonResponse(
+                    {"success": False, "message": f"❌ الكمية المطلوبة غير متوفرة (المتاح {e.available})."},
+                    status=400
                 )
-
-                # خصم وتثبيت بدقتين عشريتين
-                # inventory.quantity = (inventory.quantity - qty).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                # inventory.save()
-                # ✅ لو المنتج بالكيلو لا تخصم منه كمية (يبقى 999 أو 998 كما هو)
-                if product.unit != "kg":
-                    inventory.quantity = (inventory.quantity - qty).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                    inventory.save()
-
-
-            # ✅ WebSocket: ابعت أرقام كـ string لتفادي Decimal serialization
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                "callcenter_updates",
-                {
-                    "type": "callcenter_update",
-                    "action": "upsert",
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "category_name": product.category.name if product.category else "",
-                    "branch_id": branch.id,
-                    "branch_name": branch.name,
-                    "new_qty": str(inventory.quantity),  # ← مهم
-                    "unit": product.get_unit_display(),
-                    "message": f"📦 تم تحديث {product.name} في فرع {branch.name} إلى {inventory.quantity}",
-                },
-            )
-
-            async_to_sync(channel_layer.group_send)(
-                "branch_updates",
-                {
-                    "type": "branch_update",
-                    "message": f"🆕 حجز جديد ({product.name} × {str(qty)})",
-                    "reservation_id": reservation.id,
-                    "product_name": product.name,
-                    "quantity": str(qty),  # ← مهم
-                    "customer_name": customer.name if customer else "-",
-                    "customer_phone": customer.phone if customer else "-",
-                    "created_at": timezone.localtime(reservation.created_at).strftime('%Y-%m-%d %H:%M:%S'),
-                    "reserved_by": request.user.username,
-                },
-            )
-
-            async_to_sync(channel_layer.group_send)(
-                "reservations_updates",
-                {
-                    "type": "reservations_update",
-                    "action": "new",
-                    "message": f"🆕 تم إضافة حجز جديد #{reservation.id}",
-                    "reservation_id": reservation.id,
-                    "product_name": product.name,
-                    "quantity": str(qty),  # ← مهم
-                    "customer_name": customer.name if customer else "-",
-                    "customer_phone": customer.phone if customer else "-",
-                    "branch_name": branch.name,
-                    "delivery_type": reservation.get_delivery_type_display(),
-                    "status": reservation.get_status_display(),
-                    "created_at": timezone.localtime(reservation.created_at).strftime('%Y-%m-%d %H:%M:%S'),
-                    "decision_at": "",
-                    "reserved_by": request.user.username,
-                },
-            )
 
             return JsonResponse({
                 "success": True,
-                "message": f"✅ تم حجز {product.name}" + (f" للعميل {customer.name}" if customer else ""),
-                "new_qty": str(inventory.quantity),  # ← لتوحيد النوع
+                "message": success_message(product, reservation.customer),
+                "warning": name_conflict(reservation.customer, customer_name),  # الرقم متسجل باسم تاني
+                "new_qty": str(new_qty),  # ← لتوحيد النوع
             })
 
         except Inventory.DoesNotExist:
@@ -277,10 +184,56 @@ def callcenter(request):
         "inventories": inventories,
         "selected_category": int(category_id) if category_id else None,
         "query": query,
+        "realtime_seq": broadcast.latest_seq(),  # 🔁 السوكيت بيكمل من هنا لو وقع
+    })
+#-------------------------------------------------------------
+@require_POST
+async def callcenter_book(request):
+    """
+    نفس حجز callcenter بس async (Daphne) من غير ما الـ request كله يعدي على thread:
+        - المنتج والفرع بالـ async ORM
+        - الكتابة كلها في sync_to_async واحدة (orders/booking.py)
+        - الأحداث بتتبعت من BroadcastMiddleware بـ group_send متوازية (asyncio.gather)
+    """
+    ctx = await request.arole_ctx()
+    if not ctx.is_authenticated:
+        return JsonResponse({"success": False, "message": "❌ لازم تسجل دخول."}, status=401)
+
+    try:
+        product = await Product.objects.select_related("category").aget(id=request.POST.get("product_id"))
+        branch = await Branch.objects.aget(id=request.POST.get("branch_id"))
+    except (Product.DoesNotExist, Branch.DoesNotExist, ValueError, TypeError):
+        return JsonResponse({"success": False, "message": "❌ المنتج أو الفرع غير موجود."}, status=404)
+
+    customer_name = (request.POST.get("customer_name") or "").strip()
+    try:
+        qty = parse_quantity(product, request.POST.get("quantity"))
+        reservation, new_qty = await sync_to_async(book)(
+            request.user, product, branch, qty,
+            customer_name=customer_name,
+            customer_phone=(request.POST.get("customer_phone") or "").strip(),
+            delivery_type=request.POST.get("delivery_type") or "pickup",
+        )
+    except (InvalidQuantity, InvalidPhone) as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=400)
+    except InsufficientStock as e:
+        return JsonResponse(
+            {"success": False, "message": f"❌ الكمية المطلوبة غير متوفرة (المتاح {e.available})."},
+            status=400
+        )
+    except Inventory.DoesNotExist:
+        return JsonResponse({"success": False, "message": "❌ لا يوجد مخزون لهذا المنتج في الفرع المختار."}, status=400)
+
+    return JsonResponse({
+        "success": True,
+        "message": success_message(product, reservation.customer),
+        "warning": name_conflict(reservation.customer, customer_name),
+        "new_qty": str(new_qty),
+        "reservation_id": reservation.id,
     })
 #----------------------------قايمه الحجوزات------------------
-@login_required
-def reservations_list(request):
+def _reservation_filters(request):
+    """فلاتر قايمة الحجوزات (الفترة/البحث/الفرع) — مشتركة بين الصفحة والـ JSON."""
     from datetime import date as dt_date
     today = timezone.localdate()
 
@@ -311,50 +264,104 @@ def reservations_list(request):
         branch = profile.branch
         reservations = reservations.filter(branch=branch)
 
-    reservations = reservations.filter(created_at__date__range=[start_date, end_date])
+    reservations = reservations.filter(**day_range("created_at", start_date, end_date))
     # فلترة بالفرع (للأدمن فقط)
     if branch_filter and branch_filter != "all":
         reservations = reservations.filter(branch_id=branch_filter)
 
     # 🔎 البحث باسم العميل أو رقم تليفونه
     if query:
-        reservations = reservations.filter(
-            Q(customer__name__icontains=query) |
-            Q(customer__phone__icontains=query)
-        )
+        reservations = reservations.filter(customer_q(query, prefix="customer__"))
 
     reservations = reservations.select_related(
-        "product", "branch", "customer"
-    ).order_by("-created_at")
+        "product", "branch", "customer",
+        "reserved_by", "branch_last_modified_by", "admin_last_modified_by",
+    )
+    return {
+        "reservations": reservations,
+        "profile": profile,
+        "today": today,
+        "start_date": start_date,
+        "end_date": end_date,
+        "start_raw": start_raw,
+        "end_raw": end_raw,
+        "query": query,
+        "branch_filter": branch_filter,
+    }
+#-------------------------------------------------------------
+@login_required
+def reservations_list(request):
+    filters = _reservation_filters(request)
+    profile, query, branch_filter = filters["profile"], filters["query"], filters["branch_filter"]
+
+    # 📄 أول صفحة بس (الباقي بالـ scroll من reservations_page)
+    size = page_size(request.GET.get("size"))
+    reservations, next_cursor = keyset_page(filters["reservations"], size=size)
+
+    # 📊 ملخص الحالات من الملخص اليومي (مش متاح مع البحث باسم/تليفون العميل)
+    # إجمالي الملخص هو نفسه العدد التقريبي للقايمة → مفيش count() على الفترة كلها
+    summary = None
+    if not query:
+        if profile and profile.role == "branch":
+            summary_branch = profile.branch_id
+        else:
+            summary_branch = branch_filter if branch_filter and branch_filter != "all" else None
+        summary = status_summary(filters["start_date"], filters["end_date"], summary_branch)
 
     return render(
         request,
         "orders/reservations.html",
         {
             "reservations": reservations,
+            "next_cursor": next_cursor,
+            "page_size": size,
+            "realtime_seq": broadcast.latest_seq(),
+            "summary": summary,
             "user_role": profile.role if profile else None,
-            "start_date": start_raw,
-            "end_date": end_raw,
+            "start_date": filters["start_raw"],
+            "end_date": filters["end_raw"],
             "query": query,
-            "today": today,  # ← أضفها
+            "today": filters["today"],  # ← أضفها
             "branches": Branch.objects.all(),  # علشان نعرضهم في الفلتر
             "selected_branch": int(branch_filter) if branch_filter and branch_filter != "all" else None,
         },
     )
 #-------------------------------------------------------------
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+@login_required
+def reservations_page(request):
+    """
+    الصفحة اللي بعدها من قايمة الحجوزات (infinite scroll):
+        ?<نفس الفلاتر>&cursor=<next_cursor>&size=50
+    → {"html": صفوف الجدول, "next": cursor أو null, "count": عدد الصفوف}
+    """
+    filters = _reservation_filters(request)
+    profile = filters["profile"]
+    try:
+        reservations, next_cursor = keyset_page(
+            filters["reservations"],
+            cursor=request.GET.get("cursor"),
+            size=page_size(request.GET.get("size")),
+        )
+    except InvalidCursor:
+        return JsonResponse({"error": "cursor غير صحيح"}, status=400)
+
+    html = render_to_string("orders/_reservation_rows.html", {
+        "reservations": reservations,
+        "user_role": profile.role if profile else None,
+    }, request=request)
+    return JsonResponse({"html": html, "next": next_cursor, "count": len(reservations)})
+#-------------------------------------------------------------
 from django.utils import timezone
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
 from .models import Reservation, Inventory
 
+@transaction.atomic  # الحالة + المخزون + أحداث الـ outbox مع بعض
 def update_reservation_status(request, res_id, status):
     reservation = get_object_or_404(Reservation, id=res_id)
     profile = getattr(request.user, "userprofile", None)
     is_admin = profile and profile.role == "admin"
     user = request.user
-    channel_layer = get_channel_layer()
 
     old_status = reservation.status
 
@@ -368,22 +375,9 @@ def update_reservation_status(request, res_id, status):
         # لو إعادة تأكيد بعد إلغاء → خصم الكمية تاني
         if old_status == "cancelled":
             try:
-                inv = Inventory.objects.get(product=reservation.product, branch=reservation.branch)
-                inv.quantity = max(inv.quantity - reservation.quantity, 0)
-                inv.save(update_fields=["quantity"])
-                async_to_sync(channel_layer.group_send)(
-                    "callcenter_updates",
-                    {
-                        "type": "callcenter_update",
-                        "action": "inventory_update",
-                        "product_id": reservation.product.id,
-                        "product_name": reservation.product.name,
-                        "category_name": getattr(reservation.product.category, 'name', ''),
-                        "branch_id": reservation.branch.id,
-                        "branch_name": reservation.branch.name,
-                        "new_qty": float(inv.quantity),
-                        "unit": reservation.product.get_unit_display(),
-                    },
+                new_qty = deduct_stock_floor(reservation.branch_id, reservation.product_id, reservation.quantity)
+                broadcast.publish_inventory(
+                    reservation.product, reservation.branch, new_qty, action="inventory_update"
                 )
             except Inventory.DoesNotExist:
                 print("⚠️ لا يوجد سجل مخزون لهذا المنتج في هذا الفرع")
@@ -397,22 +391,9 @@ def update_reservation_status(request, res_id, status):
 
         # استرجاع الكمية للمخزون
         try:
-            inv = Inventory.objects.get(product=reservation.product, branch=reservation.branch)
-            inv.quantity += reservation.quantity
-            inv.save(update_fields=["quantity"])
-            async_to_sync(channel_layer.group_send)(
-                "callcenter_updates",
-                {
-                    "type": "callcenter_update",
-                    "action": "inventory_update",
-                    "product_id": reservation.product.id,
-                    "product_name": reservation.product.name,
-                    "category_name": getattr(reservation.product.category, 'name', ''),
-                    "branch_id": reservation.branch.id,
-                    "branch_name": reservation.branch.name,
-                    "new_qty": float(inv.quantity),
-                    "unit": reservation.product.get_unit_display(),
-                },
+            new_qty = release_stock(reservation.branch_id, reservation.product_id, reservation.quantity)
+            broadcast.publish_inventory(
+                reservation.product, reservation.branch, new_qty, action="inventory_update"
             )
         except Inventory.DoesNotExist:
             print("⚠️ لا يوجد سجل مخزون مطابق لهذا الحجز")
@@ -439,8 +420,8 @@ def update_reservation_status(request, res_id, status):
     # =====================================================
     # 🔄 إرسال تحديث لحظي عبر WebSocket
     # =====================================================
-    async_to_sync(channel_layer.group_send)(
-        "reservations_updates",
+    broadcast.publish_reservation(
+        reservation.branch_id,
         {
             "type": "reservations_update",
             "action": "status_change",
@@ -520,30 +501,33 @@ def reports(request):
                     "end_date": end_raw,
                 },
             )
-    # لو وصلنا هنا يبقى عندنا start_date/end_date صالحين
-    reservations = Reservation.objects.filter(created_at__date__range=[start_date, end_date])
-
-    stats = {
-        "total": reservations.count(),
-        "confirmed": reservations.filter(status="confirmed").count(),
-        "pending": reservations.filter(status="pending").count(),
-        "cancelled": reservations.filter(status="cancelled").count(),
-    }
-    top_products = (
-        reservations.values("product__name").annotate(total=Count("id")).order_by("-total")[:5]
-    )
+    # 🏬 الفرع لازم يكون رقم (?branch=abc كان بيوقع 500 في الـ query)
+    branch_raw = request.GET.get("branch", "").strip()
+    if branch_raw and not branch_raw.isdigit():
+        messages.error(request, "⚠️ الفرع غير صحيح.")
+        return render(
+            request,
+            "orders/reports.html",
+            {
+                "stats": {"total": 0, "confirmed": 0, "pending": 0, "cancelled": 0},
+                "top_products": [],
+                "top_branches": [],
+                "start_date": start_raw,
+                "end_date": end_raw,
+            },
+        )
 
-    top_branches = (
-        reservations.values("branch__name").annotate(total=Count("id")).order_by("-total")[:5]
-    )
+    # لو وصلنا هنا يبقى عندنا start_date/end_date صالحين
+    # 📊 استعلام واحد (أو من الكاش) — orders/reporting.py
+    report = reservation_report(start_date, end_date, int(branch_raw) if branch_raw else None)
 
     return render(
         request,
         "orders/reports.html",
         {
-            "stats": stats,
-            "top_products": top_products,
-            "top_branches": top_branches,
+            "stats": report["stats"],
+            "top_products": report["top_products"][:5],
+            "top_branches": report["top_branches"][:5],
             "start_date": start_raw,  # نبعث القيم كـ string عشان input يفضل ثابت
             "end_date": end_raw,
         },
@@ -552,68 +536,19 @@ def reports(request):
 @login_required
 @role_required(["admin", "branch"])
 def export_reports_excel(request):
-    start_date = request.GET.get("start_date")
-    end_date = request.GET.get("end_date")
-
-    reservations = Reservation.objects.all()
-    if start_date:
-        reservations = reservations.filter(created_at__gte=start_date)
-    if end_date:
-        reservations = reservations.filter(created_at__lte=end_date)
-
-    # ✅ الإحصائيات
-    stats = {
-        "total": reservations.count(),
-        "confirmed": reservations.filter(status="confirmed").count(),
-        "pending": reservations.filter(status="pending").count(),
-        "cancelled": reservations.filter(status="cancelled").count(),
-    }
-
-    # ✅ أكثر المنتجات
-    top_products = (
-        reservations.values("product__name")
-        .annotate(total=Count("id"))
-        .order_by("-total")[:10]
-    )
-
-    # ✅ أفضل الفروع
-    top_branches = (
-        reservations.values("branch__name")
-        .annotate(total=Count("id"))
-        .order_by("-total")[:10]
-    )
-
-    # ✅ إنشاء ملف Excel
-    wb = openpyxl.Workbook()
-
-    # Sheet 1: Stats
-    ws1 = wb.active
-    ws1.title = "Stats"
-    ws1.append(["إحصائية", "القيمة"])
-    ws1.append(["إجمالي الحجوزات", stats["total"]])
-    ws1.append(["✅ Confirmed", stats["confirmed"]])
-    ws1.append(["🕒 Pending", stats["pending"]])
-    ws1.append(["❌ Cancelled", stats["cancelled"]])
-
-    # Sheet 2: Top Products
-    ws2 = wb.create_sheet("Top Products")
-    ws2.append(["Product", "Total Reservations"])
-    for p in top_products:
-        ws2.append([p["product__name"], p["total"]])
-
-    # Sheet 3: Top Branches
-    ws3 = wb.create_sheet("Top Branches")
-    ws3.append(["Branch", "Total Reservations"])
-    for b in top_branches:
-        ws3.append([b["branch__name"], b["total"]])
-
-    # ✅ Response
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename="reports.xlsx"'
-    wb.save(response)
-    return response
+    # كل حد لوحده (فلتر من ناحية واحدة بيفضل)، والتاريخ/الفرع الغلط → 400 هنا قبل ما المهمة تتعمل
+    start_date = as_date(request.GET.get("start_date"))
+    end_date = as_date(request.GET.get("end_date"))
+    branch_raw = request.GET.get("branch", "").strip()
+    if branch_raw and not branch_raw.isdigit():
+        raise BadRequest("⚠️ الفرع غير صحيح.")
+
+    # ⚙️ الملف بيتبني في الخلفية (orders/export_jobs.py)
+    return jobs.start(request, "export_reports", {
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+        "branch": int(branch_raw) if branch_raw else None,
+    })
 #-------------------------------------------------------------
 @login_required
 @role_required(["branch", "admin", "callcenter"])
@@ -650,6 +585,7 @@ def branch_dashboard(request):
                 "is_admin": True,
                 "branches": branches,
                 "selected_branch_id": selected_branch_id,
+                "realtime_seq": broadcast.latest_seq(),
             },
         )
 
@@ -680,6 +616,7 @@ def branch_dashboard(request):
             "inventories": inventories,
             "reservations": reservations,
             "is_admin": False,
+            "realtime_seq": broadcast.latest_seq(),
         },
     )
 #--------------------------------------------------------------
@@ -758,60 +695,16 @@ def export_inventory_excel(request, branch_id=None):
     else:
         return HttpResponse("🚫 غير مصرح لك", status=403)
 
-    # ✅ جلب البيانات
-    inventories = Inventory.objects.filter(branch=branch).select_related("product", "product__category")
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"{branch.name} Inventory"
-
-    # Header
-    headers = ["Product", "Category", "Quantity", "Price"]
-    ws.append(headers)
-
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-    alignment = Alignment(horizontal="center", vertical="center")
-
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = alignment
-
-    # Data rows
-    for inv in inventories:
-        ws.append([
-            inv.product.name,
-            inv.product.category.name if inv.product.category else "",
-            inv.quantity,
-            inv.product.price,
-        ])
-
-    # Auto-fit columns + borders
-    thin_border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-            cell.alignment = alignment
-            cell.border = thin_border
-        ws.column_dimensions[column].width = max_length + 2
-
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="{branch.name}_inventory.xlsx"'
-    wb.save(response)
-    return response
+    # ⚙️ الملف بيتبني في الخلفية (orders/export_jobs.py)
+    return jobs.start(request, "export_inventory", {"branch_id": branch.id})
 #--------------------------------------------------------------
 @role_required(["admin", "callcenter"])
 def customers_list(request):
     query = request.GET.get("q")
-    customers = Customer.objects.all()
+    customers = Customer.objects.order_by("id")
 
     if query:
-        customers = customers.filter(name__icontains=query) | customers.filter(phone__icontains=query)
+        customers = customers.filter(customer_q(query))
 
     # ✅ Pagination: 10 عملاء في كل صفحة
     paginator = Paginator(customers, 10)
@@ -1021,54 +914,12 @@ def update_inventory(request):
                         continue
             _save_worklist(request, worklist)
 
-            updated = 0
-            for pid, qty_str in worklist.items():
-                try:
-                    product = Product.objects.get(id=int(pid))
-                    inv, _ = Inventory.objects.get_or_create(branch=branch, product=product)
-                    # احفظ الكمية كسِمَة Decimal (فُرْصى: Inventory.quantity يجب أن يكون DecimalField)
-                    inv.quantity = to_decimal_safe(qty_str, places=2)
-                    inv.save()
-
-                    # 🔔 إشعار لحظي (أرسل الكمية كسلسلة للحفاظ على الدقة)
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        "callcenter_updates",
-                        {
-                            "type": "callcenter_update",
-                            "action": "upsert",
-                            "product_id": product.id,
-                            "product_name": product.name,
-                            "category_name": product.category.name if product.category else "",
-                            "branch_id": branch.id,
-                            "branch_name": branch.name,
-                            "new_qty": str(inv.quantity),
-                            "unit": product.get_unit_display(),
-                            # "message": f"📦 تم تحديث {product.name} في فرع {branch.name} إلى {inv.quantity}",
-                        }
-                    )
-
-                    # سجل حركة - اختيار نوع الحقل في InventoryTransaction.quantity للتحويل
-                    txn_qty_decimal = to_decimal_safe(qty_str, places=2)
-                    field_type = InventoryTransaction._meta.get_field('quantity').get_internal_type()
-                    if field_type == 'DecimalField':
-                        txn_value = txn_qty_decimal
-                    else:
-                        # fallback: لو لسه IntegerField → نقربه لأقرب عدد صحيح (يمكن تغييره إلى floor/ceil حسب رغبتك)
-                        txn_value = int(txn_qty_decimal.to_integral_value(rounding=ROUND_HALF_UP))
-
-                    InventoryTransaction.objects.create(
-                        product=product,
-                        from_branch=None,
-                        to_branch=branch,
-                        quantity=txn_value,
-                        transaction_type="transfer_in",
-                        added_by=request.user
-                    )
-                    updated += 1
-                except Exception:
-                    # لو فيه أي خطأ في صف معين نتجاهله ونكمّل
-                    continue
+            # 🚀 تطبيق القائمة كلها دفعة واحدة (bulk) + إشعار مجمّع واحد
+            with transaction.atomic():
+                applied = apply_inventory_worklist(branch, worklist, user=request.user)
+                # 🔔 الناقل بيجمعهم في رسالة batch واحدة للكول سنتر (صفوف الـ outbox في query واحدة)
+                broadcast.publish_inventory_many(branch, applied)
+            updated = len(applied)
 
             messages.success(request, f"✅ تم تحديث الكميات لعدد {updated} منتج.")
             return redirect("update_inventory")
@@ -1076,8 +927,7 @@ def update_inventory(request):
         else:
             return JsonResponse({"success": False, "message": "❌ طلب غير معروف"})
 
-    # 🟢 GET = عرض الصفحة
-    categories = Category.objects.all()
+    # 🟢 GET = عرض الصفحة (الأقسام والمنتجات بتترسم في المتصفح من الكتالوج المحفوظ)
     selected_category = request.GET.get("category")
 
     if selected_category == "":
@@ -1087,12 +937,12 @@ def update_inventory(request):
         request.session["selected_category"] = selected_category
     else:
         selected_category = request.session.get("selected_category")
-    products = Product.objects.filter(is_available=True)
-    if selected_category:
-        products = products.filter(category_id=selected_category)
 
-    inventories = Inventory.objects.filter(branch=branch).select_related("product")
-    second_categories = SecondCategory.objects.all()
+    # 📦 المخزون الحالي للفرع {product_id: الكمية} — بيتعرض على كروت المنتجات
+    inventory_quantities = {
+        str(pid): formats.localize(qty)
+        for pid, qty in Inventory.objects.filter(branch=branch).values_list("product_id", "quantity")
+    }
 
     # جهّز العناصر المعروضة في الجدول (من worklist)
     work_items = []
@@ -1138,11 +988,8 @@ def update_inventory(request):
         request,
         "orders/update_inventory.html",
         {
-            "categories": categories,
-            "second_categories": second_categories,
             "selected_category": int(selected_category) if selected_category else None,
-            "products": products,
-            "inventories": inventories,
+            "inventory_quantities": inventory_quantities,
             "branch": branch,
             "stamp_items": stamp_items,
             "work_items": work_items,
@@ -1164,28 +1011,12 @@ def update_inventory_quantity(request):
 
             # ✅ حدّث الكمية الفعلية في جدول Inventory
             product = Product.objects.get(id=product_id)
-            inv, _ = Inventory.objects.get_or_create(branch=branch, product=product)
-            inv.quantity = new_qty.quantize(Decimal("0.01"))
-            inv.save()
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            # ... داخل update_inventory_quantity بعد ما تحفظ التغيير
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                "callcenter_updates",
-                {
-                    "type": "callcenter_update",
-                    "action": "upsert",
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "category_name": product.category.name if product.category else "",
-                    "branch_id": inv.branch.id,
-                    "branch_name": inv.branch.name,
-                    "new_qty": str(inv.quantity),
-                    "unit": product.get_unit_display(),
-                    # "message": f"📦 تم تحديث {product.name} في فرع {inv.branch.name} إلى {inv.quantity}",
-                },
-            )
+            with transaction.atomic():
+                inv, _ = Inventory.objects.get_or_create(branch=branch, product=product)
+                inv.quantity = new_qty.quantize(Decimal("0.01"))
+                inv.save(update_fields=["quantity"])
+                # ... داخل update_inventory_quantity بعد ما تحفظ التغيير
+                broadcast.publish_inventory(product, branch, inv.quantity)
             return JsonResponse({
                 "success": True,
                 "message": "✅ تم تحديث الكمية بنجاح.",
@@ -1322,18 +1153,12 @@ def set_inventory_stamp(request):
             return redirect("set_inventory_stamp")
 
     # 🧩 البيانات
-    products = Product.objects.filter(is_available=True)
-    categories = Category.objects.all()
-    second_categories = SecondCategory.objects.all()
     inventory_stamps = StandardRequest.objects.filter(
         branch=branch,
         stamp_type="inventory"
     ).select_related("product__category").order_by("product__category__name", "product__name")
 
     return render(request, "orders/set_inventory_stamp.html", {
-        "products": products,
-        "categories": categories,
-        "second_categories": second_categories,
         "requests_today": inventory_stamps,  # نفس الاسم عشان الـ HTML يشتغل زي الطلبية
         "selected_category": selected_category,
         "page_title": "استامبا تحديث المخزون"
@@ -1376,7 +1201,7 @@ def inventory_transactions(request):
 
 
     # 🟢 لو المستخدم أدمن
-    if request.user.is_superuser or request.user.groups.filter(name="admin").exists():
+    if request.user.is_superuser or request.role_ctx.in_admin_group:
         transactions = InventoryTransaction.objects.filter(
             transaction_type="transfer_in"
         ).select_related("product", "added_by", "to_branch").order_by("-created_at")
@@ -1399,7 +1224,7 @@ def inventory_transactions(request):
         branches = None  # الفرع ثابت
 
     # فلترة بالتاريخ
-    transactions = transactions.filter(created_at__date__range=[start_date, end_date])
+    transactions = transactions.filter(**day_range("created_at", start_date, end_date))
 
     # فلترة بالقسم
     if category_id:
@@ -1531,8 +1356,18 @@ def add_customer(request):
         phone = request.POST.get("phone")
         address = request.POST.get("address", "")
 
-        customer = Customer.objects.create(name=name, phone=phone, address=address)
-        messages.success(request, f"✅ تم إضافة العميل {customer.name} ({customer.phone})")
+        try:
+            customer = resolve_customer(name, phone, rename=True)
+        except InvalidPhone as e:
+            messages.error(request, str(e))
+            return redirect("customers_list")
+        if customer and address:
+            customer.address = address
+            customer.save(update_fields=["address"])
+        if customer:
+            messages.success(request, f"✅ تم إضافة العميل {customer.name} ({customer.phone})")
+        else:
+            messages.error(request, "❌ لازم اسم أو رقم تليفون.")
         return redirect("customers_list")
 
     return render(request, "orders/add_customer.html")
@@ -1554,16 +1389,21 @@ def resolve_conflict(request):
 
         # لو العميل موجود
         customer = None
-        if action == "use_old":
-            customer = Customer.objects.filter(phone=phone).first()
+        try:
+            if action == "use_old":
+                customer = resolve_customer(phone=phone)
 
-        elif action == "new_customer":
-            customer = Customer.objects.create(name=name, phone=phone)
+            elif action == "rename_customer":
+                # الرقم unique → مينفعش عميل تاني بنفس الرقم: نفس العميل بيتسجل بالاسم الجديد
+                customer = resolve_customer(name, phone, rename=True)
+        except InvalidPhone as e:
+            messages.error(request, str(e))
+            return redirect("callcenter_dashboard")
 
         if customer:
             try:
-                inventory = Inventory.objects.get(product=product, branch=branch)
-                if inventory.quantity >= qty:
+                with transaction.atomic():
+                    new_qty = reserve_stock(branch.id, product.id, qty)
                     Reservation.objects.create(
                         customer=customer,
                         product=product,
@@ -1573,27 +1413,17 @@ def resolve_conflict(request):
                          quantity=qty,
                         reserved_by=request.user if request.user.is_authenticated else None,
                     )
-                    inventory.quantity -= qty
-                    inventory.save()
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        "callcenter_updates",
-                        {
-                            "type": "callcenter_update",
-                            "product_id": product.id,
-                            "branch_id": branch.id,
-                            "branch_name": branch.name,
-                            "new_qty": inventory.quantity,
-                            "message": f"📦 تم تحديث {product.name} في فرع {branch.name} إلى {inventory.quantity}",
-                        }
+                    broadcast.publish_inventory(
+                        product, branch, new_qty,
+                        message=f"📦 تم تحديث {product.name} في فرع {branch.name} إلى {new_qty}",
                     )
 
-                    messages.success(
-                        request,
-                        f"✅ تم حجز {qty} {product.get_unit_display()} من {product.name} للعميل {customer.name}"
-                    )
-                else:
-                    messages.error(request, f"❌ الكمية غير متوفرة من {product.name} في فرع {branch.name}")
+                messages.success(
+                    request,
+                    f"✅ تم حجز {qty} {product.get_unit_display()} من {product.name} للعميل {customer.name}"
+                )
+            except (InsufficientStock, Inventory.DoesNotExist):
+                messages.error(request, f"❌ الكمية غير متوفرة من {product.name} في فرع {branch.name}")
             except Exception as e:
                 messages.error(request, f"حدث خطأ أثناء الحجز: {str(e)}")
 
@@ -1646,8 +1476,9 @@ def change_password(request):
 @login_required
 @user_passes_test(is_admin)
 def manage_data(request):
-    categories = Category.objects.all()
-    products = Product.objects.all()
+    catalog = catalog_snapshot()
+    categories = catalog.categories
+    products = catalog.all_products
     branches = Branch.objects.all()
 
     success_message = None
@@ -1954,29 +1785,30 @@ def view_data(request):
         elif "delete_branch" in request.POST:
             Branch.objects.filter(id=request.POST.get("delete_branch")).delete()
 
-    # ✅ البيانات الأساسية
-    categories = Category.objects.all()
-    second_categories = SecondCategory.objects.all()
+    # ✅ البيانات الأساسية (من كاش الكتالوج)
+    catalog = catalog_snapshot()
+    categories = catalog.categories
+    second_categories = catalog.second_categories
     branches = Branch.objects.all()
 
     # ✅ المنتجات — نبدأ بالكل ثم نفلتر حسب التوفر
-    products = Product.objects.all().select_related("category", "second_category")
+    products = catalog.all_products
 
     # 🔽 فلترة حسب التوفر
     if availability == "available":
-        products = products.filter(is_available=True)
+        products = [p for p in products if p.is_available]
     elif availability == "unavailable":
-        products = products.filter(is_available=False)
+        products = [p for p in products if not p.is_available]
     # else → الكل
 
     # 🔽 فلترة المنتجات حسب البحث والأقسام
     if selected_table == "products":
         if query:
-            products = products.filter(name__icontains=query)
-        if selected_category:
-            products = products.filter(category_id=selected_category)
-        if selected_subcategory:
-            products = products.filter(second_category_id=selected_subcategory)
+            products = [p for p in products if query.casefold() in p.name.casefold()]
+        if selected_category.isdigit():
+            products = [p for p in products if p.category_id == int(selected_category)]
+        if selected_subcategory.isdigit():
+            products = [p for p in products if p.second_category_id == int(selected_subcategory)]
 
     # ✅ تمرير البيانات للقالب
     return render(request, "orders/view_data.html", {
@@ -2005,10 +1837,36 @@ def toggle_product_availability(request, pk):
     except Product.DoesNotExist:
         return JsonResponse({"success": False, "error": "المنتج غير موجود"})
 #-----------------------------------------------------
+# 🗂️ الكتالوج: المتصفح يحتفظ بالنسخة ويسأل كل مرة بالـ ETag (304 لو متغيرش)
+CATALOG_CACHE_CONTROL = "private, no-cache"
+
+@condition(etag_func=catalog_etag)
 def get_subcategories(request):
     main_id = request.GET.get("main_id")
-    subcategories = SecondCategory.objects.filter(main_category_id=main_id).values("id", "name")
-    return JsonResponse(list(subcategories), safe=False)
+    try:
+        subcategories = catalog_snapshot().subcategories_by_category.get(int(main_id), [])
+    except (TypeError, ValueError):
+        subcategories = []
+    response = JsonResponse(subcategories, safe=False)
+    response["Cache-Control"] = CATALOG_CACHE_CONTROL
+    return response
+#------------------------------------------------------
+@login_required
+@condition(etag_func=catalog_etag)
+def catalog_json(request):
+    """
+    الكتالوج كله (قسم ← قسم فرعي ← منتجات) للصفحات اللي بتحمله في المتصفح.
+    ETag = version الكتالوج → 304 من غير body لو متغيرش.
+    """
+    response = HttpResponse(catalog_snapshot().payload(), content_type="application/json")
+    response["Cache-Control"] = CATALOG_CACHE_CONTROL
+    return response
+#------------------------------------------------------
+@login_required
+@user_passes_test(is_admin)
+def broadcast_metrics(request):
+    """حالة طابور البث في البروسيس ده (العمق، المدموج، المتشال، أخطاء الإرسال)."""
+    return JsonResponse(get_publisher().metrics())
 #------------------------------------------------------
 @login_required
 def add_daily_request(request):
@@ -2026,10 +1884,7 @@ def add_daily_request(request):
 
     order_number = request.session.get("current_order_number")
     if not order_number:
-        counter, _ = OrderCounter.objects.get_or_create(id=1)
-        counter.current_number += 1
-        counter.save()
-        order_number = str(counter.current_number)
+        order_number = next_order_number()
         request.session["current_order_number"] = order_number
 
     selected_category = request.session.get("selected_category")
@@ -2192,28 +2047,25 @@ def add_daily_request(request):
         # ✅ تأكيد الطلبية
         elif "confirm_order" in request.POST:
             now = timezone.now()
-            DailyRequest.objects.filter(
-                order_number=order_number, branch=branch
-            ).update(is_confirmed=True, confirmed_at=now)
+            with transaction.atomic():
+                DailyRequest.objects.filter(
+                    order_number=order_number, branch=branch
+                ).update(is_confirmed=True, confirmed_at=now)
 
-            layer = get_channel_layer()
-            async_to_sync(layer.group_send)(
-                "control_updates",
-                {
-                    "type": "control_update",
-                    "action": "new",
-                    "message": f"🆕 طلبية جديدة من فرع {branch.name}",
-                    "order_number": order_number,
-                }
-            )
+                broadcast.publish(
+                    "control_updates",
+                    {
+                        "type": "control_update",
+                        "action": "new",
+                        "message": f"🆕 طلبية جديدة من فرع {branch.name}",
+                        "order_number": order_number,
+                    }
+                )
             request.session["current_order_number"] = None
             request.session["selected_category"] = None
             return redirect("add_daily_request")
 
     # 🧩 البيانات
-    products = Product.objects.filter(is_available=True)
-    categories = Category.objects.all()
-    second_categories = SecondCategory.objects.all()
     requests_today = DailyRequest.objects.filter(
         order_number=order_number, branch=branch, is_confirmed=False
     ).select_related("product__category").order_by("product__category__name", "product__name")
@@ -2223,9 +2075,6 @@ def add_daily_request(request):
     ).values_list("stamp_name", flat=True).distinct()
 
     return render(request, "orders/add_daily_request.html", {
-        "products": products,
-        "categories": categories,
-        "second_categories": second_categories,
         "requests_today": requests_today,
         "order_number": order_number,
         "selected_category": selected_category,
@@ -2400,9 +2249,6 @@ def set_standard_request(request):
         return redirect("set_standard_request")
 
     # ================== GET / عرض الصفحة ==================
-    products = Product.objects.filter(is_available=True)
-    categories = Category.objects.all()
-    second_categories = SecondCategory.objects.all()
 
     # العناصر جوه الاستمبا الحالية
     standard_items = StandardRequest.objects.filter(
@@ -2428,9 +2274,6 @@ def set_standard_request(request):
     ).values_list("stamp_name", flat=True).distinct()
 
     return render(request, "orders/set_standard_request.html", {
-        "products": products,
-        "categories": categories,
-        "second_categories": second_categories,
         "requests_today": standard_items,
         "selected_category": selected_category,
         "page_title": "الطلبية القياسية",
@@ -2459,7 +2302,7 @@ def control_requests(request):
     end_date = request.GET.get("end_date", str(localdate()))
     printed_filter = request.GET.get("printed", "no")
 
-    requests_qs = DailyRequest.objects.filter(is_confirmed=True, created_at__date__range=[start_date, end_date])
+    requests_qs = DailyRequest.objects.filter(is_confirmed=True, **day_range("created_at", start_date, end_date))
 
     if branch_id:
         requests_qs = requests_qs.filter(branch_id=branch_id)
@@ -2485,6 +2328,8 @@ def control_requests(request):
         "selected_end": end_date,
         "selected_branch": branch_id,
         "printed_filter": printed_filter,
+        "cursor": timezone.now().isoformat(),  # 🔖 بداية الـ delta
+        "realtime_seq": broadcast.latest_seq(),
     })
 #-------------------------sockets-----------------------
 @login_required
@@ -2496,7 +2341,7 @@ def control_requests_data(request):
     end_date = request.GET.get("end_date", str(localdate()))
     printed_filter = request.GET.get("printed", "no")
 
-    requests_qs = DailyRequest.objects.filter(is_confirmed=True, created_at__date__range=[start_date, end_date])
+    requests_qs = DailyRequest.objects.filter(is_confirmed=True, **day_range("created_at", start_date, end_date))
 
     if branch_id:
         requests_qs = requests_qs.filter(branch_id=branch_id)
@@ -2518,8 +2363,80 @@ def control_requests_data(request):
 
     return JsonResponse({"html": html})
 #-------------------------------------------------------
+# ⏪ هامش أمان للـ cursor: طلب اتأكد بتوقيت قبل الـ cursor بس اتعمله commit بعده
+CONTROL_CURSOR_OVERLAP = timedelta(seconds=5)
+
+@login_required
+def control_requests_changes(request):
+    """
+    Delta للكنترول: الطلبيات اللي اتأكدت أو اتطبعت بعد ?since=<cursor> بس
+    (JSON مختصر) عشان الصفحة تحدث الكروت دي بس بدل ما ترسم القايمة كلها.
+    """
+    profile = getattr(request.user, "userprofile", None)
+    if not profile or profile.role not in ["control", "admin"]:
+        return JsonResponse({"error": "forbidden"}, status=403)
+
+    cursor = timezone.now()
+    since = parse_datetime(request.GET.get("since", "") or "")
+    if since is None:
+        return JsonResponse({"error": "since مطلوب"}, status=400)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    since -= CONTROL_CURSOR_OVERLAP
+
+    branch_id = request.GET.get("branch")
+    start_date = request.GET.get("start_date", str(localdate()))
+    end_date = request.GET.get("end_date", str(localdate()))
+    printed_filter = request.GET.get("printed", "no")
+
+    base_qs = DailyRequest.objects.filter(is_confirmed=True, **day_range("created_at", start_date, end_date))
+    if branch_id:
+        base_qs = base_qs.filter(branch_id=branch_id)
+
+    changed = (
+        base_qs.filter(Q(confirmed_at__gt=since) | Q(printed_at__gt=since))
+        .values_list("order_number", flat=True)
+        .distinct()
+    )
+    rows = (
+        base_qs.filter(order_number__in=changed)
+        .select_related("branch", "product", "created_by")
+        .order_by("order_number", "created_at")
+    )
+
+    def fmt(dt, pattern="%Y-%m-%d %H:%M:%S"):
+        return timezone.localtime(dt).strftime(pattern) if dt else ""
+
+    orders = {}
+    for r in rows:
+        order = orders.get(r.order_number)
+        if order is None:
+            visible = (
+                printed_filter not in ("yes", "no")
+                or (printed_filter == "yes") == r.is_printed
+            )
+            order = orders[r.order_number] = {
+                "order_number": r.order_number,
+                "branch_name": r.branch.name,
+                "created_by": r.created_by.username if r.created_by else "",
+                "confirmed_at": fmt(r.confirmed_at),
+                "is_printed": r.is_printed,
+                "printed_at": fmt(r.printed_at),
+                "visible": visible,
+                "items": [],
+            }
+        order["items"].append([
+            r.product.name,
+            str(r.quantity),
+            r.product.get_unit_display(),
+            fmt(r.created_at, "%H:%M:%S"),
+        ])
+
+    return JsonResponse({"cursor": cursor.isoformat(), "orders": list(orders.values())})
+#-------------------------------------------------------
 @require_POST
 @login_required
+@transaction.atomic
 def mark_printed(request, order_number):
     requests = DailyRequest.objects.filter(order_number=order_number)
     if not requests.exists():
@@ -2529,8 +2446,7 @@ def mark_printed(request, order_number):
     requests.update(is_printed=True, printed_at=timezone.now())
 
     # ✅ إرسال تحديث للسوكيت
-    layer = get_channel_layer()
-    async_to_sync(layer.group_send)(
+    broadcast.publish(
         "control_updates",
         {
             "type": "control_update",
@@ -2568,7 +2484,7 @@ def branch_requests(request):
     requests_qs = DailyRequest.objects.filter(
         is_confirmed=True,
         branch=branch,
-        created_at__date__range=[start_date, end_date]
+        **day_range("created_at", start_date, end_date),
     )
 
     if printed_filter == "yes":
@@ -2597,120 +2513,12 @@ def branch_requests(request):
 @role_required(["admin"])
 def import_products(request):
     if request.method == "POST" and request.FILES.get("excel_file"):
-        excel_file = request.FILES["excel_file"]
-        try:
-            wb = openpyxl.load_workbook(excel_file)
-            sheet = wb.active
-
-            # ✅ الأعمدة المطلوبة
-            expected_headers = [
-                "name", "price", "category_name", "second_category_name", "unit", "Is Show"
-            ]
-            headers = [str(cell.value).strip() if cell.value else "" for cell in sheet[1]]
-
-            required_headers = ["name", "price", "category_name", "second_category_name"]
-            if any(h not in headers for h in required_headers):
-                messages.error(
-                    request,
-                    "❌ ملف Excel غير صحيح، يجب أن يحتوي على الأعمدة التالية على الأقل:\n"
-                    "name, price, category_name, second_category_name"
-                )
-                return redirect("import_products")
-
-            header_index = {h: headers.index(h) for h in headers if h in expected_headers}
-            count = 0
-            hidden_count = 0
-            visible_count = 0
-
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                name = row[header_index["name"]] if "name" in header_index else None
-                price = row[header_index["price"]] if "price" in header_index else None
-                category_name = row[header_index["category_name"]] if "category_name" in header_index else None
-                second_category_name = row[header_index["second_category_name"]] if "second_category_name" in header_index else None
-                unit_value = row[header_index["unit"]] if "unit" in header_index else None
-                is_show_value = row[header_index["Is Show"]] if "Is Show" in header_index else None
-
-                if not name:
-                    continue
-
-                # 🔹 السعر
-                try:
-                    price_value = Decimal(str(price)) if price is not None else Decimal("0.0")
-                except (InvalidOperation, TypeError, ValueError):
-                    price_value = Decimal("0.0")
-
-                # 🔹 الكاتيجوري الرئيسي
-                category = None
-                if category_name:
-                    category, _ = Category.objects.get_or_create(name=str(category_name).strip())
-
-                # 🔹 الكاتيجوري الفرعي
-                second_category = None
-                if second_category_name and category:
-                    second_category, _ = SecondCategory.objects.get_or_create(
-                        name=str(second_category_name).strip(),
-                        main_category=category
-                    )
-
-                # 🔹 الوحدة
-                unit_value = str(unit_value).strip().lower() if unit_value else "piece"
-                if unit_value not in ["piece", "kg"]:
-                    unit_value = "piece"
-
-                # 🔹 Is Show (عمود الإكسيل)
-                is_shwo_clean = None
-                is_available = True  # الافتراضي
-
-                if isinstance(is_show_value, str):
-                    is_show_value = is_show_value.strip().lower()
-
-                if is_show_value in [True, "true", "yes", "1"]:
-                    is_shwo_clean = True
-                    is_available = False   # ⬅️ العكس
-                    hidden_count += 1
-                elif is_show_value in [False, "false", "no", "0"]:
-                    is_shwo_clean = False
-                    is_available = True    # ⬅️ العكس
-                    visible_count += 1
-                else:
-                    is_shwo_clean = None
-                    is_available = True
-                    visible_count += 1
-
-                # 🔹 إنشاء أو تحديث المنتج
-                product, created = Product.objects.get_or_create(
-                    name=str(name).strip(),
-                    defaults={
-                        "price": price_value,
-                        "category": category,
-                        "second_category": second_category,
-                        "unit": unit_value,
-                        "is_available": is_available,
-                        "is_shwo": is_shwo_clean,
-                    }
-                )
-
-                if not created:
-                    product.price = price_value
-                    product.category = category
-                    product.second_category = second_category
-                    product.unit = unit_value
-                    product.is_available = is_available
-                    product.is_shwo = is_shwo_clean
-                    product.save()
-
-                count += 1
-
-            messages.success(
-                request,
-                f"✅ تم استيراد أو تحديث {count} منتج.\n"
-                f"📦 المعروضة: {visible_count}, 🚫 المخفية: {hidden_count}"
-            )
-            return redirect("import_products")
-
-        except Exception as e:
-            messages.error(request, f"⚠️ حدث خطأ أثناء قراءة الملف: {e}")
-            return redirect("import_products")
+        # ⚙️ القراءة والمطابقة والحفظ في الخلفية (orders/export_jobs.py) → صفحة المهمة فيها التقدم والتقرير
+        return jobs.start(
+            request, "import_products",
+            {"dry_run": bool(request.POST.get("dry_run")), "file_name": request.FILES["excel_file"].name},
+            input_file=request.FILES["excel_file"],
+        )
 
     # 📄 GET → عرض الصفحة
     return render(request, "orders/import_products.html")
@@ -2725,14 +2533,13 @@ def set_production_items(request):
     current_cat = request.POST.get("current_cat", request.GET.get("current_cat", "")).strip()
 
     # الأقسام كلها متاحة للفلترة (اللي فوق)
-    categories = Category.objects.all().order_by("name")
+    catalog = catalog_snapshot()
+    categories = catalog.categories_by_name()
 
     # المنتجات المتاحة للإضافة
-    products_qs = Product.objects.filter(is_available=True).select_related("category")
-    if selected_cat:
-        products_qs = products_qs.filter(category_id=selected_cat)
+    products_qs = catalog.available_products(selected_cat if selected_cat.isdigit() else None)
     if query:
-        products_qs = products_qs.filter(name__icontains=query)
+        products_qs = [p for p in products_qs if query.casefold() in p.name.casefold()]
 
     # العناصر الحالية في جدول الإنتاج
     current_items = ProductionTemplate.objects.select_related("product", "product__category").order_by(
@@ -2845,12 +2652,13 @@ def add_production_request(request):
             "already_confirmed": False,
         })
 
-    # هل الفرع أكد القسم ده النهارده؟
-    confirmed_products = ProductionRequest.objects.filter(
-        branch=branch, date=today, confirmed=True
-    ).values_list("product_id", flat=True)
+    # هل الفرع أكد القسم ده النهارده؟ (سجل ProductionConfirmation — orders/production.py)
+    section_categories = {t.product.category_id for t in templates} - {None}
+    already_confirmed_section = bool(section_categories) and section_categories <= confirmed_categories(
+        branch, today, section_categories
+    )
 
-    existing = ProductionRequest.objects.filter(branch=branch, date=today).select_related("product")
+    existing = ProductionRequest.objects.filter(branch=branch, date=today)
     existing_map = {pr.product_id: pr for pr in existing}
 
     # POST
@@ -2858,53 +2666,26 @@ def add_production_request(request):
         # لو فيه قسم محدد، استخدمه في الرابط بعد الحفظ
         redirect_url = f"{reverse('add_production_request')}?category={selected_cat}"
 
-        # تأكد إن الفرع ما أكّدش القسم ده بالكامل قبل كده
-        already_confirmed_section = all(t.product_id in confirmed_products for t in templates)
+        # تأكد إن الفرع ما أكّدش القسم ده قبل كده
         if already_confirmed_section:
             messages.error(request, "✅ تم تأكيد هذا القسم مسبقًا. لا يمكن التعديل.")
             return redirect(redirect_url)
 
-        saved = 0
-        for t in templates:
-            pid = t.product_id
-            key = f"quantities[{pid}]"
-            raw = (request.POST.get(key) or "").strip()
-            q = to_decimal_safe(raw, places=2)
-            if q < 0:
-                q = Decimal("0.00")
-
-            if not unit_allows_fraction(t.product.unit):
-                q = q.to_integral_value(rounding=ROUND_HALF_UP)
+        # 🏭 كل كميات القسم في upsert واحد + التأكيد UPDATE واحد (orders/production.py)
+        products = [t.product for t in templates]
+        quantities = {
+            p.id: clean_quantity(p, request.POST.get(f"quantities[{p.id}]") or "")
+            for p in products
+        }
+        confirm = "confirm" in request.POST
+        saved = save_quantities(branch, request.user, today, quantities,
+                                confirm_products=products if confirm else None)
 
-            obj, _ = ProductionRequest.objects.get_or_create(
-                branch=branch, product=t.product, date=today,
-                defaults={"quantity": Decimal("0.00"), "created_by": request.user}
-            )
-            obj.quantity = q
-            obj.created_by = request.user
-            obj.save()
-            saved += 1
-
-        # تأكيد القسم فقط
-        if "confirm" in request.POST:
-            now_ = timezone.now()
-            ProductionRequest.objects.filter(
-                branch=branch, date=today, product__in=[t.product for t in templates]
-            ).update(confirmed=True, confirmed_at=now_)
-            # إشعار الكنترول
-            layer = get_channel_layer()
-            async_to_sync(layer.group_send)(
-                "control_updates",
-                {
-                    "type": "control_update",
-                    "action": "production_confirmed",
-                    "message": f"✅ فرع {branch.name} أكد قسم {templates.first().product.category.name} لليوم.",
-                }
-            )
-            messages.success(request, f"✅ تم تأكيد قسم {templates.first().product.category.name} ({saved} صف).")
+        if confirm:
+            messages.success(request, f"✅ تم تأكيد قسم {products[0].category.name} ({saved} صف).")
             return redirect(redirect_url)
 
-        messages.success(request, f"💾 تم حفظ الكميات ({saved} صف) في قسم {templates.first().product.category.name}.")
+        messages.success(request, f"💾 تم حفظ الكميات ({saved} صف) في قسم {products[0].category.name}.")
         return redirect(redirect_url)
 
     # تجهيز عناصر العرض
@@ -2919,12 +2700,11 @@ def add_production_request(request):
             "product": t.product,
             "unit": t.product.get_unit_display(),
             "quantity": cur_qty,
-            "is_confirmed": t.product_id in confirmed_products
+            "is_confirmed": already_confirmed_section or (
+                t.product_id in existing_map and existing_map[t.product_id].confirmed
+            ),
         })
 
-    # هل كل القسم مؤكد؟
-    already_confirmed_section = all(i["is_confirmed"] for i in items)
-
     return render(request, "orders/add_production_request.html", {
         "items": items,
         "today": today,
@@ -2935,6 +2715,65 @@ def add_production_request(request):
     })
 #-----------------------------------------------------
 @login_required
+@role_required(["branch"])
+@require_POST
+def save_production_cells(request):
+    """
+    حفظ الخلايا اللي اتعدلت بس (JSON) من صفحة طلب الإنتاج:
+    {"quantities": {"<product_id>": "<qty>", ...}, "category": "<id>", "confirm": false}
+    """
+    profile = getattr(request.user, "userprofile", None)
+    branch = profile.branch if profile else None
+    if not branch:
+        return JsonResponse({"success": False, "message": "🚫 لا يوجد فرع مربوط بحسابك."}, status=403)
+
+    try:
+        payload = json.loads(request.body or b"{}")
+        cells = payload.get("quantities") or {}
+        if not isinstance(cells, dict):
+            raise ValueError
+    except (ValueError, AttributeError):
+        return JsonResponse({"success": False, "message": "❌ بيانات غير صالحة."}, status=400)
+
+    today = localdate()
+    category_id = str(payload.get("category") or "").strip()
+    confirm = bool(payload.get("confirm"))
+
+    templates = ProductionTemplate.objects.filter(is_active=True).select_related("product", "product__category")
+    if category_id:
+        templates = templates.filter(product__category_id=category_id)
+    products = {t.product_id: t.product for t in templates}
+    if confirm and not (category_id and products):
+        return JsonResponse({"success": False, "message": "❌ اختر القسم قبل التأكيد."}, status=400)
+
+    try:
+        wanted = {int(pid): raw for pid, raw in cells.items()}
+    except (TypeError, ValueError):
+        return JsonResponse({"success": False, "message": "❌ بيانات غير صالحة."}, status=400)
+    unknown = [pid for pid in wanted if pid not in products]
+    if unknown:
+        return JsonResponse({"success": False, "message": "❌ منتجات خارج قالب الإنتاج.", "unknown": unknown}, status=400)
+
+    # القسم المؤكد مايتعدلش
+    touched = {products[pid].category_id for pid in wanted}
+    if confirm:
+        touched |= {p.category_id for p in products.values()}
+    touched.discard(None)
+    locked = confirmed_categories(branch, today, touched)
+    if (locked & {products[pid].category_id for pid in wanted}) or (confirm and locked >= touched):
+        return JsonResponse({"success": False, "message": "✅ تم تأكيد هذا القسم مسبقًا. لا يمكن التعديل."}, status=409)
+
+    quantities = {pid: clean_quantity(products[pid], raw) for pid, raw in wanted.items()}
+    saved = save_quantities(branch, request.user, today, quantities,
+                            confirm_products=list(products.values()) if confirm else None)
+    return JsonResponse({
+        "success": True,
+        "saved": saved,
+        "confirmed": confirm,
+        "quantities": {str(pid): str(q) for pid, q in quantities.items()},
+    })
+#-----------------------------------------------------
+@login_required
 @role_required(["control", "admin","production"])
 def production_overview(request):
     """
@@ -2953,90 +2792,28 @@ def production_overview(request):
     except ValueError:
         the_date = localdate()
 
-    # الفروع
-    branches = list(Branch.objects.all().order_by("name"))
-    if branch_filter:
-        branches = [b for b in branches if str(b.id) == branch_filter]
-
     # الأقسام
     categories = Category.objects.filter(
             products__production_templates__is_active=True
         ).distinct().order_by("name")
 
-    # الطلبات
-    pr_qs = ProductionRequest.objects.filter(date=the_date).select_related("product", "branch", "product__category")
-
-    # المنتجات الفعالة من قالب الكنترول
-    templates = ProductionTemplate.objects.filter(is_active=True).select_related("product", "product__category").order_by(
-        "product__category__name", "product__name"
-    )
-
-    # ✅ فلترة المنتجات حسب القسم لو المستخدم اختار قسم معين
-    if category_filter:
-        templates = templates.filter(product__category_id=category_filter)
-
-    products = [t.product for t in templates]
-
-    # خريطة كميات
-    cell = {}
-    for pr in pr_qs:
-        cell[(pr.product_id, pr.branch_id)] = to_decimal_safe(pr.quantity, places=2)
-
-    rows = []
-    grand_total = Decimal("0.00")
-    for p in products:
-        per_branch = []
-        row_total = Decimal("0.00")
-        for b in Branch.objects.all().order_by("name"):
-            if branch_filter and str(b.id) != branch_filter:
-                continue
-            q = cell.get((p.id, b.id), Decimal("0.00"))
-            if not unit_allows_fraction(p.unit):
-                q = q.to_integral_value()
-            per_branch.append(q)
-            row_total += Decimal(str(q))
-        if hide_zero and all(q == 0 for q in per_branch):
-            continue
-        grand_total += row_total
-        rows.append({
-            "product": p,
-            "unit": p.get_unit_display(),
-            "per_branch": per_branch,
-            "total": row_total
-        })
+    # 🏭 مصفوفة (منتج × فرع) + الإجماليات بعدد queries ثابت (orders/production.py)
+    matrix = ProductionMatrix.build(the_date, branch_id=branch_filter, category_id=category_filter)
+    rows = list(matrix.rows(hide_zero=hide_zero))
+    column_totals, grand_total = matrix.totals()
 
     # اسم الفرع لو محدد
-    branch_name = None
-    if branch_filter:
-        try:
-            branch_name = Branch.objects.get(id=branch_filter).name
-        except Branch.DoesNotExist:
-            branch_name = None
-    # 🔍 فحص حالة كل فرع (هل أكّد كل الأقسام المطلوبة؟)
-    branch_status = []
-    templates_all = ProductionTemplate.objects.filter(is_active=True).values_list("product_id", flat=True)
-
-    for b in Branch.objects.all().order_by("name"):
-        total_required = templates_all.count()
-        confirmed_count = ProductionRequest.objects.filter(
-            branch=b, date=the_date, confirmed=True, product_id__in=templates_all
-        ).count()
-
-        # ✅ لو عدد المنتجات المؤكدة = كل المنتجات المطلوبة
-        is_done = (confirmed_count == total_required and total_required > 0)
-
-        branch_status.append({
-            "branch": b,
-            "done": is_done,
-            "confirmed": confirmed_count,
-            "total": total_required
-        })
+    branch_name = matrix.branches[0].name if branch_filter and matrix.branches else None
+
+    # 🔍 حالة كل فرع (هل أكّد كل الأقسام المطلوبة؟) — aggregate واحد
+    branch_status = branch_completion(the_date, matrix.all_branches)
 
     return render(request, "orders/production_overview.html", {
         "date": the_date.isoformat(),
-        "branches": Branch.objects.all().order_by("name"),
+        "branches": matrix.all_branches,
         "categories": categories,  # ✅ جديد
         "rows": rows,
+        "column_totals": column_totals,
         "grand_total": grand_total,
         "branch_filter": branch_filter,
         "branch_name": branch_name,
@@ -3060,118 +2837,39 @@ def export_production_excel(request):
     except ValueError:
         the_date = localdate()
 
-    # 🏬 الفروع (فلترة حسب الاختيار)
-    branches = list(Branch.objects.all().order_by("name"))
-    if branch_filter:
-        branches = [b for b in branches if str(b.id) == branch_filter]
-
-    # 🧩 المنتجات الفعالة من قالب الكنترول (ومفلترة بالقسم إن وُجد)
-    templates = ProductionTemplate.objects.filter(is_active=True).select_related("product", "product__category")
-    if category_filter:
-        templates = templates.filter(product__category_id=category_filter)
-    templates = templates.order_by("product__category__name", "product__name")
-    products = [t.product for t in templates]
-
-    # 🗂️ الطلبات الفعلية حسب التاريخ فقط
-    pr_qs = ProductionRequest.objects.filter(date=the_date).select_related("product", "branch")
-    if branch_filter:
-        pr_qs = pr_qs.filter(branch_id=branch_filter)
-    if category_filter:
-        pr_qs = pr_qs.filter(product__category_id=category_filter)
-
-    # 🧮 خريطة كميات
-    cell = {}
-    for pr in pr_qs:
-        cell[(pr.product_id, pr.branch_id)] = to_decimal_safe(pr.quantity, places=2)
-
-    # 🧾 إنشاء ملف Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"Production {the_date.isoformat()}"
-
-    # ✳️ أول صف توثيقي: التاريخ + الفرع + القسم (بدون حالة الأصفار)
-    branch_name = ""
-    if branch_filter:
-        try:
-            branch_name = Branch.objects.get(id=branch_filter).name
-        except Branch.DoesNotExist:
-            branch_name = ""
-    else:
-        branch_name = "كل الفروع"
-
-    category_name = ""
-    if category_filter:
-        try:
-            category_name = Category.objects.get(id=category_filter).name
-        except Category.DoesNotExist:
-            category_name = ""
-    else:
-        category_name = "كل الأقسام"
-
-    # info_text = f"📅 التاريخ: {the_date.isoformat()} | 🏬 {branch_name} | 📂 {category_name}"
-    info_text = f"📅 التاريخ: {the_date.strftime('%Y/%m/%d')} | 🏬 {branch_name} | 📂 {category_name}"
-
-    # 🧩 صف التوثيق
-    ws.append([info_text])
-    total_cols = len(["المنتج", "الوحدة"] + [b.name for b in branches] + ["الإجمالي"])
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=total_cols)
-
-    ws["A1"].font = Font(bold=True, size=12, color="000000")
-    ws["A1"].alignment = Alignment(horizontal="center")
-    ws["A1"].fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")  # لون رمادي فاتح
-
-    # 🧩 صف العناوين
-    headers = ["المنتج", "الوحدة"] + [b.name for b in branches] + ["الإجمالي"]
-    ws.append(headers)
-
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-    align_center = Alignment(horizontal="center", vertical="center")
-    thin_border = Border(left=Side(style="thin"), right=Side(style="thin"),
-                         top=Side(style="thin"), bottom=Side(style="thin"))
-
-    # 🎨 تهيئة رؤوس الجدول
-    for col_idx, h in enumerate(headers, 1):
-        c = ws.cell(row=2, column=col_idx)
-        c.font = header_font
-        c.fill = header_fill
-        c.alignment = align_center
-        c.border = thin_border
-
-    # 🧩 تعبئة البيانات
-    for p in products:
-        per_branch = []
-        total = Decimal("0.00")
-        for b in branches:
-            q = cell.get((p.id, b.id), Decimal("0.00"))
-            if not unit_allows_fraction(p.unit):
-                q = q.to_integral_value()
-            per_branch.append(q)
-            total += Decimal(str(q))
-
-        if hide_zero and all(q == 0 for q in per_branch):
-            continue
-
-        ws.append([p.name, p.get_unit_display()] + per_branch + [total])
-
-    # ⚙️ تنسيق الأعمدة (تجاوز الصف المدموج الأول)
-    for col_cells in ws.iter_cols(min_row=2):
-        first_cell = col_cells[0]
-        col_letter = first_cell.column_letter
-        max_len = 0
-        for c in col_cells:
-            c.border = thin_border
-            c.alignment = align_center
-            if c.value:
-                max_len = max(max_len, len(str(c.value)))
-        ws.column_dimensions[col_letter].width = max_len + 2
-
-    # 📄 إعداد ملف الرد
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    filename = f"production_{the_date.isoformat()}.xlsx"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
+    # ⚙️ الملف بيتبني في الخلفية (orders/export_jobs.py)
+    return jobs.start(request, "export_production", {
+        "date": the_date.isoformat(),
+        "branch": branch_filter,
+        "category": category_filter,
+        "hide_zero": hide_zero,
+    })
+#-----------------------------------------------------
+@login_required
+def job_detail(request, job_id):
+    """صفحة المهمة: التقدم لايف (WebSocket + polling احتياطي) والتنزيل لما تخلص."""
+    job = _own_job(request, job_id)
+    return render(request, "orders/job_detail.html", {
+        "job": job,
+        "job_label": jobs.label(job.kind),
+        "payload": jobs.job_payload(job),
+        "realtime_seq": broadcast.latest_seq(),
+    })
+#-----------------------------------------------------
+@login_required
+def job_status(request, job_id):
+    return JsonResponse(jobs.job_payload(_own_job(request, job_id)))
+#-----------------------------------------------------
+@login_required
+def job_download(request, job_id):
+    job = _own_job(request, job_id)
+    if job.status != "done" or not job.result_file:
+        raise Http404("الملف مش جاهز")
+    return FileResponse(job.result_file.open("rb"), as_attachment=True, filename=job.result_name)
 #-----------------------------------------------------
+def _own_job(request, job_id):
+    """المهمة لصاحبها (أو الأدمن) بس — غير كده 404 زي ما تكون مش موجودة."""
+    job = get_object_or_404(Job, id=job_id)
+    if job.created_by_id != request.user.id and not is_admin(request.user):
+        raise Http404
+    return job
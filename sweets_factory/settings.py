@@ -44,8 +44,10 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "orders.middleware.RoleContextMiddleware",  # ✅ صلاحيات المستخدم مرة واحدة لكل request
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "orders.middleware.BroadcastMiddleware",  # ✅ تجميع أحداث الـ WebSocket لكل request
 ]
 
 ROOT_URLCONF = "sweets_factory.urls"
@@ -70,11 +72,52 @@ TEMPLATES = [
 # WSGI_APPLICATION = "sweets_factory.wsgi.application"
 ASGI_APPLICATION = "sweets_factory.asgi.application"
 # القناة (layer) لتخزين الجروب
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+# 🔹 من غير CHANNEL_REDIS_URL → InMemory (عملية Daphne واحدة بس)
+# 🔹 CHANNEL_REDIS_URL=redis://host:6379/0 → كل العمليات بتشوف نفس الجروبات (أكتر من worker)
+#    CHANNEL_REDIS_PUBSUB=1 → RedisPubSubChannelLayer بدل الـ core layer
+#    للتجربة من غير Redis: python manage.py channels_redis_stub
+CHANNEL_REDIS_URL = env("CHANNEL_REDIS_URL", default="")
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": (
+                "channels_redis.pubsub.RedisPubSubChannelLayer"
+                if env.bool("CHANNEL_REDIS_PUBSUB", default=False)
+                else "channels_redis.core.RedisChannelLayer"
+            ),
+            "CONFIG": {
+                "hosts": [CHANNEL_REDIS_URL],
+                "prefix": env("CHANNEL_REDIS_PREFIX", default="sweets"),
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+# 🔹 الكاش (تقارير وغيره)
+# من غير CACHE_REDIS_URL → LocMem (لكل عملية)، ومع أكتر من worker لازم Redis
+# عشان إلغاء الكاش (version) يوصل لكل العمليات.
+CACHE_REDIS_URL = env("CACHE_REDIS_URL", default="")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+            "KEY_PREFIX": "sweets",
+        }
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+# 🗂️ عمر version الكتالوج (ثواني): بعده البصمة بتتحسب تاني من الداتابيز → التعديلات من بروسيس
+# تاني (Daphne/run_jobs) بتوصل حتى مع LocMem. مع Redis الإلغاء بيوصل فورًا والرقم ده احتياطي بس.
+CATALOG_VERSION_TTL = env.int("CATALOG_VERSION_TTL", default=5)
 # 🔹 قاعدة البيانات
 DATABASE_URL = env("DATABASE_URL", default=None)
 if DATABASE_URL:
@@ -120,6 +163,27 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# 🔹 أرقام الطلبيات: كل worker بيحجز الأرقام دي مرة واحدة من OrderCounter
+# (أكبر = ضغط أقل على الصف، بس فجوات أكبر في الترقيم بعد أي restart)
+ORDER_NUMBER_BLOCK_SIZE = env.int("ORDER_NUMBER_BLOCK_SIZE", default=10)
+
+# 🔹 البث للـ WebSocket: الأحداث بتتحط في طابور في البروسيس وبتتبعت في الخلفية
+# (الـ response مش بيستنى الـ channel layer). الطابور مليان → أقدم حدث بيتشال.
+BROADCAST_QUEUE_ENABLED = env.bool("BROADCAST_QUEUE_ENABLED", default=True)
+BROADCAST_QUEUE_SIZE = env.int("BROADCAST_QUEUE_SIZE", default=10000)
+BROADCAST_BATCH_SIZE = env.int("BROADCAST_BATCH_SIZE", default=500)
+# كل حدث بيتكتب كمان في RealtimeEvent (outbox): صف لكل حدث، وbulk_create واحد لكل transaction بعد الـ commit
+# → relay_events بيبعت اللي موصلش، والشاشات بتكمل من آخر seq بعد انقطاع السوكيت.
+#    relay_events بيبعت من بروسيس منفصل → محتاج CHANNEL_REDIS_URL (من غيره بيمسح القديم بس).
+REALTIME_OUTBOX_ENABLED = env.bool("REALTIME_OUTBOX_ENABLED", default=True)
+
+# 🔹 المهام في الخلفية (الاستيراد والتصدير التقيل): بيشغلها `python manage.py run_jobs`
+# JOBS_ENABLED = False → بتتنفذ جوه الـ request زي الأول (من غير worker).
+JOBS_ENABLED = env.bool("JOBS_ENABLED", default=True)
+JOBS_WORKERS = env.int("JOBS_WORKERS", default=2)
+JOBS_KEEP_DAYS = env.int("JOBS_KEEP_DAYS", default=3)
+JOB_FILES_ROOT = env("JOB_FILES_ROOT", default=str(BASE_DIR / "job_files"))
+
 # 🔹 باسورد افتراضي (اختياري)
 DEFAULT_USER_PASSWORD = env("DEFAULT_USER_PASSWORD", default="12345678")
 LOGIN_URL = '/login/'